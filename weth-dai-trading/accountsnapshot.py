@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from logger import logger
+from credentials import client
+from journal import record
+
+
+# Threads issuing the blocking reads of an account snapshot (the dYdX client and web3 calls block on network I/O).
+executor = ThreadPoolExecutor( max_workers=8, thread_name_prefix='accountsnapshot' )
+
+
+# Run blocking calls concurrently and return their results in the order specified.
+# The wall-clock time is that of the slowest call (the first exception raised by a call is raised here).
+def fetchconcurrently( *calls ) -> list:
+    futures = [ executor.submit( call ) for call in calls ]
+    return [ future.result() for future in futures ]
+
+
+# The account state read in a single round of concurrent calls (all issued at takenat, a time.time() timestamp).
+# balances: dYdX account balances (indexed by market), walletbalances: wallet balances by market,
+# orderbooks: REST orderbooks by market, oracleprices: oracle prices by market and collateralization (None unless requested).
+class AccountSnapshot:
+
+    def __init__( self, takenat: float, balances: list, walletbalances: dict, orderbooks: dict, oracleprices: dict, collateralization ):
+        self.takenat = takenat
+        self.balances = balances
+        self.walletbalances = walletbalances
+        self.orderbooks = orderbooks
+        self.oracleprices = oracleprices
+        self.collateralization = collateralization
+
+
+# Read the dYdX account balances along with the other reads specified, concurrently.
+def takesnapshot(
+        walletmarkets: tuple = (),
+        orderbookmarkets: tuple = (),
+        oraclemarkets: tuple = (),
+        collateralization: bool = False
+    ) -> AccountSnapshot:
+    calls = [ client.eth.solo.get_my_balances ]
+    calls += [ partial( client.eth.get_my_wallet_balance, market ) for market in walletmarkets ]
+    calls += [ partial( client.get_orderbook, market=market ) for market in orderbookmarkets ]
+    calls += [ partial( client.eth.solo.get_oracle_price, market ) for market in oraclemarkets ]
+    if collateralization:
+        calls.append( client.eth.solo.get_my_collateralization )
+
+    takenat = time.time()
+    start = time.perf_counter()
+    results = fetchconcurrently( *calls )
+    logger.debug( f'account snapshot of {len( calls )} reads taken in {( time.perf_counter() - start )*1000:.1f} ms.' )
+
+    balances = results.pop( 0 )
+    walletbalances = { market: results.pop( 0 ) for market in walletmarkets }
+    orderbooks = { market: results.pop( 0 ) for market in orderbookmarkets }
+    oracleprices = { market: results.pop( 0 ) for market in oraclemarkets }
+    record( "balances", balances=balances, walletbalances=walletbalances, takenat=takenat )
+    return AccountSnapshot(
+        takenat,
+        balances,
+        walletbalances,
+        orderbooks,
+        oracleprices,
+        results.pop( 0 ) if collateralization else None
+    )
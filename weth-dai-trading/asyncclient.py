@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from logger import logger
+from credentials import client
+from latency import TimedClient
+
+
+# Maximum number of calls in flight and timeouts (in seconds) per endpoint (a client method name, dotted for eth.solo methods).
+limits = {
+    "place_order": 4,
+    "post_order": 4,
+    "cancel_order": 4,
+    "get_orderbook": 8,
+    "get_order": 8,
+    "eth.solo.get_my_balances": 2
+}
+timeouts = {
+    "place_order": 10,
+    "post_order": 10,
+    "cancel_order": 10,
+    "get_orderbook": 5,
+    "get_order": 5,
+    "get_markets": 5
+}
+defaultlimit = 8
+defaulttimeout = 30
+
+
+# Reuse HTTP connections between calls (keep-alive) with a connection pool as large as the thread pool.
+# This applies to clients that send their requests through a requests session (like dydx.client.Client).
+def keepalive( restclient, poolsize: int ) -> None:
+    try:
+        from requests import Session
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        return
+    session = getattr( restclient, 'session', None )
+    if isinstance( session, Session ):
+        adapter = HTTPAdapter( pool_connections=poolsize, pool_maxsize=poolsize )
+        session.mount( 'https://', adapter )
+        session.mount( 'http://', adapter )
+
+
+# Call the synchronous dYdX client from asyncio code without blocking the event loop.
+# Calls run on a pool of threads sharing keep-alive connections, with a concurrency limit and a timeout per endpoint.
+# Any client method can be awaited by name (await restclient.place_order( ... )) or by dotted name (await restclient.call( 'eth.solo.get_my_balances' )).
+# The round trips of orders placed, canceled and looked up are recorded in latency histograms (see latency.TimedClient).
+# A call that times out raises asyncio.TimeoutError but may still complete on the exchange (e.g. an order placed late).
+# Use an AsyncClient from a single event loop (e.g. the loop of a WebsocketHub).
+class AsyncClient:
+
+    def __init__( self, restclient=None, poolsize: int = 16, limits: dict = limits, timeouts: dict = timeouts ):
+        restclient = restclient if restclient is not None else client
+        self.client = restclient if isinstance( restclient, TimedClient ) else TimedClient( restclient )
+        self.executor = ThreadPoolExecutor( max_workers=poolsize, thread_name_prefix='asyncclient' )
+        self.limits = limits
+        self.timeouts = timeouts
+        self.semaphores = {}
+        keepalive( self.client, poolsize )
+
+    def __getattr__( self, name: str ):
+        if name.startswith( '_' ):
+            raise AttributeError( name )
+        return partial( self.call, name )
+
+    # Resolve an endpoint name into a client method.
+    def method( self, endpoint: str ):
+        method = self.client
+        for name in endpoint.split( '.' ):
+            method = getattr( method, name )
+        return method
+
+    async def call( self, endpoint: str, *args, **kwargs ):
+        method = self.method( endpoint )
+        semaphore = self.semaphores.get( endpoint )
+        if semaphore is None:
+            semaphore = self.semaphores[endpoint] = asyncio.Semaphore( self.limits.get( endpoint, defaultlimit ) )
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor( self.executor, partial( method, *args, **kwargs ) ),
+                    self.timeouts.get( endpoint, defaulttimeout )
+                )
+            except asyncio.TimeoutError:
+                logger.debug( f'{endpoint} timed out after {self.timeouts.get( endpoint, defaulttimeout )} seconds.' )
+                raise
+
+    def close( self ) -> None:
+        self.executor.shutdown( wait=False )
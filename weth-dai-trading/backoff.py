@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+
+import random
+
+
+# Alert (SMS) once per outage when this many reconnection attempts in a row have failed.
+alertattempts = 5
+
+
+# Delay reconnection attempts with jittered exponential backoff.
+# Each delay is drawn uniformly between zero and a cap that doubles with every attempt (up to the maximum, in seconds),
+# so the first attempt is almost immediate and many clients dropped at once do not reconnect in lockstep.
+class Backoff:
+
+    def __init__( self, initial: float = 0.25, maximum: float = 30, factor: float = 2 ):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.attempts = 0
+
+    # Return the delay before the next attempt.
+    def delay( self ) -> float:
+        cap = min( self.maximum, self.initial * self.factor ** self.attempts )
+        self.attempts += 1
+        return random.uniform( 0, cap )
+
+    # Start over once a connection is ready again.
+    def reset( self ) -> None:
+        self.attempts = 0
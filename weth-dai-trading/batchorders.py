@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+
+import time
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+import dydx.constants as consts
+
+from logger import logger
+from orderer import client
+from orderer import postonlyorder
+from pagination import pages
+from credentials import walletaddress
+
+
+# Requests sent per second (and in a single burst) by the batch operations, shared by every batch of the process.
+# A burst as large as a typical ladder lets emergency flattening go out at once, within the rate limits of the exchange.
+rate = 10
+burst = 20
+
+# Threads issuing the requests of a batch (the dYdX client blocks on network I/O).
+executor = ThreadPoolExecutor( max_workers=burst, thread_name_prefix='batchorders' )
+
+# Order states that can still be canceled.
+openstates = [ "OPEN", "PARTIALLY_FILLED" ]
+
+
+# Space requests out to a sustained rate with bursts of up to burst requests (a token bucket), across threads.
+class RateLimit:
+
+    def __init__( self, rate: float, burst: int ):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updatedat = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Block until a request may be sent.
+    def acquire( self ) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min( self.burst, self.tokens + ( now - self.updatedat ) * self.rate )
+            self.updatedat = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep( wait )
+
+
+ratelimit = RateLimit( rate, burst )
+
+
+# The outcome of a batch: responses and exceptions by key (an order hash or a price), and the time taken (in seconds).
+class BatchResult:
+
+    def __init__( self, responses: dict, errors: dict, elapsed: float ):
+        self.responses = responses
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def ok( self ) -> bool:
+        return not self.errors
+
+
+# Send a call once the rate limit allows it.
+def limited( call ):
+    ratelimit.acquire()
+    return call()
+
+
+# Run the calls specified (by key) concurrently under the rate limit and gather their responses and exceptions.
+# A call that fails does not stop the others.
+def runbatch( calls: dict, description: str = 'requests' ) -> BatchResult:
+    start = time.perf_counter()
+    futures = { key: executor.submit( limited, call ) for key, call in calls.items() }
+    responses = {}
+    errors = {}
+    for key, future in futures.items():
+        try:
+            responses[key] = future.result()
+        except Exception as e:
+            errors[key] = e
+            logger.critical( f'{description} {key} failed: {e}' )
+    elapsed = time.perf_counter() - start
+    logger.debug( f'{len( responses )} of {len( calls )} {description} succeeded in {elapsed*1000:.1f} ms.' )
+    return BatchResult( responses, errors, elapsed )
+
+
+# Cancel the orders specified by hash.
+def cancelorders( hashes: list ) -> BatchResult:
+    return runbatch( { orderhash: partial( client.cancel_order, hash=orderhash ) for orderhash in hashes }, 'cancellations' )
+
+
+# Return the open orders of the wallet in a market (on one side only if specified).
+# Every page is read (including the orders sharing the creation time of the last order of a page, see pagination.pages).
+def openorders( market: str = consts.PAIR_WETH_DAI, side: str = None ) -> list:
+    orders = []
+    for page in pages( partial( client.get_orders, market=[ market ], status=openstates, accountOwner=walletaddress ), "orders" ):
+        orders += [ order for order in page if order["status"] in openstates and ( side is None or order["side"] == side ) ]
+    return orders
+
+
+# Cancel every open order of the wallet in a market (on one side only if specified).
+def cancelall( market: str = consts.PAIR_WETH_DAI, side: str = None ) -> BatchResult:
+    return cancelorders( [ order["id"] for order in openorders( market, side ) ] )
+
+
+# Place the orders specified (place_order parameters), keyed by their position in the list.
+def placeorders( orders: list ) -> BatchResult:
+    return runbatch( { position: partial( client.place_order, **parameters ) for position, parameters in enumerate( orders ) }, 'orders' )
+
+
+# Place a ladder of post-only WETH-DAI orders of the quantity specified at each of the prices specified, keyed by price.
+def placeladder( side: str, prices: list, quantity ) -> BatchResult:
+    return runbatch( { price: partial( client.place_order, **postonlyorder( side, price, quantity ) ) for price in prices }, 'orders' )
+
+
+# Cancel orders and place others in the same round of concurrent requests (e.g. to replace an ask with a stop).
+# Responses are keyed by order hash for the cancellations and by "order <position in the list>" for the orders placed (all strings).
+def flatten( hashes: list, orders: list ) -> BatchResult:
+    calls = { orderhash: partial( client.cancel_order, hash=orderhash ) for orderhash in hashes }
+    calls.update( { f'order {position}': partial( client.place_order, **parameters ) for position, parameters in enumerate( orders ) } )
+    return runbatch( calls, 'cancellations and orders' )
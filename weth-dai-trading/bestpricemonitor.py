@@ -0,0 +1,102 @@
+from decimal import Decimal
+from functools import partial
+
+from logger import logger
+from latency import triggered
+from journal import record
+from orderbookfeed import OrderBookFeed
+from orderbookfeed import monitororderbook
+from websockethub import WebsocketHub
+from trailingtrigger import TrailingLimits
+
+
+# The best price of each side of the orderbook as the log messages name it.
+bestprices = { "BUY": "highest bid", "SELL": "lowest ask" }
+
+
+# Follow the best price of a side of the orderbook ("BUY" for the highest bid, "SELL" for the lowest ask)
+# and return it once it crosses the sliding limits (see TrailingLimits).
+async def bestpricemessagehandler(
+        feed: OrderBookFeed,
+        entries,
+        initialminimumprice: str,
+        percentdepreciation: str,
+        initialmaximumprice: str,
+        percentappreciation: str,
+        side: str = "BUY"
+    ) -> None:
+
+    # Precompute the exit thresholds in integer ticks of the orderbook.
+    limits = TrailingLimits(
+        feed.book.quotetick,
+        initialminimumprice,
+        percentdepreciation,
+        initialmaximumprice,
+        percentappreciation
+    )
+    bestprice = bestprices[side]
+
+    async for messageid, snapshot, sides in entries:
+
+        # Skip messages that leave the side of the orderbook unchanged.
+        if side not in sides:
+            continue
+
+        # Determine the best price of the side in the orderbook.
+        bestticks = feed.book.best( side )
+        if bestticks is None:
+            continue
+        price = feed.book.price( bestticks )
+
+        # Display price information.
+        if snapshot:
+            logger.debug( 'initial information received... [lower price bound / upper price bound : %.2f/%.2f DAI/ETH] the %s in the orderbook is: %.2f DAI/ETH [Message ID: %s].', limits.lowerlimit, limits.upperlimit, bestprice, price, messageid )
+        else:
+            logger.debug( 'updated information received... [lower price bound / upper price bound : %.2f/%.2f DAI/ETH] the %s in the orderbook is: %.2f DAI/ETH [Message ID: %s].', limits.lowerlimit, limits.upperlimit, bestprice, price, messageid )
+
+        # Evaluate the sliding limits and exit once the trigger is reached.
+        if limits.evaluate( bestticks ):
+            if limits.triggered == "lower" and limits.exitonpeak:
+                logger.debug( f'The {bestprice} [{price:.2f} DAI/ETH] in the orderbook just dropped below a {limits.depreciation*100:.2f}% margin over the lower price bound [{limits.lowerlimit:.2f} DAI/ETH].' )
+            elif limits.triggered == "upper" and limits.exitontrough:
+                logger.debug( f'The {bestprice} [{price:.2f} DAI/ETH] in the orderbook just exceeded a {limits.appreciation*100:.2f}% margin below the upper price bound [{limits.upperlimit:.2f} DAI/ETH].' )
+            elif limits.triggered == "lower":
+                logger.debug( f'The {bestprice} [{price:.2f} DAI/ETH] in the orderbook just dropped below the lower price bound [{limits.lowerlimit:.2f} DAI/ETH].' )
+            elif limits.triggered == "upper":
+                logger.debug( f'The {bestprice} [{price:.2f} DAI/ETH] in the orderbook just exceeded the upper price bound [{limits.upperlimit:.2f} DAI/ETH].' )
+            triggered()
+            record( "trigger", market='WETH-DAI', side=side, limit=limits.triggered, price=price, lowerlimit=limits.lowerlimit, upperlimit=limits.upperlimit )
+            return price
+
+
+async def monitorbestprice(
+        side: str,
+        initialminimumprice: str,
+        depreciationtrigger: str,
+        initialmaximumprice: str,
+        appreciationtrigger: str,
+        quotetick: str = '0.01',
+        hub: WebsocketHub = None
+    ) ->  None:
+    # Display configuration parameters.
+    logger.debug( f'configure "initialminimumprice" to: {initialminimumprice} DAI/ETH.' )
+    logger.debug( f'configure "initialmaximumprice" to: {initialmaximumprice} DAI/ETH.' )
+    logger.debug( f'configure "depreciationtrigger" to: {Decimal(depreciationtrigger)*100:.2f} %.' )
+    logger.debug( f'configure "appreciationtrigger" to: {Decimal(appreciationtrigger)*100:.2f} %.' )
+    logger.debug( f'configure "quotetick" to: {quotetick} DAI/ETH.' )
+
+    handler = partial(
+        bestpricemessagehandler,
+        initialminimumprice = initialminimumprice,
+        percentdepreciation = depreciationtrigger,
+        initialmaximumprice = initialmaximumprice,
+        percentappreciation = appreciationtrigger,
+        side = side
+    )
+
+    # Use the live WETH-DAI orderbook of the hub if there is one.
+    # Otherwise, subscribe to the WETH-DAI orderbook channel and run the handler until the exit trigger is reached.
+    # Only the side monitored is decoded for a dedicated subscription.
+    if hub is not None:
+        return await hub.monitororderbook( 'WETH-DAI', handler, quotetick=quotetick )
+    return await monitororderbook( 'WETH-DAI', handler, quotetick=quotetick, sides=( side, ) )
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+
+import os
+import sys
+import gzip
+import json
+import time
+import datetime
+from decimal import Decimal
+
+# pip3 install numpy
+import numpy as np
+
+import dydx.constants as consts
+
+from orderbook import OrderBook
+
+
+# Keep the store in this directory (set DYDXSTOREDIR to keep it elsewhere).
+storedirectory = os.environ.get( 'DYDXSTOREDIR', '/tmp/columnstore' )
+
+# The typed columns of every table and the period covered by each of its partitions (a NumPy datetime unit: months or days).
+# Timestamps are microseconds since the epoch (UTC), sides are 1 (BUY) or -1 (SELL), amounts are in units of the base currency
+# (e.g. ETH, not wei), fees in units of the quote currency and prices as quoted by dYdX (quote currency per base currency).
+tables = {
+    "fills": ( 'M', [ ( "timestamp", '<i8' ), ( "side", 'i1' ), ( "price", '<f8' ), ( "amount", '<f8' ), ( "fee", '<f8' ), ( "orderid", 'S66' ), ( "id", 'S36' ) ] ),
+    "trades": ( 'M', [ ( "timestamp", '<i8' ), ( "side", 'i1' ), ( "price", '<f8' ), ( "amount", '<f8' ), ( "fee", '<f8' ), ( "orderid", 'S66' ), ( "id", 'S36' ) ] ),
+    "ticks": ( 'D', [ ( "timestamp", '<i8' ), ( "bid", '<f8' ), ( "ask", '<f8' ) ] )
+}
+
+# Decimals of the currencies (to convert amounts and fees from their smallest units).
+decimals = {
+    "WETH": consts.DECIMALS_WETH,
+    "DAI": consts.DECIMALS_DAI,
+    "USDC": consts.DECIMALS_USDC
+}
+
+
+# Return the partitions (e.g. 2020-07 or 2020-07-14) of timestamps (microseconds since the epoch).
+def partitionnames( timestamps, unit: str ) -> np.ndarray:
+    return np.datetime_as_string( np.asarray( timestamps, dtype='<i8' ).astype( 'datetime64[us]' ).astype( f'datetime64[{unit}]' ) )
+
+
+# Return a dYdX (ISO-8601) time as microseconds since the epoch.
+def microseconds( createdat: str ) -> int:
+    moment = datetime.datetime.strptime( createdat.rstrip( 'Z' ), '%Y-%m-%dT%H:%M:%S.%f' ).replace( tzinfo=datetime.timezone.utc )
+    return int( moment.timestamp() ) * 1000000 + moment.microsecond
+
+
+# Keep fills, trades and top-of-book ticks by market as typed columns, one binary file per column in time partitioned directories:
+# <directory>/<table>/<market>/<partition>/<column>.bin (e.g. /tmp/columnstore/fills/WETH-DAI/2020-07/price.bin).
+# Rows are appended in time order, and a scan maps the column files of the partitions overlapping its period into NumPy arrays,
+# so queries over a year of history are vectorized operations over a few memory mapped files.
+# Rows older than the last row stored (or identical to one stored with the same timestamp) are skipped, so syncing twice is harmless.
+class ColumnStore:
+
+    def __init__( self, directory: str = storedirectory ):
+        self.directory = directory
+
+    def dtype( self, table: str ) -> np.dtype:
+        return np.dtype( tables[table][1] )
+
+    def partitions( self, table: str, market: str ) -> list:
+        path = os.path.join( self.directory, table, market )
+        return sorted( os.listdir( path ) ) if os.path.isdir( path ) else []
+
+    # Return the number of complete rows of a partition (a row cut short by a crash is ignored).
+    def rowcount( self, path: str, dtype: np.dtype ) -> int:
+        counts = []
+        for name in dtype.names:
+            column = os.path.join( path, name + '.bin' )
+            counts.append( os.path.getsize( column ) // dtype[name].itemsize if os.path.exists( column ) else 0 )
+        return min( counts )
+
+    # Return a column of a partition memory mapped (the first count rows).
+    def column( self, path: str, name: str, dtype: np.dtype, count: int ) -> np.ndarray:
+        if count == 0:
+            return np.empty( 0, dtype=dtype[name] )
+        return np.memmap( os.path.join( path, name + '.bin' ), dtype=dtype[name], mode='r', shape=( count, ) )
+
+    # Return the rows of the last timestamp stored (to skip the rows already stored).
+    def lastrows( self, table: str, market: str ) -> np.ndarray:
+        dtype = self.dtype( table )
+        for partition in reversed( self.partitions( table, market ) ):
+            path = os.path.join( self.directory, table, market, partition )
+            count = self.rowcount( path, dtype )
+            if count:
+                timestamps = self.column( path, "timestamp", dtype, count )
+                first = np.searchsorted( timestamps, timestamps[-1] )
+                rows = np.empty( count - first, dtype=dtype )
+                for name in dtype.names:
+                    rows[name] = self.column( path, name, dtype, count )[first:]
+                return rows
+        return np.empty( 0, dtype=dtype )
+
+    # Append rows (tuples of the columns of the table) and return the number of rows stored.
+    def append( self, table: str, market: str, rows: list ) -> int:
+        unit, columns = tables[table]
+        dtype = self.dtype( table )
+        rows = np.sort( np.array( rows, dtype=dtype ), order="timestamp", kind='stable' )
+        last = self.lastrows( table, market )
+        if len( last ) and len( rows ):
+            stored = set( last.tolist() )
+            keep = rows["timestamp"] > last["timestamp"][-1]
+            for index in np.flatnonzero( rows["timestamp"] == last["timestamp"][-1] ):
+                keep[index] = rows[index].tolist() not in stored
+            rows = rows[keep]
+        if not len( rows ):
+            return 0
+        partitions = partitionnames( rows["timestamp"], unit )
+        for partition in np.unique( partitions ):
+            path = os.path.join( self.directory, table, market, partition )
+            os.makedirs( path, exist_ok=True )
+            selected = rows[partitions == partition]
+            count = self.rowcount( path, dtype )
+            for name, _ in columns:
+                with open( os.path.join( path, name + '.bin' ), 'r+b' if os.path.exists( os.path.join( path, name + '.bin' ) ) else 'wb' ) as column:
+                    column.truncate( count * dtype[name].itemsize )
+                    column.seek( 0, os.SEEK_END )
+                    column.write( np.ascontiguousarray( selected[name] ).tobytes() )
+        return len( rows )
+
+    # Return the columns specified (every column by default) of the rows of a market between since and until (seconds since the epoch).
+    # Only the partitions overlapping the period are read.
+    def scan( self, table: str, market: str, since: float = None, until: float = None, columns: list = None ) -> dict:
+        unit, _ = tables[table]
+        dtype = self.dtype( table )
+        names = [ name for name in dtype.names if columns is None or name in columns ]
+        first = partitionnames( [ int( since * 1000000 ) ], unit )[0] if since is not None else None
+        last = partitionnames( [ int( until * 1000000 ) ], unit )[0] if until is not None else None
+        parts = { name: [] for name in names }
+        for partition in self.partitions( table, market ):
+            if first is not None and partition < first or last is not None and partition > last:
+                continue
+            path = os.path.join( self.directory, table, market, partition )
+            count = self.rowcount( path, dtype )
+            timestamps = self.column( path, "timestamp", dtype, count )
+            start = np.searchsorted( timestamps, since * 1000000 ) if since is not None else 0
+            end = np.searchsorted( timestamps, until * 1000000, side='right' ) if until is not None else count
+            for name in names:
+                parts[name].append( self.column( path, name, dtype, count )[start:end] )
+        return { name: np.concatenate( arrays ) if arrays else np.empty( 0, dtype=dtype[name] ) for name, arrays in parts.items() }
+
+    # Return the row of a dYdX fill or trade (the order id of a trade is that of its maker order).
+    def row( self, table: str, market: str, entry: dict ) -> tuple:
+        basecurrency, quotecurrency = market.split( '-' )
+        return (
+            microseconds( entry["createdAt"] ),
+            1 if entry["side"] == "BUY" else -1,
+            float( entry["price"] ),
+            int( Decimal( entry["amount"] ) ) / 10 ** decimals[basecurrency],
+            int( Decimal( entry.get( "fee" ) or 0 ) ) / 10 ** decimals[quotecurrency],
+            ( entry.get( "orderId" ) or entry.get( "makerOrderId" ) or '' ).encode(),
+            entry["uuid"].encode()
+        )
+
+    # Append dYdX fills or trades (e.g. the pages fetched by a trade history sync) and return the number of rows stored.
+    def appendentries( self, table: str, market: str, entries: list ) -> int:
+        return self.append( table, market, [ self.row( table, market, entry ) for entry in entries ] )
+
+
+# Return the realized profit and loss of the fills of a market over a period, marked to the last tick of its last day (or the last fill price):
+# volume (base currency), position (base currency), cash flow (quote currency, net of fees) and P&L (cash flow + position marked to price).
+def pnl( store: ColumnStore, market: str, since: float = None, until: float = None ) -> dict:
+    fills = store.scan( "fills", market, since, until, [ "side", "price", "amount", "fee" ] )
+    ticks = store.scan( "ticks", market, ( until or time.time() ) - 86400, until, [ "bid", "ask" ] )
+    position = float( np.sum( fills["side"] * fills["amount"] ) )
+    cashflow = float( -np.sum( fills["side"] * fills["amount"] * fills["price"] ) - np.sum( fills["fee"] ) )
+    mark = float( ( ticks["bid"][-1] + ticks["ask"][-1] ) / 2 ) if len( ticks["bid"] ) else float( fills["price"][-1] ) if len( fills["price"] ) else 0.0
+    return {
+        "fills": len( fills["side"] ),
+        "volume": float( np.sum( fills["amount"] ) ),
+        "position": position,
+        "cashflow": cashflow,
+        "mark": mark,
+        "pnl": cashflow + position * mark
+    }
+
+
+# Return the slippage of the fills of a market over a period against the mid price of the last tick before each fill,
+# in basis points (positive when the fill was worse than the mid): the amount weighted mean and percentiles.
+# Fills earlier than the first tick scanned (from an hour before since) are left out.
+def slippage( store: ColumnStore, market: str, since: float = None, until: float = None ) -> dict:
+    fills = store.scan( "fills", market, since, until, [ "timestamp", "side", "price", "amount" ] )
+    ticks = store.scan( "ticks", market, since - 3600 if since is not None else None, until, [ "timestamp", "bid", "ask" ] )
+    before = np.searchsorted( ticks["timestamp"], fills["timestamp"], side='right' ) - 1
+    matched = before >= 0
+    if not np.any( matched ):
+        return { "fills": 0 }
+    mid = ( ticks["bid"][before[matched]] + ticks["ask"][before[matched]] ) / 2
+    basispoints = fills["side"][matched] * ( fills["price"][matched] - mid ) / mid * 10000
+    return {
+        "fills": int( np.sum( matched ) ),
+        "mean": float( np.average( basispoints, weights=fills["amount"][matched] ) ),
+        "p50": float( np.percentile( basispoints, 50 ) ),
+        "p90": float( np.percentile( basispoints, 90 ) ),
+        "p99": float( np.percentile( basispoints, 99 ) )
+    }
+
+
+# Store the top of the book (highest bid and lowest ask) of a recording made by framerecorder.py, once per change.
+def importframes( store: ColumnStore, path: str, market: str = 'WETH-DAI' ) -> int:
+    book = OrderBook()
+    rows = []
+    top = None
+    with gzip.open( path, 'rt' ) as recording:
+        for line in recording:
+            if not line.strip():
+                continue
+            receivedat, textoutput = json.loads( line )
+            dictionary = json.loads( textoutput )
+            if dictionary.get( "channel" ) != "orderbook" or dictionary.get( "id" ) != market or "contents" not in dictionary:
+                continue
+            contents = dictionary["contents"]
+            if "updates" in contents:
+                for updatedata in contents["updates"]:
+                    book.apply( updatedata )
+            else:
+                book.load( contents )
+            bid, ask = book.bestbid(), book.bestask()
+            if bid is not None and ask is not None and ( bid, ask ) != top:
+                top = ( bid, ask )
+                rows.append( ( int( receivedat * 1000000 ), float( bid ), float( ask ) ) )
+    return store.append( "ticks", market, rows )
+
+
+# Store the top of the book of a live orderbook feed once per change, in batches written every flushinterval seconds.
+async def recordticks( store: ColumnStore, feed, seconds: float = None, flushinterval: float = 1 ) -> int:
+    stored = 0
+    rows = []
+    top = None
+    deadline = time.monotonic() + seconds if seconds else None
+    flushat = time.monotonic() + flushinterval
+    entries = feed.listen()
+    try:
+        async for messageid, snapshot, sides in entries:
+            bid, ask = feed.bestbid(), feed.bestask()
+            if bid is not None and ask is not None and ( bid, ask ) != top:
+                top = ( bid, ask )
+                rows.append( ( int( time.time() * 1000000 ), float( bid ), float( ask ) ) )
+            if time.monotonic() >= flushat:
+                stored += store.append( "ticks", feed.market, rows )
+                rows = []
+                flushat = time.monotonic() + flushinterval
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    finally:
+        stored += store.append( "ticks", feed.market, rows )
+        await entries.aclose()
+    return stored
+
+
+if __name__ == "__main__":
+    # py columnstore.py report WETH-DAI 365       # P&L and slippage of the fills of the last 365 days
+    # py columnstore.py frames weth-dai-frames.jsonl.gz WETH-DAI  # store the top of the book of a frame recording
+    # py columnstore.py ticks WETH-DAI 3600       # store the live top of the book for an hour
+    store = ColumnStore()
+    command = sys.argv[1] if len( sys.argv ) > 1 else 'report'
+    if command == 'report':
+        market = sys.argv[2] if len( sys.argv ) > 2 else 'WETH-DAI'
+        since = time.time() - float( sys.argv[3] ) * 86400 if len( sys.argv ) > 3 else None
+        start = time.perf_counter()
+        print ( json.dumps( { "pnl": pnl( store, market, since ), "slippage": slippage( store, market, since ) }, indent=4 ) )
+        print ( f'queried in {( time.perf_counter() - start )*1000:.0f} ms', file=sys.stderr )
+    elif command == 'frames':
+        print ( f'{importframes( store, sys.argv[2], sys.argv[3] if len( sys.argv ) > 3 else "WETH-DAI" )} ticks stored' )
+    elif command == 'ticks':
+        from websockethub import WebsocketHub
+        hub = WebsocketHub()
+        hub.start()
+        feed = hub.call( hub.orderbook( sys.argv[2] if len( sys.argv ) > 2 else 'WETH-DAI' ) )
+        print ( f'{hub.call( recordticks( store, feed, float( sys.argv[3] ) if len( sys.argv ) > 3 else None ) )} ticks stored' )
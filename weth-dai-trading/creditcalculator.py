@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 
+import time
 from decimal import Decimal
+from functools import partial
 
 from dydx.client import Client
 import dydx.constants as consts
@@ -9,6 +11,10 @@ import dydx.util as utils
 
 from logger import logger
 from credentials import client
+from credentials import walletaddress
+from journal import record
+from accountsnapshot import takesnapshot
+from accountsnapshot import fetchconcurrently
 
 
 # dYdX allows margin trades
@@ -16,20 +22,23 @@ from credentials import client
 # This module determines credit available
 # Calculations are based on the value of the dYdX account
 def creditavailable( leverage ):
-    # Get (set) dYdX markets and define market constants
-    minimumcollateralization = 1.25
+    # Get dYdX account balances (fairly static) and the orderbooks of the USDC pairs (much more dynamic) concurrently
+    snapshot = takesnapshot( orderbookmarkets=( consts.PAIR_DAI_USDC, consts.PAIR_WETH_USDC ) )
+    daiusdorderbook = snapshot.orderbooks[consts.PAIR_DAI_USDC]
+    ethusdorderbook = snapshot.orderbooks[consts.PAIR_WETH_USDC]
 
-    # Get dYdX account balances first (fairly static)
-    balances = client.eth.solo.get_my_balances()
+    return calculatecredit( leverage, snapshot.balances, daiusdorderbook["asks"][0]["price"], ethusdorderbook["asks"][0]["price"] )
 
-    # Get the orderbook for the trading pair specified (much more dynamic)
-    daiusdorderbook = client.get_orderbook( market = consts.PAIR_DAI_USDC )
-    ethusdorderbook = client.get_orderbook( market = consts.PAIR_WETH_USDC )
+
+# Determine the credit available from the account balances and the lowest DAI-USDC and WETH-USDC asks (as quoted by dYdX).
+def calculatecredit( leverage, balances, daiusdask, ethusdask ):
+    # Get (set) dYdX markets and define market constants
+    minimumcollateralization = 1.25
 
     # Parse out the dYdX ETH & DAI sales prices
     # They are returned in US dollar terms (USDC)
-    daiusdprice = Decimal( daiusdorderbook["asks"][0]["price"] ) * 10**( consts.DECIMALS_DAI - consts.DECIMALS_USDC )
-    ethusdprice = Decimal( ethusdorderbook["asks"][0]["price"] ) * 10**( consts.DECIMALS_WETH - consts.DECIMALS_USDC )
+    daiusdprice = Decimal( daiusdask ) * 10**( consts.DECIMALS_DAI - consts.DECIMALS_USDC )
+    ethusdprice = Decimal( ethusdask ) * 10**( consts.DECIMALS_WETH - consts.DECIMALS_USDC )
     logger.debug( f'The best sale price for 1 DAI on dYdX is presently: {daiusdprice:10.4f} US dollars')
     logger.debug( f'The best sale price for 1 ETH on dYdX is presently: {ethusdprice:10.4f} US dollars')
 
@@ -83,6 +92,92 @@ def creditavailable( leverage ):
 
     return availablecredit
 
+
+# Answer creditavailable without a blocking call per invocation.
+# Account balances are fetched once and kept until a fill is pushed on the orders channel of the wallet,
+# invalidate() is called (after a deposit or a withdrawal) or they are older than the staleness bound (maxage, in seconds).
+# USDC prices are read from the live DAI-USDC and WETH-USDC orderbooks of a WebsocketHub
+# (from REST orderbooks if there is no hub or while its connection is down).
+# The last answer for each leverage is reused until one of its inputs changes.
+class CreditService:
+
+    def __init__( self, hub=None, maxage: float = 60 ):
+        self.hub = hub
+        self.maxage = maxage
+        self.balances = None
+        self.fetchedat = None
+        self.feeds = {}
+        self.answers = {}
+        if hub is not None:
+            if hub.loop is None:
+                hub.start()
+            for market in ( consts.PAIR_DAI_USDC, consts.PAIR_WETH_USDC ):
+                self.feeds[market] = hub.call( hub.orderbook( market ) )
+            validator = hub.call( hub.orders( walletaddress ) )
+            validator.listeners.append( self.orderupdated )
+
+    # Drop the cached balances once an order of the wallet is (partially) filled.
+    def orderupdated( self, order: dict ) -> None:
+        if order["status"] in ( "FILLED", "PARTIALLY_FILLED" ):
+            self.invalidate()
+
+    def invalidate( self ) -> None:
+        self.balances = None
+
+    # Return the cached account balances (None if they were invalidated or are older than maxage seconds).
+    def cachedbalances( self, maxage: float = None ) -> list:
+        maxage = self.maxage if maxage is None else maxage
+        balances = self.balances
+        if balances is None or time.monotonic() - self.fetchedat > maxage:
+            return None
+        return balances
+
+    def storebalances( self, balances: list ) -> list:
+        self.fetchedat = time.monotonic()
+        self.balances = balances
+        record( "balances", balances=balances )
+        return balances
+
+    # Return the account balances (fetched again if they were invalidated or are older than maxage seconds).
+    def accountbalances( self, maxage: float = None ) -> list:
+        balances = self.cachedbalances( maxage )
+        if balances is None:
+            balances = self.storebalances( client.eth.solo.get_my_balances() )
+        return balances
+
+    # Return the lowest ask of a market from its live orderbook (None if it is not live).
+    def liveask( self, market: str ):
+        feed = self.feeds.get( market )
+        if feed is not None and feed.loaded and not feed.stale:
+            return feed.bestask()
+        return None
+
+    # Return the credit available (like creditavailable) with balances at most maxage seconds old.
+    # Whatever is neither cached nor live (balances and REST orderbooks) is read concurrently.
+    def available( self, leverage, maxage: float = None ):
+        balances = self.cachedbalances( maxage )
+        asks = { market: self.liveask( market ) for market in ( consts.PAIR_DAI_USDC, consts.PAIR_WETH_USDC ) }
+        calls = {}
+        if balances is None:
+            calls["balances"] = client.eth.solo.get_my_balances
+        for market, price in asks.items():
+            if price is None:
+                calls[market] = partial( client.get_orderbook, market = market )
+        if calls:
+            results = dict( zip( calls, fetchconcurrently( *calls.values() ) ) )
+            if "balances" in results:
+                balances = self.storebalances( results.pop( "balances" ) )
+            for market, orderbook in results.items():
+                asks[market] = Decimal( orderbook["asks"][0]["price"] )
+        daiusdask = asks[consts.PAIR_DAI_USDC]
+        ethusdask = asks[consts.PAIR_WETH_USDC]
+        inputs = ( self.fetchedat, daiusdask, ethusdask )
+        answer = self.answers.get( leverage )
+        if answer is None or answer[0] != inputs:
+            answer = self.answers[leverage] = ( inputs, calculatecredit( leverage, balances, daiusdask, ethusdask ) )
+        return answer[1]
+
+
 if (__name__ == '__main__'):
     availablecredit = creditavailable( 5 )
     print ( f'This dYdX account has access to suffient credit to go LONG a maximum of {availablecredit:8.4f} DAI.' )
@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+
+
+import os
+
+
+# Define the dYdX websocket endpoint used by the monitors, the order validator and the hub.
+# Set DYDXWEBSOCKETURL to point them at a local replay server instead (e.g. DYDXWEBSOCKETURL=ws://localhost:8765).
+websocketurl = os.environ.get( 'DYDXWEBSOCKETURL', 'wss://api.dydx.exchange/v1/ws' )
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+
+import time
+import asyncio
+
+from logger import logger
+from credentials import client
+from websockethub import WebsocketHub
+from orderfulfillmentvalidator import finalstates
+
+
+# Notify synchronous scripts of order fills pushed by the orders channel (instead of polling get_order or get_my_fills).
+# The orders channel of the wallet is subscribed once (through the OrderFulfillmentValidator of a WebsocketHub).
+# waitforfill returns as soon as the order reaches a final state, so the next order can go out within milliseconds of the fill.
+# Orders are matched by id, so a fill of another order landing first is never mistaken for (or hides) the fill awaited.
+# In case a push is lost (e.g. while the websocket reconnects), the order is confirmed over REST once every pollinterval seconds.
+class FillNotifier:
+
+    def __init__( self, walletaddress: str, hub: WebsocketHub = None, pollinterval: float = 60 ):
+        self.hub = hub if hub is not None else WebsocketHub()
+        if self.hub.loop is None:
+            self.hub.start()
+        self.validator = self.hub.call( self.hub.orders( walletaddress ) )
+        self.pollinterval = pollinterval
+        self.confirmed = {}
+
+    # Return the latest state of an order pushed by the orders channel (None if nothing was pushed yet).
+    def orderstate( self, orderid: str ) -> dict:
+        return self.validator.orderstates.get( orderid )
+
+    # Block until an order reaches one of the states specified (or is filled or canceled outright) and return the order.
+    # Return None if the timeout (in seconds) expires first, so callers can do other work between waits.
+    def waitforfill( self, orderid: str, timeout: float = None, states: tuple = finalstates ) -> dict:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.confirmed.setdefault( orderid, time.monotonic() )
+        while True:
+            confirmation = self.confirmed[orderid] + self.pollinterval
+            wait = confirmation - time.monotonic() if deadline is None else min( confirmation, deadline ) - time.monotonic()
+            order = self.hub.call( self.wait( orderid, states, max( wait, 0 ) ) )
+            if order is not None:
+                self.confirmed.pop( orderid, None )
+                return order
+
+            # Confirm the state of the order over REST if nothing was pushed for a while.
+            if time.monotonic() >= confirmation:
+                self.confirmed[orderid] = time.monotonic()
+                order = client.get_order( orderId=orderid )["order"]
+                logger.debug( f'Confirmed the status of order {orderid} over REST: {order["status"]}.' )
+                if order["status"] in states or order["status"] in finalstates:
+                    self.hub.loop.call_soon_threadsafe( self.validator.update, order )
+                    self.confirmed.pop( orderid, None )
+                    return order
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    async def wait( self, orderid: str, states: tuple, timeout: float ) -> dict:
+        order = self.validator.orderstates.get( orderid )
+        if order is not None and ( order["status"] in states or order["status"] in finalstates ):
+            return order
+        try:
+            return await asyncio.wait_for( self.validator.waitfororder( orderid, states ), timeout )
+        except asyncio.TimeoutError:
+            return None
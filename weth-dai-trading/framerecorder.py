@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+
+import sys
+import gzip
+import json
+import time
+import asyncio
+import websockets
+
+from logger import logger
+from messenger import smsalert
+from endpoints import websocketurl
+from backoff import Backoff
+from backoff import alertattempts
+from orderbookfeed import channelsubscriptionhandler
+
+
+# Record the raw frames of the channels specified together with the time they were received.
+# Each line of the (gzip compressed) recording is a JSON array: [ receive time (seconds since the epoch), raw frame ].
+# Recording stops after the number of seconds specified (or carries on until interrupted).
+# Subscriptions are restored if the connection drops (or cannot be opened), so the recording covers reconnections too.
+# Reconnection attempts are delayed with jittered exponential backoff, like those of the orderbook feeds.
+async def recordframes(
+        path: str,
+        subscriptionrequests: list,
+        seconds: float = None,
+        url: str = websocketurl
+    ) -> int:
+    framecount = 0
+    deadline = time.monotonic() + seconds if seconds else None
+    backoff = Backoff()
+    with gzip.open( path, 'at' ) as recording:
+        while deadline is None or time.monotonic() < deadline:
+            logger.debug( f'Using websockets library to connect to {url}...' )
+            connectionframes = framecount
+            try:
+                async with websockets.connect( url ) as websocket:
+                    for subscriptionrequest in subscriptionrequests:
+                        logger.debug( f'Sending the following channel subscription request to {url}: {subscriptionrequest}' )
+                        await channelsubscriptionhandler( websocket, subscriptionrequest )
+                    while True:
+                        timeout = deadline - time.monotonic() if deadline else None
+                        if timeout is not None and timeout <= 0:
+                            break
+                        try:
+                            textoutput = await asyncio.wait_for( websocket.recv(), timeout )
+                        except asyncio.TimeoutError:
+                            break
+                        recording.write( json.dumps( [ time.time(), textoutput ] ) + '\n' )
+                        framecount += 1
+            except websockets.exceptions.ConnectionClosed as e:
+                logger.debug( f'connection closed with the following exception "{e}".' )
+            except ( OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake ) as e:
+                logger.debug( f'connection failed with the following exception "{e}".' )
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+            # Start the backoff over if the last connection recorded frames.
+            if framecount > connectionframes:
+                backoff.reset()
+            delay = backoff.delay()
+            if backoff.attempts == alertattempts:
+                smsalert( f'the frame recorder connection dropped: {alertattempts} reconnection attempts failed.' )
+            if deadline is not None:
+                delay = min( delay, deadline - time.monotonic() )
+            logger.debug( f'retrying connection in {delay:.2f} seconds (attempt {backoff.attempts})...' )
+            await asyncio.sleep( delay )
+    logger.debug( f'{framecount} frames recorded to {path}.' )
+    return framecount
+
+
+if __name__ == "__main__":
+    from credentials import walletaddress
+    # Record the WETH-DAI orderbook channel and the orders channel of the wallet.
+    path = sys.argv[1] if len( sys.argv ) > 1 else 'weth-dai-frames.jsonl.gz'
+    seconds = float( sys.argv[2] ) if len( sys.argv ) > 2 else None
+    subscriptionrequests = [
+        { "type": "subscribe", "channel": "orderbook", "id": "WETH-DAI" },
+        { "type": "subscribe", "channel": "orders", "id": walletaddress }
+    ]
+    try:
+        asyncio.run( recordframes( path, subscriptionrequests, seconds ) )
+    except KeyboardInterrupt:
+        logger.debug( f'exception: keyboard interuption.' )
+    logger.debug( f'exiting...' )
+    exit(0)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+
+import sys
+import gzip
+import json
+import time
+import asyncio
+import websockets
+
+from logger import logger
+
+
+# Load a recording made by framerecorder.py as a list of ( receive time, raw frame ).
+def loadframes( path: str ) -> list:
+    with gzip.open( path, 'rt' ) as recording:
+        return [ tuple( json.loads( line ) ) for line in recording if line.strip() ]
+
+
+# Return the ( channel, id ) of a frame (( None, None ) for frames outside any channel).
+def framechannel( textoutput: str ) -> tuple:
+    dictionary = json.loads( textoutput )
+    return ( dictionary.get( "channel" ), dictionary.get( "id" ) )
+
+
+# Serve a recording to websocket clients as if it were the dYdX websocket endpoint.
+# Each client is sent the recorded frames of the channels it subscribes to, starting from its first subscription request.
+# Frames are paced by their recorded receive times divided by speed (original pace at 1, twice as fast at 2, etc.).
+# A speed of 0 sends the frames as fast as the client reads them.
+# Once the recording is exhausted the connection is left open, so the client sees the end of the replay as a quiet market.
+# The time each frame was sent (time.perf_counter) is kept in senttimes to measure the latency of handlers.
+class FrameReplayer:
+
+    def __init__( self, frames: list, speed: float = 1, host: str = 'localhost', port: int = 8765 ):
+        self.frames = frames
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.senttimes = [ None ] * len( frames )
+        # Index the channel of every frame up front so that the replay itself does not parse frames.
+        self.channels = [ framechannel( textoutput ) for receivetime, textoutput in frames ]
+        self.finished = None
+        self.server = None
+
+    @property
+    def url( self ) -> str:
+        return f'ws://{self.host}:{self.port}'
+
+    async def start( self ) -> None:
+        self.finished = asyncio.Event()
+        self.server = await websockets.serve( self.handler, self.host, self.port )
+        logger.debug( f'Replaying {len( self.frames )} frames on {self.url} (speed: {self.speed or "max"})...' )
+
+    async def stop( self ) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    # Serve one client connection.
+    async def handler( self, websocket, path=None ) -> None:
+        subscriptions = set()
+        sender = None
+        try:
+            async for requestjson in websocket:
+                subscriptionrequest = json.loads( requestjson )
+                channel = ( subscriptionrequest.get( "channel" ), subscriptionrequest.get( "id" ) )
+                if subscriptionrequest.get( "type" ) == "unsubscribe":
+                    subscriptions.discard( channel )
+                    continue
+                subscriptions.add( channel )
+                if sender is None:
+                    sender = asyncio.ensure_future( self.send( websocket, subscriptions ) )
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if sender is not None:
+                sender.cancel()
+
+    # Send the frames of the channels subscribed to at the pace specified.
+    async def send( self, websocket, subscriptions: set ) -> None:
+        if not self.frames:
+            self.finished.set()
+            return
+        firstreceivetime = self.frames[0][0]
+        start = time.perf_counter()
+        for index, ( receivetime, textoutput ) in enumerate( self.frames ):
+            if self.speed:
+                delay = start + ( receivetime - firstreceivetime ) / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep( delay )
+            channel = self.channels[index]
+            # Frames that do not belong to a channel (e.g. the connection acknowledgement) go to every client.
+            if channel != ( None, None ) and channel not in subscriptions:
+                continue
+            await websocket.send( textoutput )
+            self.senttimes[index] = time.perf_counter()
+        elapsed = time.perf_counter() - start
+        logger.debug( f'Replay finished: {len( self.frames )} frames in {elapsed:.3f} seconds.' )
+        self.finished.set()
+
+
+async def replayframes( path: str, speed: float = 1, host: str = 'localhost', port: int = 8765 ) -> None:
+    replayer = FrameReplayer( loadframes( path ), speed, host, port )
+    await replayer.start()
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    # Serve a recording at the speed specified (0 for maximum speed).
+    # Point the monitors at it by setting DYDXWEBSOCKETURL (e.g. DYDXWEBSOCKETURL=ws://localhost:8765).
+    path = sys.argv[1] if len( sys.argv ) > 1 else 'weth-dai-frames.jsonl.gz'
+    speed = float( sys.argv[2] ) if len( sys.argv ) > 2 else 1
+    try:
+        asyncio.run( replayframes( path, speed ) )
+    except KeyboardInterrupt:
+        logger.debug( f'exception: keyboard interuption.' )
+    logger.debug( f'exiting...' )
+    exit(0)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import __main__
+import threading
+
+# Encode records with orjson when it is installed (pip3 install orjson).
+try:
+    import orjson
+
+    def encode( record: dict ) -> bytes:
+        return orjson.dumps( record, default=str )
+except ImportError:
+    def encode( record: dict ) -> bytes:
+        return json.dumps( record, default=str, separators=(',', ':') ).encode()
+
+
+# Tag every record with the name of the script running (the strategy).
+strategy = os.path.splitext( os.path.basename( getattr( __main__, '__file__', 'interactive' ) ) )[0]
+
+# Write the journal of every strategy to this directory (set DYDXJOURNALDIR to write it elsewhere).
+journaldirectory = os.environ.get( 'DYDXJOURNALDIR', '/tmp/journal' )
+# Start a new segment once a segment holds this many (uncompressed) bytes or is this many seconds old.
+segmentbytes = 64 * 1024 * 1024
+segmentseconds = 86400
+# Each closed segment is summarised by one line of this file (see readjournal).
+indexname = 'index.jsonl'
+
+
+# Append the events of a strategy (triggers, orders, fills, cancellations and balance snapshots) to gzip compressed JSONL segments.
+# Every record is a JSON object: { "time": seconds since the epoch, "kind": the event, "strategy": the script, ... the fields of the event }.
+# Records are queued and written by a background thread, so journaling an event costs the caller a queue put.
+# The writer flushes the compressed stream after every batch of records, so a segment can be read while it is written.
+# When a segment is closed, its time range, record counts by kind and order ids are appended to the index of the directory.
+class Journal:
+
+    def __init__( self, directory: str = journaldirectory, strategy: str = strategy, segmentbytes: int = segmentbytes, segmentseconds: float = segmentseconds ):
+        self.directory = directory
+        self.strategy = strategy
+        self.segmentbytes = segmentbytes
+        self.segmentseconds = segmentseconds
+        self.records = queue.SimpleQueue()
+        self.writer = None
+        self.segment = None
+        self.segments = 0
+        self.lock = threading.Lock()
+
+    # Queue an event (never blocks).
+    def record( self, kind: str, **fields ) -> None:
+        self.records.put( dict( time=time.time(), kind=kind, strategy=self.strategy, **fields ) )
+        if self.writer is None:
+            with self.lock:
+                if self.writer is None:
+                    self.writer = threading.Thread( target=self.run, name='journal', daemon=True )
+                    self.writer.start()
+
+    # Open a new segment.
+    def opensegment( self ) -> None:
+        os.makedirs( self.directory, exist_ok=True )
+        self.segments += 1
+        name = f'{self.strategy}-{time.strftime( "%Y%m%d-%H%M%S" )}-{os.getpid()}-{self.segments}.jsonl.gz'
+        self.segment = {
+            "file": gzip.open( os.path.join( self.directory, name ), 'ab' ),
+            "summary": { "segment": name, "strategy": self.strategy, "start": None, "end": None, "records": 0, "kinds": {}, "orders": set() },
+            "bytes": 0,
+            "openedat": time.monotonic()
+        }
+
+    # Close the current segment and append its summary to the index.
+    def closesegment( self ) -> None:
+        if self.segment is None:
+            return
+        self.segment["file"].close()
+        summary = dict( self.segment["summary"], orders=sorted( self.segment["summary"]["orders"] ) )
+        with open( os.path.join( self.directory, indexname ), 'ab' ) as index:
+            index.write( encode( summary ) + b'\n' )
+        self.segment = None
+
+    def write( self, records: list ) -> None:
+        lines = []
+        for record in records:
+            if self.segment is None:
+                self.opensegment()
+            summary = self.segment["summary"]
+            line = encode( record ) + b'\n'
+            lines.append( line )
+            summary["start"] = summary["start"] or record["time"]
+            summary["end"] = record["time"]
+            summary["records"] += 1
+            summary["kinds"][record["kind"]] = summary["kinds"].get( record["kind"], 0 ) + 1
+            if record.get( "orderid" ):
+                summary["orders"].add( record["orderid"] )
+            self.segment["bytes"] += len( line )
+            if self.segment["bytes"] >= self.segmentbytes or time.monotonic() - self.segment["openedat"] >= self.segmentseconds:
+                self.segment["file"].write( b''.join( lines ) )
+                lines = []
+                self.closesegment()
+        if lines:
+            self.segment["file"].write( b''.join( lines ) )
+            self.segment["file"].flush()
+
+    def run( self ) -> None:
+        while True:
+            records = [ self.records.get() ]
+            while not self.records.empty():
+                records.append( self.records.get_nowait() )
+            if None in records:
+                self.write( [ record for record in records if record is not None ] )
+                self.closesegment()
+                return
+            self.write( records )
+
+    # Write the records queued, close the segment and stop the writer (e.g. on exit), waiting up to the timeout specified.
+    def close( self, timeout: float = 5 ) -> None:
+        if self.writer is None:
+            return
+        self.records.put( None )
+        self.writer.join( timeout )
+        self.writer = None
+
+
+journal = Journal()
+atexit.register( journal.close )
+
+
+# Journal an event of the strategy running (see Journal).
+def record( kind: str, **fields ) -> None:
+    journal.record( kind, **fields )
+
+
+# The last status and filled amount journaled for each order (so an order seen again, pushed or polled, is only journaled on a change).
+orderstates = {}
+
+
+# Journal an order placed (and its fills or cancellation if it was filled or canceled straight away).
+def orderplaced( order: dict ) -> None:
+    record( "order", orderid=order["id"], market=order.get( "market" ), side=order.get( "side" ), price=order.get( "price" ), amount=order.get( "amount" ), status=order["status"] )
+    orderstates.setdefault( order["id"], ( "OPEN", order.get( "filledAmount" ) if order["status"] == "OPEN" else "0" ) )
+    orderupdated( order )
+
+
+# Journal the fills and cancellation of an order (from the orders channel or a REST response).
+def orderupdated( order: dict ) -> None:
+    state = ( order["status"], order.get( "filledAmount" ) )
+    if orderstates.get( order["id"] ) == state:
+        return
+    orderstates[order["id"]] = state
+    if order["status"] in ( "FILLED", "PARTIALLY_FILLED" ):
+        record( "fill", orderid=order["id"], side=order.get( "side" ), price=order.get( "price" ), amount=order.get( "amount" ), filledamount=order.get( "filledAmount" ), status=order["status"] )
+    elif order["status"] == "CANCELED":
+        record( "cancel", orderid=order["id"], side=order.get( "side" ), price=order.get( "price" ), filledamount=order.get( "filledAmount" ), reason=order.get( "cancelReason" ) )
+
+
+# Return the records of a segment (a segment still being written ends at its last complete record).
+def readsegment( path: str ):
+    with gzip.open( path, 'rb' ) as segment:
+        try:
+            for line in segment:
+                if line.endswith( b'\n' ):
+                    yield json.loads( line )
+        except ( EOFError, gzip.BadGzipFile ):
+            pass
+
+
+# Read the records of a journal directory in order, keeping those that match every filter specified:
+# since / until (seconds since the epoch), kinds (e.g. ( "order", "fill" )), an order id and a strategy.
+# The index lets whole segments be skipped without decompressing them (segments not indexed yet are always read).
+def readjournal( directory: str = journaldirectory, since: float = None, until: float = None, kinds: tuple = None, orderid: str = None, strategy: str = None ):
+    index = {}
+    indexpath = os.path.join( directory, indexname )
+    if os.path.exists( indexpath ):
+        with open( indexpath, 'rb' ) as indexfile:
+            for line in indexfile:
+                summary = json.loads( line )
+                index[summary["segment"]] = summary
+
+    def segmentstart( path ):
+        summary = index.get( os.path.basename( path ) )
+        return summary["start"] if summary and summary["start"] else os.path.getmtime( path )
+
+    for path in sorted( glob.glob( os.path.join( directory, '*.jsonl.gz' ) ), key=segmentstart ):
+        summary = index.get( os.path.basename( path ) )
+        if summary is not None:
+            if not summary["records"]:
+                continue
+            if since is not None and summary["end"] < since or until is not None and summary["start"] > until:
+                continue
+            if kinds is not None and not set( kinds ) & set( summary["kinds"] ):
+                continue
+            if orderid is not None and orderid not in summary["orders"]:
+                continue
+            if strategy is not None and summary["strategy"] != strategy:
+                continue
+        for entry in readsegment( path ):
+            if since is not None and entry["time"] < since or until is not None and entry["time"] > until:
+                continue
+            if kinds is not None and entry["kind"] not in kinds:
+                continue
+            if orderid is not None and entry.get( "orderid" ) != orderid:
+                continue
+            if strategy is not None and entry["strategy"] != strategy:
+                continue
+            yield entry
+
+
+if __name__ == "__main__":
+    # Print the records of a journal as JSON lines, optionally for the kinds specified (comma separated) and an order id.
+    # For example: py journal.py /tmp/journal order,fill 0x9df797fe0bd0326cc9deb659eb2a7f5a9e560005ae6d5c44ebf0425bf6125b1b
+    directory = sys.argv[1] if len( sys.argv ) > 1 else journaldirectory
+    kinds = tuple( sys.argv[2].split( ',' ) ) if len( sys.argv ) > 2 else None
+    orderid = sys.argv[3] if len( sys.argv ) > 3 else None
+    try:
+        for entry in readjournal( directory, kinds=kinds, orderid=orderid ):
+            print ( json.dumps( entry ) )
+    except BrokenPipeError:
+        pass
@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 
+import sys
 import json
 
 from dydx.client import Client
 import dydx.constants as consts
 import dydx.util as utils
 
-from credentials import client
+from batchorders import cancelall
+from batchorders import cancelorders
 
 
-# Cancel the previously created order
-order_hash = '0x1707e427a9d32406f4919a7bd796c207438069e27ab7159c7bf639a0a74b5b53'
-canceled_order = client.cancel_order( hash=order_hash )
+# Cancel the orders whose hashes are specified (py kill-order.py 0x1707... 0x9df7...),
+# every open WETH-DAI order (py kill-order.py ALL) or every open WETH-DAI order on one side (py kill-order.py BUY).
+# Without arguments, cancel the previously created order.
+arguments = sys.argv[1:] or [ '0x1707e427a9d32406f4919a7bd796c207438069e27ab7159c7bf639a0a74b5b53' ]
+if arguments[0] in ( "ALL", consts.SIDE_BUY, consts.SIDE_SELL ):
+    canceled_orders = cancelall( consts.PAIR_WETH_DAI, None if arguments[0] == "ALL" else arguments[0] )
+else:
+    canceled_orders = cancelorders( arguments )
 
-print ( canceled_order )
+print ( json.dumps( canceled_orders.responses, sort_keys=True, indent=4, separators=(',', ': ') ) )
+for order_hash, error in canceled_orders.errors.items():
+    print ( f'Unable to cancel {order_hash}: {error}' )
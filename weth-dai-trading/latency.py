@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+
+import os
+import time
+import atexit
+import __main__
+import threading
+from functools import partial
+from contextlib import contextmanager
+
+import journal
+
+
+# Tag every latency recorded with the name of the script running (the strategy), as the logger names its files.
+strategy = os.path.splitext( os.path.basename( getattr( __main__, '__file__', 'interactive' ) ) )[0]
+
+# Dump the histograms to this file every dumpinterval seconds (in the Prometheus text format, e.g. for a node exporter textfile collector).
+# Set DYDXLATENCYFILE to write them elsewhere (e.g. DYDXLATENCYFILE=/var/lib/node_exporter/skim-dai.prom).
+latencyfile = os.environ.get( 'DYDXLATENCYFILE', '/tmp/' + strategy + '.prom' )
+dumpinterval = 60
+
+# Quantiles written to the file for every histogram (the quantile 1 is the maximum).
+quantiles = ( 0.5, 0.9, 0.99, 0.999, 1 )
+
+# Client methods timed by a TimedClient and the metric they are recorded under.
+endpoints = {
+    "place_order": "place",
+    "cancel_order": "cancel",
+    "get_order": "get_order"
+}
+
+
+# Count latencies (in microseconds) in buckets of a logarithmic scale, each split into 64 linear sub-buckets (as an HDR histogram does).
+# Every value is recorded to within 1/64 (1.6%) of its magnitude from a microsecond to hours in a few hundred counters,
+# so percentiles stay exact enough without keeping every sample and recording costs a few integer operations.
+class LatencyHistogram:
+
+    def __init__( self ):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    # Return the bucket of a value: values below 128 have a bucket of their own, above that a bucket spans 1/64 of a power of two.
+    @staticmethod
+    def bucket( microseconds: int ) -> int:
+        exponent = max( 0, microseconds.bit_length() - 7 )
+        return ( exponent << 6 ) + ( microseconds >> exponent )
+
+    # Return the highest value counted in a bucket.
+    @staticmethod
+    def highest( bucket: int ) -> int:
+        exponent = max( 0, ( bucket >> 6 ) - 1 )
+        return ( ( bucket - ( exponent << 6 ) ) << exponent ) + ( 1 << exponent ) - 1
+
+    # Record a latency in seconds.
+    def record( self, seconds: float ) -> None:
+        microseconds = max( 0, int( seconds * 1000000 ) )
+        bucket = self.bucket( microseconds )
+        self.counts[bucket] = self.counts.get( bucket, 0 ) + 1
+        self.count += 1
+        self.total += microseconds
+        self.maximum = max( self.maximum, microseconds )
+
+    # Return the latency (in seconds) below which the fraction of latencies specified were recorded.
+    def percentile( self, fraction: float ) -> float:
+        if not self.count:
+            return float( 'nan' )
+        rank = max( 1, fraction * self.count )
+        seen = 0
+        for bucket in sorted( self.counts ):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min( self.highest( bucket ), self.maximum ) / 1000000
+        return self.maximum / 1000000
+
+    # Add the counts of another histogram (e.g. to combine sides or strategies).
+    def merge( self, histogram ) -> None:
+        for bucket, count in histogram.counts.items():
+            self.counts[bucket] = self.counts.get( bucket, 0 ) + count
+        self.count += histogram.count
+        self.total += histogram.total
+        self.maximum = max( self.maximum, histogram.maximum )
+
+
+# Histograms by ( metric, side, strategy ), recorded from any thread (the hub records fills from its own thread).
+histograms = {}
+lock = threading.Lock()
+dumper = None
+
+# Submission times (time.perf_counter()) and sides of the orders placed, by order id, until they are filled or canceled.
+submissions = {}
+sides = {}
+
+# Time of the latest trigger not followed by an order yet (None if there is none).
+triggeredat = None
+
+
+# Record a latency in seconds.
+def record( metric: str, seconds: float, side: str = None ) -> None:
+    key = ( metric, side or "", strategy )
+    with lock:
+        histogram = histograms.get( key )
+        if histogram is None:
+            histogram = histograms[key] = LatencyHistogram()
+            startdumping()
+        histogram.record( seconds )
+
+
+# Record how long the block takes.
+@contextmanager
+def timer( metric: str, side: str = None ):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record( metric, time.perf_counter() - start, side )
+
+
+# Note that a trigger fired (the next order placed records its trigger-to-submit time).
+def triggered() -> None:
+    global triggeredat
+    triggeredat = time.perf_counter()
+
+
+# Note an order submitted at the time specified (time.perf_counter()) and record the trigger-to-submit time of the latest trigger.
+def submitted( orderid: str, side: str, submittedat: float ) -> None:
+    global triggeredat
+    submissions[orderid] = submittedat
+    sides[orderid] = side
+    if triggeredat is not None:
+        record( "trigger_to_submit", submittedat - triggeredat, side )
+        triggeredat = None
+
+
+# Record the submit-to-fill time of an order once it is filled (only the first fill seen is recorded).
+def filled( order: dict ) -> None:
+    if order.get( "status" ) not in ( "FILLED", "CANCELED" ):
+        return
+    submittedat = submissions.pop( order["id"], None )
+    side = sides.pop( order["id"], None )
+    if submittedat is not None and order["status"] == "FILLED":
+        record( "submit_to_fill", time.perf_counter() - submittedat, side )
+
+
+# Time the round trips of the dYdX client methods in endpoints (every other attribute is the client's own).
+# Orders placed are noted as submissions, and orders returned filled by get_order record their submit-to-fill time.
+# The orders placed, filled and canceled are also journaled (see journal).
+class TimedClient:
+
+    def __init__( self, restclient ):
+        self.client = restclient
+
+    def __getattr__( self, name: str ):
+        attribute = getattr( self.client, name )
+        if name not in endpoints:
+            return attribute
+        return partial( self.call, name, attribute )
+
+    def call( self, name: str, method, *args, **kwargs ):
+        # Tag with the side of the order (placed, or looked up by the id of an order placed earlier).
+        if name == "place_order":
+            side = kwargs.get( "side" ) or ( args[1] if len( args ) > 1 else None )
+        else:
+            side = sides.get( kwargs.get( "hash" ) or kwargs.get( "orderId" ) or ( args[0] if args else None ) )
+        return self.timed( name, side, partial( method, *args, **kwargs ) )
+
+    # Post the request body of an order signed ahead of time (see orderer.prepareorder), timed and noted as place_order is.
+    def post_order( self, body: str, side: str ):
+        return self.timed( "place_order", side, partial( self.client._post, '/v2/orders', data=body ) )
+
+    # Send a request (a call without arguments) and record it under the metric of the endpoint specified.
+    def timed( self, name: str, side: str, request ):
+        start = time.perf_counter()
+        with timer( endpoints[name], side ):
+            response = request()
+        order = response.get( "order" ) if isinstance( response, dict ) else None
+        if order and name == "place_order":
+            submitted( order["id"], side, start )
+            journal.orderplaced( order )
+        elif order and name == "get_order":
+            filled( order )
+            journal.orderupdated( order )
+        elif order:
+            journal.orderupdated( order )
+        return response
+
+
+# Write the histograms to a file in the Prometheus text format (replaced in one step, so a scrape never reads half a file).
+def dump( path: str = None ) -> None:
+    path = path or latencyfile
+    with lock:
+        snapshot = [ ( key, histogram.percentile, histogram.count, histogram.total ) for key, histogram in sorted( histograms.items() ) ]
+        lines = [
+            '# HELP dydx_latency_seconds Latency of order placement, cancellation, order lookups, trigger-to-submit and submit-to-fill.',
+            '# TYPE dydx_latency_seconds summary'
+        ]
+        for ( metric, side, name ), percentile, count, total in snapshot:
+            labels = f'metric="{metric}",side="{side}",strategy="{name}"'
+            lines += [ f'dydx_latency_seconds{{{labels},quantile="{quantile}"}} {percentile( quantile ):.6f}' for quantile in quantiles ]
+            lines.append( f'dydx_latency_seconds_sum{{{labels}}} {total / 1000000:.6f}' )
+            lines.append( f'dydx_latency_seconds_count{{{labels}}} {count}' )
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open( temporary, 'w' ) as latencies:
+        latencies.write( '\n'.join( lines ) + '\n' )
+    os.replace( temporary, path )
+
+
+# Dump the histograms periodically (from a daemon thread started with the first latency recorded) and once more on exit.
+def startdumping( path: str = None, interval: float = None ) -> None:
+    global dumper
+    if dumper is not None:
+        return
+
+    def dumpperiodically():
+        while True:
+            time.sleep( interval or dumpinterval )
+            try:
+                dump( path )
+            except OSError:
+                pass
+
+    dumper = threading.Thread( target=dumpperiodically, name='latencydumper', daemon=True )
+    dumper.start()
+    atexit.register( dump, path )
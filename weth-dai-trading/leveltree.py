@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+
+import random
+
+
+# A price level of a LevelTree: its key, total amount and notional value, and the totals of the subtree it roots.
+class Level:
+
+    __slots__ = ( 'key', 'priority', 'left', 'right', 'amount', 'notional', 'totalamount', 'totalnotional' )
+
+    def __init__( self, key, amount: int, notional ):
+        self.key = key
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.amount = self.totalamount = amount
+        self.notional = self.totalnotional = notional
+
+    # Recompute the totals of the subtree from the level and the totals of its children.
+    def refresh( self ) -> None:
+        self.totalamount = self.amount
+        self.totalnotional = self.notional
+        if self.left is not None:
+            self.totalamount += self.left.totalamount
+            self.totalnotional += self.left.totalnotional
+        if self.right is not None:
+            self.totalamount += self.right.totalamount
+            self.totalnotional += self.right.totalnotional
+
+
+def rotateright( level: Level ) -> Level:
+    child = level.left
+    level.left = child.right
+    child.right = level
+    child.totalamount = level.totalamount
+    child.totalnotional = level.totalnotional
+    level.refresh()
+    return child
+
+
+def rotateleft( level: Level ) -> Level:
+    child = level.right
+    level.right = child.left
+    child.left = level
+    child.totalamount = level.totalamount
+    child.totalnotional = level.totalnotional
+    level.refresh()
+    return child
+
+
+# Insert a new level into a subtree and return the root of the subtree.
+def insertlevel( level: Level, new: Level ) -> Level:
+    if level is None:
+        return new
+    level.totalamount += new.amount
+    level.totalnotional += new.notional
+    if new.key < level.key:
+        level.left = insertlevel( level.left, new )
+        if level.left.priority > level.priority:
+            return rotateright( level )
+    else:
+        level.right = insertlevel( level.right, new )
+        if level.right.priority > level.priority:
+            return rotateleft( level )
+    return level
+
+
+# Join two subtrees (every key of the left one below every key of the right one) and return the root.
+def mergelevels( left: Level, right: Level ) -> Level:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = mergelevels( left.right, right )
+        left.refresh()
+        return left
+    right.left = mergelevels( left, right.left )
+    right.refresh()
+    return right
+
+
+# Drop a level (which must be in the subtree) and return the root of the subtree.
+def removelevel( level: Level, key ) -> Level:
+    if key < level.key:
+        level.left = removelevel( level.left, key )
+    elif level.key < key:
+        level.right = removelevel( level.right, key )
+    else:
+        return mergelevels( level.left, level.right )
+    level.refresh()
+    return level
+
+
+# Keep the price levels of one side of an orderbook in a treap (a binary search tree balanced by random priorities) ordered
+# from the best price, so the keys of bid levels are negated. Every level holds the totals (amount and notional value) of its
+# subtree, so adding or dropping a level, changing its amount and searching the cumulative amounts from the best price
+# (see search and amountupto) all take O(log n) steps.
+class LevelTree:
+
+    def __init__( self ):
+        self.root = None
+        self.count = 0
+
+    def __len__( self ):
+        return self.count
+
+    def clear( self ) -> None:
+        self.root = None
+        self.count = 0
+
+    # Return the total amount resting on the side.
+    def amount( self ) -> int:
+        return self.root.totalamount if self.root is not None else 0
+
+    # Return the key of the best level (None if the tree is empty).
+    def first( self ):
+        level = self.root
+        if level is None:
+            return None
+        while level.left is not None:
+            level = level.left
+        return level.key
+
+    # Add a level that is not in the tree yet.
+    def insert( self, key, amount: int, notional ) -> None:
+        self.root = insertlevel( self.root, Level( key, amount, notional ) )
+        self.count += 1
+
+    # Add an amount and its notional value (both may be negative) to a level already in the tree.
+    def change( self, key, amount: int, notional ) -> None:
+        level = self.root
+        while True:
+            level.totalamount += amount
+            level.totalnotional += notional
+            if key < level.key:
+                level = level.left
+            elif level.key < key:
+                level = level.right
+            else:
+                level.amount += amount
+                level.notional += notional
+                return
+
+    # Drop a level that is in the tree.
+    def remove( self, key ) -> None:
+        self.root = removelevel( self.root, key )
+        self.count -= 1
+
+    # Return the first level (from the best price) at which the cumulative amount reaches the amount specified, with the
+    # cumulative amount and notional value of the levels before it, as ( key, amount, notional ).
+    # Return None if the side is not deep enough.
+    def search( self, amount: int ) -> tuple:
+        level = self.root
+        amountbefore = 0
+        notionalbefore = 0
+        while level is not None:
+            left = level.left
+            if left is not None:
+                if amount <= amountbefore + left.totalamount:
+                    level = left
+                    continue
+                amountbefore += left.totalamount
+                notionalbefore += left.totalnotional
+            if amount <= amountbefore + level.amount:
+                return ( level.key, amountbefore, notionalbefore )
+            amountbefore += level.amount
+            notionalbefore += level.notional
+            level = level.right
+        return None
+
+    # Return the cumulative amount of the levels up to the key specified (included).
+    def amountupto( self, key ) -> int:
+        level = self.root
+        total = 0
+        while level is not None:
+            if key < level.key:
+                level = level.left
+            else:
+                total += level.amount
+                if level.left is not None:
+                    total += level.left.totalamount
+                level = level.right
+        return total
@@ -1,35 +1,38 @@
 #!/usr/bin/env python3
 
 
-import dns
-import json
-import pymongo
+import sys
 
-import dydx.constants as consts
-import dydx.util as utils
-
-from credentials import client
 from dbconnection import dbclient
 from dbconnection import tradingaccount
+from tradehistory import tradecollection
+from tradehistory import synctrades
+from tradehistory import followtrades
 
+# Also append the trades and fills to the local column store when NumPy is installed (pip3 install numpy).
+try:
+    from columnstore import ColumnStore
+    store = ColumnStore()
+except ImportError:
+    store = None
 
-# Get trades created by my account
-wethdaitrades = client.get_my_trades(
-    market=['WETH-DAI'],
-    limit=None,  # optional
-    startingBefore=None  # optional
-)
 
 # Create a database
 # Use the "trading account" identifier provided
 db = dbclient[tradingaccount]
 # [ALTERNATIVE SYNTAX] : db = dbclient.<tradingaccount>
 
-# Create a collection
-transactioncollection = db["wethdaitransactionhistory"]
+# Create the collections
+# Trades and fills are unique by id (uuid) in their collections
+transactioncollection = tradecollection( db["wethdaitransactionhistory"] )
+fillcollection = tradecollection( db["wethdaifillhistory"] )
 # [ALTERNATIVE SYNTAX] : transactioncollection = db.wethdaitransactionhistory
 
-# Insert documents into the collection
-# This is done one-at-a-time below
-for trade in wethdaitrades["trades"]:
-    transactionhistory = transactioncollection.insert_one(trade)
+# Upsert the trades and fills created by my account since the last run into the collections
+# Trades and fills are fetched page by page (newest first) and written in bulk
+# Pass "follow" to keep syncing whenever the orders channel pushes a fill: py load-weth-dai-transaction-history-to-mongodb.py follow
+if len( sys.argv ) > 1 and sys.argv[1] == 'follow':
+    followtrades( transactioncollection, 'WETH-DAI', store=store, fillcollection=fillcollection )
+else:
+    synctrades( transactioncollection, 'WETH-DAI', kind='trades', store=store )
+    synctrades( fillcollection, 'WETH-DAI', kind='fills', store=store )
@@ -2,22 +2,35 @@
 
 
 import os
+import json
+import queue
+import atexit
 import __main__
 import logging
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from logging.handlers import RotatingFileHandler
 
 
 # Create custom logger
+# Set DYDXLOGLEVEL to skip the messages below a level altogether (e.g. DYDXLOGLEVEL=INFO to drop the DEBUG messages of the monitors).
 logger = logging.getLogger('tradelogger')
-logger.setLevel(logging.DEBUG)
+logger.setLevel(os.environ.get('DYDXLOGLEVEL', 'DEBUG'))
+# Skip looking up the caller's file, line and function of every record (the formats below never show them).
+# Only the records of this logger skip it: other loggers (and the libraries using them) are left as they are.
+logger.findCaller = lambda stack_info=False, stacklevel=1: ('(unknown file)', 0, '(unknown function)', None)
 ospath = os.path.basename(__main__.__file__)
 script = os.path.splitext(ospath)
 outlog = '/tmp/' + script[0] + '.out'
 errlog = '/tmp/' + script[0] + '.err'
+# Rotate the log files once they reach logbytes, keeping logbackups old files (e.g. /tmp/skim-dai.out.1); events are journaled (see journal).
+logbytes = 16 * 1024 * 1024
+logbackups = 4
 
 # Create console and file handlers
 consolehandler = logging.StreamHandler()
-fileouthandler = logging.FileHandler(outlog)
-fileerrhandler = logging.FileHandler(errlog)
+fileouthandler = RotatingFileHandler(outlog, maxBytes=logbytes, backupCount=logbackups)
+fileerrhandler = RotatingFileHandler(errlog, maxBytes=logbytes, backupCount=logbackups)
 consolehandler.setLevel(logging.INFO)
 fileouthandler.setLevel(logging.DEBUG)
 fileerrhandler.setLevel(logging.WARNING)
@@ -30,7 +43,42 @@ consolehandler.setFormatter(consoleformat)
 fileouthandler.setFormatter(fileoutformat)
 fileerrhandler.setFormatter(fileerrformat)
 
-# Add handlers to the logger
-logger.addHandler(consolehandler)
-logger.addHandler(fileouthandler)
-logger.addHandler(fileerrhandler)
+
+# Hand log records to the listener thread with their message and traceback already formatted (as the standard QueueHandler does),
+# so arguments modified after the logging call and exceptions handled by then are logged as they were.
+# Unlike the standard QueueHandler, the lines themselves (time, level, logger name) are still formatted by the listener's handlers.
+class DeferredQueueHandler(QueueHandler):
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = consoleformat.formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+# Build a log message only when its level is enabled (e.g. logger.debug('Order submission:\n%s', LazyMessage(prettyjson, submission))).
+class LazyMessage:
+
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __str__(self):
+        return str(self.function(*self.args))
+
+
+# Format a dictionary as indented JSON for the logs
+def prettyjson(dictionary):
+    return json.dumps(dictionary, sort_keys=True, indent=4, separators=(',', ': '), default=str)
+
+
+# Add the handlers to a listener thread: logging calls only queue the record, the listener formats it and writes the files.
+logqueue = queue.SimpleQueue()
+queuehandler = DeferredQueueHandler(logqueue)
+loglistener = QueueListener(logqueue, consolehandler, fileouthandler, fileerrhandler, respect_handler_level=True)
+loglistener.start()
+atexit.register(loglistener.stop)
+logger.addHandler(queuehandler)
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
 import json
-import time
 from decimal import Decimal
 
 from dydx.client import Client
@@ -9,12 +8,17 @@ import dydx.constants as consts
 import dydx.util as utils
 
 from credentials import client
+from credentials import walletaddress
+from fillnotifier import FillNotifier
 
 
 # Define the order size and the return on assets required
 ordersize = Decimal("0.1")
 requiredreturn = Decimal("1.01")
 
+# Subscribe to the orders channel once so that fills are pushed as soon as they happen
+notifier = FillNotifier( walletaddress )
+
 
 # Start perpetual loop
 while True:
@@ -64,18 +68,12 @@ while True:
     jsondata = json.dumps( placed_bid, sort_keys=True, indent=4, separators=(',', ': ') )
     print ( jsondata )
 
-    # Loop until the bid order is filled
-    while True:
-        # Give the bid placed five seconds to fill
-        time.sleep(5)
-
-        # Get fills created by my account for both sides of the orderbook
-        my_fills = client.get_my_fills(
-            market=['WETH-DAI'],
-            limit=1
-        )
-        if my_fills["fills"][0]["orderId"] == placed_bid["order"]["id"]:
-            break
+    # Wait until the bid order is filled
+    # Start over if dYdX canceled the bid
+    filled_bid = notifier.waitforfill( placed_bid["order"]["id"] )
+    if filled_bid["status"] != "FILLED":
+        print ( f'The bid {placed_bid["order"]["id"]} was {filled_bid["status"]}.' )
+        continue
 
 
     # STEP 2
@@ -96,15 +94,8 @@ while True:
     jsondata = json.dumps( placed_ask, sort_keys=True, indent=4, separators=(',', ': ') )
     print ( jsondata )
 
-    # Loop until the ask order is filled
-    while True:
-        # Every five seconds poll to determine if the ask placed was fill
-        time.sleep(5)
-
-        # Get fills created by my account for both sides of the orderbook
-        my_fills = client.get_my_fills(
-            market=['WETH-DAI'],
-            limit=1
-        )
-        if my_fills["fills"][0]["orderId"] == placed_ask["order"]["id"]:
-            break
+    # Wait until the ask order is filled
+    filled_ask = notifier.waitforfill( placed_ask["order"]["id"] )
+    if filled_ask["status"] != "FILLED":
+        print ( f'The ask {placed_ask["order"]["id"]} was {filled_ask["status"]}.' )
+        break
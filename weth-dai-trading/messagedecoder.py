@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+
+import re
+import json
+
+# Use orjson to parse websocket messages if it is installed (pip3 install orjson).
+# Otherwise, fall back on the standard library.
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+messageidpattern = re.compile( r'"message_id"\s*:\s*(\d+)' )
+sidemarkers = { "BUY": '"BUY"', "SELL": '"SELL"' }
+othersides = { "BUY": "SELL", "SELL": "BUY" }
+
+
+# Decode an orderbook channel message keeping only the sides of the orderbook specified.
+# Update messages without an entry for those sides are not parsed at all (only the message id is extracted).
+# Snapshots drop the array of the side nobody subscribed to and updates drop the entries of that side.
+def decodeorderbookmessage( textoutput, sides: tuple = ( "BUY", "SELL" ) ) -> dict:
+    if len( sides ) != 1:
+        return loads( textoutput )
+
+    side = sides[0]
+    if '"updates"' in textoutput:
+        if sidemarkers[side] not in textoutput:
+            messageid = messageidpattern.search( textoutput )
+            return {
+                "message_id": int( messageid.group( 1 ) ) if messageid else None,
+                "contents": { "updates": [] }
+            }
+        dictionary = loads( textoutput )
+        # Only filter the updates if the message also carries entries for the other side.
+        if sidemarkers[othersides[side]] in textoutput:
+            contents = dictionary["contents"]
+            contents["updates"] = [ updatedata for updatedata in contents["updates"] if updatedata["side"] == side ]
+        return dictionary
+
+    dictionary = loads( textoutput )
+    if "contents" in dictionary:
+        dictionary["contents"].pop( "asks" if side == "BUY" else "bids", None )
+    return dictionary
+
+
+# Decode an orders channel message.
+def decodeordersmessage( textoutput ) -> dict:
+    return loads( textoutput )
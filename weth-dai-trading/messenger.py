@@ -1,18 +1,169 @@
 #!/usr/bin/env python3
 
 
+import os
 import json
-import boto3
+import time
+import queue
+import atexit
+import threading
+from collections import Counter
 
 from logger import logger
 
-# Create AWS SNS client
-snsclient = boto3.client('sns')
+
+# Phone number receiving the alerts.
+phonenumber = '+15108045618'
+
+# Alerts waiting to be sent (beyond this, new alerts are dropped and counted rather than blocking the caller).
+queuesize = 1000
+# Seconds spent collecting further alerts into the same SMS once an alert arrives.
+batchwindow = 2
+# Minimum seconds between two SMS.
+sendinterval = 30
+# Seconds during which an alert identical to one already sent is only counted (the count is sent with the first message after the period).
+dedupeperiod = 600
+
+# Set DYDXALERTFILE to write the alerts to a file (and the logs) instead of sending them via SMS (e.g. DYDXALERTFILE=/tmp/alerts.log).
+alertfile = os.environ.get( 'DYDXALERTFILE' )
+
+
+# Send alerts via SMS with AWS SNS.
+class SNSSink:
+
+    def __init__( self, phonenumber: str = phonenumber ):
+        import boto3
+        self.phonenumber = phonenumber
+        self.snsclient = boto3.client('sns')
+
+    def send( self, message: str ) -> None:
+        snsresponse = self.snsclient.publish( PhoneNumber=self.phonenumber, Message=message )
+        responseout = json.dumps( snsresponse, sort_keys=True, indent=4, separators=(',', ': ') )
+        logger.debug ( f'Response to SNS Request:\n{responseout}' )
+
+
+# Stand in for SNS: log the alerts, keep them (in messages) and append them to a file if one is specified.
+class LogSink:
+
+    def __init__( self, path: str = None ):
+        self.path = path
+        self.messages = []
+
+    def send( self, message: str ) -> None:
+        self.messages.append( message )
+        logger.info( f'Alert: {message}' )
+        if self.path:
+            with open( self.path, 'a' ) as alerts:
+                alerts.write( f'{time.strftime( "%Y-%m-%d %H:%M:%S" )} {message}\n' )
+
+
+# Queue alerts and send them from a background thread, so raising an alert never waits on the sink.
+# The worker collects the alerts raised within batchwindow seconds into one message, sends at most one message every sendinterval seconds
+# (alerts raised meanwhile join the next message), and counts repeats of an alert sent less than dedupeperiod seconds ago instead of resending it.
+# Identical alerts in a message are sent once with their count. If the queue is full, alerts are dropped and the number dropped is reported.
+class AlertQueue:
+
+    def __init__( self, sink=None, queuesize: int = queuesize, batchwindow: float = batchwindow, sendinterval: float = sendinterval, dedupeperiod: float = dedupeperiod ):
+        self.sink = sink
+        self.alerts = queue.Queue( maxsize=queuesize )
+        self.batchwindow = batchwindow
+        self.sendinterval = sendinterval
+        self.dedupeperiod = dedupeperiod
+        self.dropped = 0
+        self.sentat = {}
+        self.repeats = Counter()
+        self.nextsend = 0
+        self.flushing = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.worker = None
+        self.lock = threading.Lock()
+
+    # Queue an alert (never blocks).
+    def put( self, message: str ) -> None:
+        self.idle.clear()
+        try:
+            self.alerts.put_nowait( message )
+        except queue.Full:
+            self.dropped += 1
+        if self.worker is None:
+            with self.lock:
+                if self.worker is None:
+                    self.worker = threading.Thread( target=self.run, name='alertqueue', daemon=True )
+                    self.worker.start()
+
+    # Take every alert queued (waiting up to the timeout specified for the first one).
+    def drain( self, timeout: float = None ) -> list:
+        messages = []
+        try:
+            messages.append( self.alerts.get( timeout=timeout ) )
+            while True:
+                messages.append( self.alerts.get_nowait() )
+        except queue.Empty:
+            pass
+        return [ message for message in messages if message is not None ]
+
+    # Turn the alerts collected into the text of a message (None if every alert was a recent repeat).
+    def compose( self, messages: list ):
+        now = time.monotonic()
+        lines = []
+        if self.dropped:
+            lines.append( f'[{self.dropped} alerts dropped]' )
+            self.dropped = 0
+        for message, count in Counter( messages ).items():
+            if now - self.sentat.get( message, float( '-inf' ) ) < self.dedupeperiod:
+                self.repeats[message] += count
+                continue
+            count += self.repeats.pop( message, 0 )
+            lines.append( message if count == 1 else f'{message} [x{count}]' )
+            self.sentat[message] = now
+        # Report the repeats of alerts whose dedupe period expired (or every repeat when flushing).
+        for message in [ message for message in self.repeats if now - self.sentat[message] >= self.dedupeperiod or self.flushing.is_set() ]:
+            lines.append( f'{message} [repeated {self.repeats.pop( message )} times]' )
+            self.sentat[message] = now
+        return '\n'.join( lines ) if lines else None
+
+    def run( self ) -> None:
+        while True:
+            messages = self.drain()
+            # Collect the alerts that follow within the batch window and until the next message may be sent.
+            deadline = max( time.monotonic() + self.batchwindow, self.nextsend )
+            while not self.flushing.is_set() and time.monotonic() < deadline:
+                self.flushing.wait( deadline - time.monotonic() )
+            messages += self.drain( 0 )
+            text = self.compose( messages )
+            if text is None:
+                if self.alerts.empty():
+                    self.idle.set()
+                continue
+            try:
+                self.sink.send( text )
+            except Exception as e:
+                logger.critical( f'Unable to send alert [{text}]: {e}', exc_info=True )
+            self.nextsend = time.monotonic() + self.sendinterval
+            if self.alerts.empty():
+                self.idle.set()
+
+    # Send the alerts queued straight away (e.g. on exit), waiting up to the timeout specified.
+    def flush( self, timeout: float = 5 ) -> None:
+        if self.worker is None:
+            return
+        self.flushing.set()
+        try:
+            self.alerts.put_nowait( None )
+        except queue.Full:
+            pass
+        deadline = time.monotonic() + timeout
+        while not ( self.alerts.empty() and self.idle.is_set() ) and time.monotonic() < deadline:
+            self.idle.wait( 0.01 )
+
+
+alerts = AlertQueue( LogSink( alertfile ) if alertfile else SNSSink() )
+atexit.register( alerts.flush )
+
 
 # Define alert function
+# The alert is queued and sent via SMS by a background thread (the call never blocks)
 def smsalert( message ):
-    # Send message via SMS.
-    snsresponse = snsclient.publish( PhoneNumber='+15108045618', Message=message )
-    responseout = json.dumps( snsresponse, sort_keys=True, indent=4, separators=(',', ': ') )
-    logger.debug ( f'Response to SNS Request:\n{responseout}' )
-    # Log SMS execution details
+    logger.debug( f'Queueing alert: {message}' )
+    alerts.put( message )
@@ -0,0 +1,736 @@
+#!/usr/bin/env python3
+
+
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+import websockets
+from decimal import Decimal
+from datetime import datetime
+from datetime import timezone
+from urllib.parse import urlparse
+from urllib.parse import parse_qs
+from urllib.parse import urlencode
+from http.client import HTTPConnection
+from http.client import RemoteDisconnected
+from http.server import ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
+
+from logger import logger
+from orderbook import OrderBook
+
+
+# Define the solo markets of the mock exchange (market ids and decimals match dydx.constants).
+# Prices are in atomic units (quote currency wei per base currency wei), so prices in USDC carry the difference in decimals.
+currencies = {
+    "WETH": { "soloMarketId": 0, "decimals": 18 },
+    "SAI": { "soloMarketId": 1, "decimals": 18 },
+    "USDC": { "soloMarketId": 2, "decimals": 6 },
+    "DAI": { "soloMarketId": 3, "decimals": 18 }
+}
+mockmarkets = {
+    "WETH-DAI": { "minimumTickSize": "0.01", "minimumOrderSize": "100000000000000000", "price": "200" },
+    "WETH-USDC": { "minimumTickSize": "0.00000000000001", "minimumOrderSize": "100000000000000000", "price": "0.0000000002" },
+    "DAI-USDC": { "minimumTickSize": "0.0000000000000001", "minimumOrderSize": "20000000000000000000", "price": "0.000000000001" }
+}
+houseaddress = '0x' + '0' * 40
+
+
+def timestamp() -> str:
+    return datetime.now( timezone.utc ).strftime( '%Y-%m-%dT%H:%M:%S.%f' )[:-3] + 'Z'
+
+
+class MockExchangeError( Exception ):
+
+    def __init__( self, status: int, message: str ):
+        super().__init__( f'MockExchangeError(status={status}): {message}' )
+        self.status = status
+        self.message = message
+
+
+# Match orders in price-time priority for every mock market and keep track of orders, fills and account balances.
+# Resting orders are kept in an OrderBook per market (orders at the same price fill in the order they arrived).
+# Every change is published to the subscribers of the orderbook and orders channels (see subscribe).
+# All public methods are thread-safe (the REST server, the websocket server and the market simulator share one engine).
+class MatchingEngine:
+
+    def __init__( self, balances: dict = None ):
+        self.lock = threading.RLock()
+        self.books = { market: OrderBook( parameters["minimumTickSize"] ) for market, parameters in mockmarkets.items() }
+        self.orders = {}
+        self.fills = []
+        self.balances = {}
+        self.initialbalances = balances or { "DAI": 1000 * 10**18 }
+        self.messageids = { market: 0 for market in mockmarkets }
+        self.subscribers = {}
+
+    # Return the account balances of an owner (a list of wei indexed by solo market id, like eth.solo.get_balances).
+    def accountbalances( self, owner: str ) -> list:
+        owner = owner.lower()
+        with self.lock:
+            if owner not in self.balances:
+                self.balances[owner] = [ 0 ] * len( currencies )
+                for currency, amount in self.initialbalances.items():
+                    self.balances[owner][currencies[currency]["soloMarketId"]] = int( amount )
+            return self.balances[owner]
+
+    # Register a callback receiving every message of a channel and return the initial (subscribed) message.
+    # The orderbook snapshot carries the message_id of the last update published (every subscriber of a market shares the
+    # numbering of its updates), so a new subscription leaves no gap in the messages of the existing ones.
+    def subscribe( self, channel: str, channelid: str, callback ) -> dict:
+        with self.lock:
+            self.subscribers.setdefault( ( channel, channelid.lower() ), [] ).append( callback )
+            if channel == "orderbook":
+                return {
+                    "type": "subscribed",
+                    "channel": "orderbook",
+                    "id": channelid,
+                    "message_id": self.messageids[channelid],
+                    "contents": self.orderbook( channelid )
+                }
+            openorders = [ order for order in self.orders.values() if order["makerAccountOwner"] == channelid.lower() and order["status"] in ( "OPEN", "PARTIALLY_FILLED" ) ]
+            return { "type": "subscribed", "channel": "orders", "id": channelid, "contents": { "orders": openorders } }
+
+    def unsubscribe( self, channel: str, channelid: str, callback ) -> None:
+        with self.lock:
+            callbacks = self.subscribers.get( ( channel, channelid.lower() ), [] )
+            if callback in callbacks:
+                callbacks.remove( callback )
+
+    def publish( self, channel: str, channelid: str, message: dict ) -> None:
+        callbacks = self.subscribers.get( ( channel, channelid.lower() ) )
+        if callbacks:
+            textoutput = json.dumps( message )
+            for callback in callbacks:
+                callback( textoutput )
+
+    def publishupdates( self, market: str, updates: list ) -> None:
+        if not updates:
+            return
+        self.messageids[market] += 1
+        self.publish( "orderbook", market, {
+            "type": "channel_data",
+            "channel": "orderbook",
+            "id": market,
+            "message_id": self.messageids[market],
+            "contents": { "updates": updates }
+        } )
+
+    def publishorder( self, order: dict ) -> None:
+        self.publish( "orders", order["makerAccountOwner"], {
+            "type": "channel_data",
+            "channel": "orders",
+            "id": order["makerAccountOwner"],
+            "contents": { "type": "ORDER_UPDATE", "order": order }
+        } )
+
+    # Return the orderbook of a market in the format of client.get_orderbook (best prices first).
+    def orderbook( self, market: str ) -> dict:
+        with self.lock:
+            book = self.books[market]
+            return {
+                "bids": [ self.orderbookentry( orderid ) for key in book.levelkeys( "BUY" ) for orderid in book.levels["BUY"][key] ],
+                "asks": [ self.orderbookentry( orderid ) for key in book.levelkeys( "SELL" ) for orderid in book.levels["SELL"][key] ]
+            }
+
+    def orderbookentry( self, orderid: str ) -> dict:
+        order = self.orders[orderid]
+        return { "id": orderid, "uuid": order["uuid"], "amount": str( self.remaining( order ) ), "price": order["price"] }
+
+    def remaining( self, order: dict ) -> int:
+        return int( order["amount"] ) - int( order["filledAmount"] )
+
+    # Place a limit order and match it against the resting orders of the other side.
+    # Post-only orders that would cross and fill-or-kill orders that cannot fill completely are canceled straight away.
+    def placeorder( self, owner: str, market: str, side: str, amount: int, price, fillOrKill: bool = False, postOnly: bool = False ) -> dict:
+        if market not in self.books:
+            raise MockExchangeError( 400, f'Invalid market: {market}' )
+        if side not in ( "BUY", "SELL" ):
+            raise MockExchangeError( 400, f'Invalid side: {side}' )
+        amount = int( amount )
+        if amount <= 0:
+            raise MockExchangeError( 400, f'Invalid amount: {amount}' )
+        now = timestamp()
+        order = {
+            "id": '0x' + uuid.uuid4().hex + uuid.uuid4().hex,
+            "uuid": str( uuid.uuid4() ),
+            "market": market,
+            "side": side,
+            "type": "LIMIT",
+            "price": f'{Decimal( price ):f}',
+            "amount": str( amount ),
+            "filledAmount": "0",
+            "status": "OPEN",
+            "postOnly": postOnly,
+            "fillOrKill": fillOrKill,
+            "makerAccountOwner": owner.lower(),
+            "makerAccountNumber": "0",
+            "cancelReason": None,
+            "createdAt": now,
+            "updatedAt": now
+        }
+        with self.lock:
+            book = self.books[market]
+            self.orders[order["id"]] = order
+            crossing = self.crossing( book, side, book.key( price ) )
+            if postOnly and crossing:
+                return self.cancel( order, "POST_ONLY_WOULD_CROSS" )
+            if fillOrKill and sum( amount for orderid, amount in crossing ) < amount:
+                return self.cancel( order, "FILL_OR_KILL_NOT_FILLED" )
+            updates = self.match( book, order, crossing )
+            if self.remaining( order ) > 0:
+                book.insert( order["id"], side, order["price"], self.remaining( order ) )
+                updates.append( dict( self.orderbookentry( order["id"] ), side=side, type="NEW" ) )
+            self.publishupdates( market, updates )
+            self.publishorder( order )
+            return dict( order )
+
+    # Return the resting orders ( order id, remaining amount ) that an order at the price level specified would fill (best price first).
+    def crossing( self, book: OrderBook, side: str, key ) -> list:
+        if side == "BUY":
+            keys = [ level for level in book.levelkeys( "SELL" ) if level <= key ]
+            levels = book.levels["SELL"]
+        else:
+            keys = [ level for level in book.levelkeys( "BUY" ) if level >= key ]
+            levels = book.levels["BUY"]
+        return [ ( orderid, amount ) for level in keys for orderid, amount in list( levels[level].items() ) ]
+
+    def match( self, book: OrderBook, taker: dict, crossing: list ) -> list:
+        updates = []
+        for makerid, makeramount in crossing:
+            remaining = self.remaining( taker )
+            if remaining <= 0:
+                break
+            maker = self.orders[makerid]
+            traded = min( remaining, makeramount )
+            self.fill( maker, taker, traded )
+            if self.remaining( maker ) > 0:
+                book.update( makerid, amount=self.remaining( maker ) )
+                updates.append( dict( self.orderbookentry( makerid ), side=maker["side"], type="UPDATED" ) )
+            else:
+                book.remove( makerid )
+                updates.append( { "id": makerid, "side": maker["side"], "type": "REMOVED" } )
+            self.publishorder( maker )
+        return updates
+
+    # Record a fill between a resting (maker) order and an incoming (taker) order at the maker price.
+    def fill( self, maker: dict, taker: dict, amount: int ) -> None:
+        price = Decimal( maker["price"] )
+        quoteamount = int( amount * price )
+        now = timestamp()
+        for order, liquidity in ( ( maker, "MAKER" ), ( taker, "TAKER" ) ):
+            order["filledAmount"] = str( int( order["filledAmount"] ) + amount )
+            order["status"] = "FILLED" if self.remaining( order ) == 0 else "PARTIALLY_FILLED"
+            order["updatedAt"] = now
+            basecurrency, quotecurrency = order["market"].split( '-' )
+            balances = self.accountbalances( order["makerAccountOwner"] )
+            direction = 1 if order["side"] == "BUY" else -1
+            balances[currencies[basecurrency]["soloMarketId"]] += direction * amount
+            balances[currencies[quotecurrency]["soloMarketId"]] -= direction * quoteamount
+            self.fills.append( {
+                "uuid": str( uuid.uuid4() ),
+                "orderId": order["id"],
+                "market": order["market"],
+                "side": order["side"],
+                "price": maker["price"],
+                "amount": str( amount ),
+                "liquidity": liquidity,
+                "status": "CONFIRMED",
+                "accountOwner": order["makerAccountOwner"],
+                "accountNumber": "0",
+                "transactionHash": '0x' + uuid.uuid4().hex * 2,
+                "createdAt": now,
+                "updatedAt": now
+            } )
+
+    def cancel( self, order: dict, reason: str = "USER_CANCELED" ) -> dict:
+        order["status"] = "CANCELED"
+        order["cancelReason"] = reason
+        order["updatedAt"] = timestamp()
+        book = self.books[order["market"]]
+        if order["id"] in book:
+            book.remove( order["id"] )
+            self.publishupdates( order["market"], [ { "id": order["id"], "side": order["side"], "type": "REMOVED" } ] )
+        self.publishorder( order )
+        return dict( order )
+
+    def cancelorder( self, orderid: str ) -> dict:
+        with self.lock:
+            order = self.orders.get( orderid )
+            if order is None:
+                raise MockExchangeError( 404, f'Order not found: {orderid}' )
+            if order["status"] in ( "FILLED", "CANCELED" ):
+                raise MockExchangeError( 400, f'Order already {order["status"]}: {orderid}' )
+            return self.cancel( order )
+
+    def getorder( self, orderid: str ) -> dict:
+        with self.lock:
+            order = self.orders.get( orderid )
+            if order is None:
+                raise MockExchangeError( 404, f'Order not found: {orderid}' )
+            return dict( order )
+
+    # Return orders (or fills) newest first, filtered like the dYdX /v2/orders (or /v2/fills) endpoint.
+    def getorders( self, owner: str = None, markets: list = None, status: list = None, limit: int = 100, startingBefore: str = None ) -> list:
+        with self.lock:
+            orders = list( self.orders.values() )
+        return self.filter( orders, owner, markets, limit, startingBefore, status )
+
+    def getfills( self, owner: str = None, markets: list = None, limit: int = 100, startingBefore: str = None ) -> list:
+        with self.lock:
+            fills = list( self.fills )
+        return self.filter( fills, owner, markets, limit, startingBefore )
+
+    def filter( self, entries: list, owner, markets, limit, startingBefore, status=None ) -> list:
+        owner = owner.lower() if owner else None
+        selected = []
+        for entry in reversed( entries ):
+            if owner and entry.get( "makerAccountOwner", entry.get( "accountOwner" ) ) != owner:
+                continue
+            if markets and entry["market"] not in markets:
+                continue
+            if status and entry["status"] not in status:
+                continue
+            if startingBefore and entry["createdAt"] >= startingBefore:
+                continue
+            selected.append( dict( entry ) )
+            if len( selected ) >= limit:
+                break
+        return selected
+
+    # Withdraw the whole (positive) balance of a currency from an account (like eth.solo.withdraw_to_zero).
+    def withdraw( self, owner: str, marketid: int ) -> str:
+        with self.lock:
+            balances = self.accountbalances( owner )
+            balances[marketid] = min( balances[marketid], 0 )
+        return '0x' + uuid.uuid4().hex * 2
+
+
+# Quote a ladder of house orders around a randomly walking mid price so that the strategies have a market to trade with.
+# Each step cancels the house orders of a market and quotes depth levels on either side of the new mid price.
+# House bids that end up above resting asks (or house asks below resting bids) fill them, as a moving market would.
+class MarketSimulator:
+
+    def __init__( self, engine: MatchingEngine, interval: float = 0.1, depth: int = 10, volatility: int = 2, amount: int = 10 * 10**18 ):
+        self.engine = engine
+        self.interval = interval
+        self.depth = depth
+        self.volatility = volatility
+        self.amount = amount
+        self.midticks = {}
+        self.houseorders = { market: [] for market in mockmarkets }
+        self.thread = None
+        self.running = False
+        for market, parameters in mockmarkets.items():
+            self.midticks[market] = engine.books[market].key( parameters["price"] )
+            self.quote( market )
+
+    def quote( self, market: str ) -> None:
+        book = self.engine.books[market]
+        with self.engine.lock:
+            for orderid in self.houseorders[market]:
+                if self.engine.orders[orderid]["status"] in ( "OPEN", "PARTIALLY_FILLED" ):
+                    self.engine.cancel( self.engine.orders[orderid], "HOUSE_REQUOTE" )
+            self.houseorders[market] = []
+            for level in range( 1, self.depth + 1 ):
+                for side, key in ( ( "BUY", self.midticks[market] - level ), ( "SELL", self.midticks[market] + level ) ):
+                    order = self.engine.placeorder( houseaddress, market, side, self.amount, book.price( key ) )
+                    self.houseorders[market].append( order["id"] )
+
+    def step( self ) -> None:
+        self.midticks["WETH-DAI"] += random.randint( -self.volatility, self.volatility )
+        self.quote( "WETH-DAI" )
+
+    def run( self ) -> None:
+        while self.running:
+            time.sleep( self.interval )
+            self.step()
+
+    def start( self ) -> None:
+        self.running = True
+        self.thread = threading.Thread( target=self.run, name='marketsimulator', daemon=True )
+        self.thread.start()
+
+    def stop( self ) -> None:
+        self.running = False
+        self.thread.join()
+
+
+# Serve the REST endpoints used by the strategies (see MockClient) with the latency specified.
+# Connections are kept alive between requests (HTTP/1.1) and responses are not delayed by Nagle's algorithm.
+class MockRequestHandler( BaseHTTPRequestHandler ):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    engine = None
+    latency = 0
+
+    def log_message( self, format, *args ):
+        pass
+
+    def respond( self, status: int, dictionary: dict ) -> None:
+        body = json.dumps( dictionary ).encode()
+        self.send_response( status )
+        self.send_header( 'Content-Type', 'application/json' )
+        self.send_header( 'Content-Length', str( len( body ) ) )
+        self.end_headers()
+        self.wfile.write( body )
+
+    def route( self, method: str ) -> None:
+        if self.latency:
+            time.sleep( self.latency )
+        request = urlparse( self.path )
+        parts = request.path.strip( '/' ).split( '/' )
+        query = { key: values[0] for key, values in parse_qs( request.query ).items() }
+        try:
+            length = int( self.headers.get( 'Content-Length', 0 ) )
+            body = json.loads( self.rfile.read( length ) ) if length else {}
+            self.respond( 200, self.dispatch( method, parts, query, body ) )
+        except MockExchangeError as e:
+            self.respond( e.status, { "errors": [ { "msg": e.message } ] } )
+
+    def dispatch( self, method: str, parts: list, query: dict, body: dict ) -> dict:
+        engine = self.engine
+        markets = query["market"].split( ',' ) if "market" in query else None
+        limit = int( query.get( "limit", 100 ) )
+        if method == 'GET' and parts[:2] == [ 'v2', 'markets' ]:
+            if len( parts ) == 3:
+                if parts[2] not in mockmarkets:
+                    raise MockExchangeError( 404, f'Market not found: {parts[2]}' )
+                return { "market": marketinformation( parts[2] ) }
+            return { "markets": { market: marketinformation( market ) for market in mockmarkets } }
+        if method == 'GET' and parts[:2] == [ 'v1', 'orderbook' ] and len( parts ) == 3:
+            if parts[2] not in mockmarkets:
+                raise MockExchangeError( 404, f'Market not found: {parts[2]}' )
+            return engine.orderbook( parts[2] )
+        if parts[:2] == [ 'v2', 'orders' ]:
+            if method == 'POST':
+                order = body["order"]
+                market = body.get( "market" ) or marketname( int( order["baseMarket"] ), int( order["quoteMarket"] ) )
+                return { "order": engine.placeorder(
+                    order["makerAccountOwner"],
+                    market,
+                    "BUY" if order["isBuy"] else "SELL",
+                    order["amount"],
+                    order["limitPrice"],
+                    body.get( "fillOrKill", False ),
+                    body.get( "postOnly", False )
+                ) }
+            if method == 'DELETE' and len( parts ) == 3:
+                return { "order": engine.cancelorder( parts[2] ) }
+            if method == 'GET' and len( parts ) == 3:
+                return { "order": engine.getorder( parts[2] ) }
+            if method == 'GET':
+                status = query["status"].split( ',' ) if "status" in query else None
+                return { "orders": engine.getorders( query.get( "accountOwner" ), markets, status, limit, query.get( "startingBefore" ) ) }
+        if method == 'GET' and parts[:2] == [ 'v2', 'fills' ]:
+            return { "fills": engine.getfills( query.get( "accountOwner" ), markets, limit, query.get( "startingBefore" ) ) }
+        # The trades of an account are its fills in the mock.
+        if method == 'GET' and parts[:2] == [ 'v2', 'trades' ]:
+            return { "trades": engine.getfills( query.get( "accountOwner" ), markets, limit, query.get( "startingBefore" ) ) }
+        if method == 'GET' and parts[:2] == [ 'mock', 'balances' ] and len( parts ) == 3:
+            return { "balances": [ str( balance ) for balance in engine.accountbalances( parts[2] ) ] }
+        if method == 'POST' and parts[:2] == [ 'mock', 'withdraw' ]:
+            return { "transactionHash": engine.withdraw( body["owner"], int( body["market"] ) ) }
+        raise MockExchangeError( 404, f'Not found: {method} /{"/".join( parts )}' )
+
+    def do_GET( self ):
+        self.route( 'GET' )
+
+    def do_POST( self ):
+        self.route( 'POST' )
+
+    def do_DELETE( self ):
+        self.route( 'DELETE' )
+
+
+def marketinformation( market: str ) -> dict:
+    basecurrency, quotecurrency = market.split( '-' )
+    return {
+        "name": market,
+        "baseCurrency": dict( currencies[basecurrency], currency=basecurrency ),
+        "quoteCurrency": dict( currencies[quotecurrency], currency=quotecurrency ),
+        "minimumTickSize": mockmarkets[market]["minimumTickSize"],
+        "minimumOrderSize": mockmarkets[market]["minimumOrderSize"],
+        "makerFee": "0",
+        "smallTakerFee": "0",
+        "largeTakerFee": "0"
+    }
+
+
+def marketname( basemarket: int, quotemarket: int ) -> str:
+    names = { parameters["soloMarketId"]: currency for currency, parameters in currencies.items() }
+    return f'{names[basemarket]}-{names[quotemarket]}'
+
+
+# Run the mock exchange: a REST server, a websocket server (orderbook and orders channels) and a market simulator.
+# Every REST response and websocket message is delayed by the latency specified (in seconds).
+# A fraction of the orderbook updates (droprate) can be dropped to exercise the recovery of the orderbook feeds.
+class MockExchange:
+
+    def __init__( self, host: str = 'localhost', restport: int = 8080, websocketport: int = 8765, latency: float = 0, interval: float = 0.1, balances: dict = None, droprate: float = 0 ):
+        self.host = host
+        self.restport = restport
+        self.websocketport = websocketport
+        self.latency = latency
+        self.droprate = droprate
+        self.engine = MatchingEngine( balances )
+        self.simulator = MarketSimulator( self.engine, interval )
+        self.restserver = None
+        self.websocketserver = None
+        self.loop = None
+        self.threads = []
+
+    @property
+    def apiurl( self ) -> str:
+        return f'http://{self.host}:{self.restport}'
+
+    @property
+    def websocketurl( self ) -> str:
+        return f'ws://{self.host}:{self.websocketport}'
+
+    def start( self ) -> None:
+        handler = type( 'MockRequestHandler', ( MockRequestHandler, ), { "engine": self.engine, "latency": self.latency } )
+        self.restserver = ThreadingHTTPServer( ( self.host, self.restport ), handler )
+        self.loop = asyncio.new_event_loop()
+        self.threads = [
+            threading.Thread( target=self.restserver.serve_forever, name='mockrest', daemon=True ),
+            threading.Thread( target=self.loop.run_forever, name='mockwebsocket', daemon=True )
+        ]
+        for thread in self.threads:
+            thread.start()
+        self.websocketserver = asyncio.run_coroutine_threadsafe( self.listen(), self.loop ).result()
+        if self.simulator.interval:
+            self.simulator.start()
+        logger.debug( f'Mock exchange listening on {self.apiurl} and {self.websocketurl} (latency: {self.latency} seconds).' )
+
+    def stop( self ) -> None:
+        if self.simulator.running:
+            self.simulator.stop()
+        self.restserver.shutdown()
+        self.websocketserver.close()
+        asyncio.run_coroutine_threadsafe( self.websocketserver.wait_closed(), self.loop ).result()
+        self.loop.call_soon_threadsafe( self.loop.stop )
+
+    async def listen( self ):
+        return await websockets.serve( self.serve, self.host, self.websocketport )
+
+    # Serve one websocket client (messages are queued with the time they are due and sent in order).
+    async def serve( self, websocket, path=None ) -> None:
+        queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        def deliver( textoutput ):
+            if self.droprate and '"updates"' in textoutput and random.random() < self.droprate:
+                return
+            loop.call_soon_threadsafe( queue.put_nowait, ( loop.time() + self.latency, textoutput ) )
+
+        async def send():
+            while True:
+                due, textoutput = await queue.get()
+                if due > loop.time():
+                    await asyncio.sleep( due - loop.time() )
+                await websocket.send( textoutput )
+
+        sender = asyncio.ensure_future( send() )
+        subscriptions = []
+        try:
+            async for requestjson in websocket:
+                subscriptionrequest = json.loads( requestjson )
+                channel = ( subscriptionrequest.get( "channel" ), subscriptionrequest.get( "id" ) )
+                if channel[0] not in ( "orderbook", "orders" ) or not channel[1]:
+                    continue
+                if subscriptionrequest.get( "type" ) == "unsubscribe":
+                    self.engine.unsubscribe( *channel, deliver )
+                    continue
+                with self.engine.lock:
+                    deliver( json.dumps( self.engine.subscribe( *channel, deliver ) ) )
+                subscriptions.append( channel )
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for channel in subscriptions:
+                self.engine.unsubscribe( *channel, deliver )
+            sender.cancel()
+
+
+# Stand in for dydx.client.Client against a mock exchange (set client = MockClient() in credentials.py).
+# Only the methods used by the strategies are implemented. Orders are not signed.
+# Every thread keeps its own HTTP connection to the mock exchange alive between requests.
+class MockClient:
+
+    BASE_API_URI = 'http://localhost:8080'
+
+    def __init__( self, url: str = None, public_address: str = '0x' + '1' * 40, account_number: int = 0 ):
+        if url:
+            self.BASE_API_URI = url
+        self.public_address = public_address.lower()
+        self.account_number = account_number
+        self.eth = MockEth( self )
+        self.connections = threading.local()
+
+    # Return the HTTP connection of the calling thread (opened on first use).
+    def _connection( self ) -> HTTPConnection:
+        connection = getattr( self.connections, 'connection', None )
+        if connection is None:
+            url = urlparse( self.BASE_API_URI )
+            connection = self.connections.connection = HTTPConnection( url.hostname, url.port, timeout=30 )
+        return connection
+
+    def _request( self, method: str, uri: str, params: dict = None, data: dict = None ) -> dict:
+        complete_uri = uri
+        if params:
+            complete_uri += '?' + urlencode( { key: value for key, value in params.items() if value is not None } )
+        body = json.dumps( data ).encode() if data is not None else None
+        headers = { 'Content-Type': 'application/json' }
+        for attempt in range( 2 ):
+            connection = self._connection()
+            try:
+                connection.request( method, complete_uri, body=body, headers=headers )
+                response = connection.getresponse()
+                textoutput = response.read()
+                break
+            except ( RemoteDisconnected, BrokenPipeError, ConnectionResetError ):
+                # The server closed an idle connection: reconnect once.
+                connection.close()
+                self.connections.connection = None
+                if attempt:
+                    raise
+        if response.status >= 400:
+            raise MockExchangeError( response.status, textoutput.decode() )
+        return json.loads( textoutput )
+
+    def get_markets( self ) -> dict:
+        return self._request( 'GET', '/v2/markets' )
+
+    def get_pairs( self ) -> dict:
+        return self._request( 'GET', '/v2/markets' )
+
+    def get_market( self, market: str ) -> dict:
+        return self._request( 'GET', '/v2/markets/' + market )
+
+    def get_orderbook( self, market: str ) -> dict:
+        return self._request( 'GET', '/v1/orderbook/' + market )
+
+    def place_order( self, market, side, amount, price, expiration=None, limitFee=None, fillOrKill=False, postOnly=False, clientId=None, cancelAmountOnRevert=None, cancelId=None ) -> dict:
+        return self._request( 'POST', '/v2/orders', data={
+            "fillOrKill": fillOrKill,
+            "postOnly": postOnly,
+            "market": market,
+            "order": {
+                "isBuy": side == "BUY",
+                "amount": str( int( float( amount ) ) ),
+                "limitPrice": str( price ),
+                "makerAccountOwner": self.public_address,
+                "makerAccountNumber": str( self.account_number )
+            }
+        } )
+
+    # Build an order the way dydx.client.Client does before posting it (so orders can be prepared ahead of time, see orderer.prepareorder).
+    def _make_solo_order( self, market, side, amount, price, expiration=None, limitFee=None, postOnly=False ) -> dict:
+        basecurrency, quotecurrency = market.split( '-' )
+        return {
+            "salt": random.randint( 0, 2**256 ),
+            "isBuy": side == "BUY",
+            "baseMarket": currencies[basecurrency]["soloMarketId"],
+            "quoteMarket": currencies[quotecurrency]["soloMarketId"],
+            "amount": int( float( amount ) ),
+            "limitPrice": price,
+            "triggerPrice": Decimal( 0 ),
+            "limitFee": limitFee or Decimal( 0 ),
+            "makerAccountOwner": self.public_address,
+            "makerAccountNumber": self.account_number,
+            "expiration": expiration or int( time.time() ) + 28 * 86400,
+            "typedSignature": '0x'
+        }
+
+    # Post a request body already encoded as JSON (as dydx.client.Client does).
+    def _post( self, uri: str, data: str = None ) -> dict:
+        return self._request( 'POST', uri, data=json.loads( data ) if data is not None else None )
+
+    def cancel_order( self, hash: str ) -> dict:
+        return self._request( 'DELETE', '/v2/orders/' + hash )
+
+    def get_order( self, orderId: str ) -> dict:
+        return self._request( 'GET', '/v2/orders/' + orderId )
+
+    def get_orders( self, market=None, side=None, status=None, orderType=None, accountOwner=None, accountNumber=None, limit=None, startingBefore=None ) -> dict:
+        return self._request( 'GET', '/v2/orders', params={
+            "market": None if market is None else ','.join( market ),
+            "status": None if status is None else ','.join( status ),
+            "accountOwner": accountOwner,
+            "limit": limit,
+            "startingBefore": startingBefore
+        } )
+
+    def get_my_orders( self, market, limit=None, startingBefore=None ) -> dict:
+        return self.get_orders( market=market, accountOwner=self.public_address, limit=limit, startingBefore=startingBefore )
+
+    def get_fills( self, market=None, side=None, accountOwner=None, accountNumber=None, transactionHash=None, limit=None, startingBefore=None ) -> dict:
+        return self._request( 'GET', '/v2/fills', params={
+            "market": None if market is None else ','.join( market ),
+            "accountOwner": accountOwner,
+            "limit": limit,
+            "startingBefore": startingBefore
+        } )
+
+    def get_my_fills( self, market, limit=None, startingBefore=None ) -> dict:
+        return self.get_fills( market=market, accountOwner=self.public_address, limit=limit, startingBefore=startingBefore )
+
+    def get_trades( self, market=None, side=None, accountOwner=None, accountNumber=None, transactionHash=None, limit=None, startingBefore=None ) -> dict:
+        return self._request( 'GET', '/v2/trades', params={
+            "market": None if market is None else ','.join( market ),
+            "accountOwner": accountOwner,
+            "limit": limit,
+            "startingBefore": startingBefore
+        } )
+
+    def get_my_trades( self, market, limit=None, startingBefore=None ) -> dict:
+        return self.get_trades( market=market, accountOwner=self.public_address, limit=limit, startingBefore=startingBefore )
+
+
+class MockEth:
+
+    def __init__( self, client: MockClient ):
+        self.client = client
+        self.solo = MockSolo( client )
+
+    def get_receipt( self, tx_hash ) -> dict:
+        return { "transactionHash": tx_hash, "status": 1 }
+
+
+class MockSolo:
+
+    def __init__( self, client: MockClient ):
+        self.client = client
+
+    def get_my_balances( self ) -> list:
+        return self.get_balances( self.client.public_address, self.client.account_number )
+
+    def get_balances( self, address: str, accountNumber: int = 0 ) -> list:
+        return [ int( balance ) for balance in self.client._request( 'GET', '/mock/balances/' + address )["balances"] ]
+
+    def withdraw_to_zero( self, market: int, to=None ) -> str:
+        return self.client._request( 'POST', '/mock/withdraw', data={ "owner": self.client.public_address, "market": market } )["transactionHash"]
+
+
+if __name__ == "__main__":
+    # Run the mock exchange with the latency (seconds), the market simulation interval (seconds) and the orderbook update drop rate specified.
+    # Point the strategies at it with client = MockClient() in credentials.py and DYDXWEBSOCKETURL=ws://localhost:8765.
+    latency = float( sys.argv[1] ) if len( sys.argv ) > 1 else 0
+    interval = float( sys.argv[2] ) if len( sys.argv ) > 2 else 0.1
+    droprate = float( sys.argv[3] ) if len( sys.argv ) > 3 else 0
+    exchange = MockExchange( latency=latency, interval=interval, droprate=droprate )
+    exchange.start()
+    try:
+        while True:
+            time.sleep( 3600 )
+    except KeyboardInterrupt:
+        logger.debug( f'exception: keyboard interuption.' )
+    exchange.stop()
+    logger.debug( f'exiting...' )
+    exit(0)
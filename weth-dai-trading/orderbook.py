@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+
+from heapq import heapify
+from heapq import heappop
+from heapq import heappush
+from decimal import Decimal
+
+from leveltree import LevelTree
+
+
+# Maintain a dYdX orderbook indexed by order id and by price level.
+# Orders are kept in a hash index (order id -> side, price, amount) so that they can be found without scanning.
+# Price levels are kept in a hash index per side and each level holds the orders resting at that price.
+# The best price of each side is the top of a heap of its level keys (negated for bids, so the highest bid is on top).
+# Dropped levels are left in the heap and only popped once they reach the top (or when the heap is compacted),
+# so adding and dropping a level take O(log n) steps and reading the best price is O(1) between changes to the best level.
+# If the market's minimumTickSize is specified, price levels are kept as integer ticks (cheaper to compare than Decimals).
+#
+# The total amount (an integer, e.g. wei) resting at every price level is kept up to date with the orders.
+# The level totals and notional values (amount * price level key) of each side are also kept in a LevelTree ordered from
+# the best price, so depth queries (see fillprices and sizewithin) and the updates between them both take O(log n) steps.
+# The tree of a side is built the first time it is queried, so books that are never queried for depth do not maintain one.
+class OrderBook:
+
+    def __init__( self, quotetick=None ):
+        self.quotetick = Decimal( quotetick ) if quotetick else None
+        self.orders = {}
+        self.levels = { "BUY": {}, "SELL": {} }
+        self.heaps = { "BUY": [], "SELL": [] }
+        self.sizes = { "BUY": {}, "SELL": {} }
+        self.depths = { "BUY": None, "SELL": None }
+
+    def __len__( self ):
+        return len( self.orders )
+
+    def __contains__( self, orderid ):
+        return orderid in self.orders
+
+    # Convert a price into the key of its price level (integer ticks if the tick size is known).
+    def key( self, price ):
+        if self.quotetick is None:
+            return Decimal( price )
+        return int( ( Decimal( price ) / self.quotetick ).to_integral_value() )
+
+    # Convert the key of a price level back into a price.
+    def price( self, key ):
+        if self.quotetick is None:
+            return key
+        return key * self.quotetick
+
+    # Empty both sides of the orderbook.
+    def clear( self ):
+        self.orders.clear()
+        for side in self.levels:
+            self.levels[side].clear()
+            self.heaps[side].clear()
+            self.sizes[side].clear()
+            if self.depths[side] is not None:
+                self.depths[side].clear()
+
+    # Replace the orderbook with a dYdX orderbook snapshot.
+    # Works with the initial websocket response contents as well as the client.get_orderbook response.
+    def load( self, contents: dict, sides: tuple = ( "BUY", "SELL" ) ) -> None:
+        self.clear()
+        if "BUY" in sides:
+            for order in contents.get( "bids", [] ):
+                self.insert( order["id"], "BUY", order["price"], order["amount"] )
+        if "SELL" in sides:
+            for order in contents.get( "asks", [] ):
+                self.insert( order["id"], "SELL", order["price"], order["amount"] )
+
+    # Add an order to the orderbook.
+    # New price levels are pushed onto the heap of their side.
+    def insert( self, orderid: str, side: str, price, amount ) -> None:
+        if orderid in self.orders:
+            self.remove( orderid )
+        price = self.key( price )
+        levels = self.levels[side]
+        level = levels.get( price )
+        size = int( amount )
+        depth = self.depths[side]
+        if level is None:
+            level = levels[price] = {}
+            heappush( self.heaps[side], self.depthkey( side, price ) )
+            self.sizes[side][price] = size
+            if depth is not None:
+                depth.insert( self.depthkey( side, price ), size, size * price )
+        else:
+            self.sizes[side][price] += size
+            if depth is not None:
+                depth.change( self.depthkey( side, price ), size, size * price )
+        level[orderid] = amount
+        self.orders[orderid] = ( side, price, amount )
+
+    # Remove an order from the orderbook.
+    # Empty price levels are dropped from the hash index only (see best).
+    def remove( self, orderid: str ) -> None:
+        entry = self.orders.pop( orderid, None )
+        if entry is None:
+            return
+        side, price, amount = entry
+        levels = self.levels[side]
+        level = levels[price]
+        del level[orderid]
+        depth = self.depths[side]
+        if not level:
+            del levels[price]
+            del self.sizes[side][price]
+            if depth is not None:
+                depth.remove( self.depthkey( side, price ) )
+            heap = self.heaps[side]
+            # Rebuild the heap from the live levels once dropped levels make up most of it.
+            if len( heap ) > 2 * len( levels ) + 64:
+                heap[:] = [ self.depthkey( side, key ) for key in levels ]
+                heapify( heap )
+        else:
+            size = int( amount )
+            self.sizes[side][price] -= size
+            if depth is not None:
+                depth.change( self.depthkey( side, price ), -size, -size * price )
+
+    # Change the price and/or the amount of an order already in the orderbook.
+    def update( self, orderid: str, price=None, amount=None ) -> None:
+        entry = self.orders.get( orderid )
+        if entry is None:
+            return
+        side, oldprice, oldamount = entry
+        if amount is None:
+            amount = oldamount
+        if price is not None and self.key( price ) != oldprice:
+            self.insert( orderid, side, price, amount )
+        else:
+            self.levels[side][oldprice][orderid] = amount
+            self.orders[orderid] = ( side, oldprice, amount )
+            size = int( amount ) - int( oldamount )
+            self.sizes[side][oldprice] += size
+            if self.depths[side] is not None:
+                self.depths[side].change( self.depthkey( side, oldprice ), size, size * oldprice )
+
+    # Apply a single entry from the "updates" list of an orderbook channel message.
+    def apply( self, updatedata: dict ) -> None:
+        if updatedata["type"] == "NEW":
+            self.insert( updatedata["id"], updatedata["side"], updatedata["price"], updatedata["amount"] )
+        elif updatedata["type"] == "REMOVED":
+            self.remove( updatedata["id"] )
+        elif updatedata["type"] == "UPDATED":
+            self.update( updatedata["id"], updatedata.get( "price" ), updatedata.get( "amount" ) )
+
+    # Return the price level key of the best price of a side (None if the side is empty).
+    # Levels dropped since they were pushed are popped off the top of the heap first.
+    def best( self, side: str ):
+        heap = self.heaps[side]
+        levels = self.levels[side]
+        while heap:
+            key = self.depthkey( side, heap[0] )
+            if key in levels:
+                return key
+            heappop( heap )
+        return None
+
+    # Return the price level keys of a side ordered from the best price (sorts the levels, so O(n log n)).
+    def levelkeys( self, side: str ) -> list:
+        return sorted( self.levels[side], reverse=( side == "BUY" ) )
+
+    # Return the highest bid in the orderbook (None if there are no bids).
+    def bestbid( self ):
+        key = self.best( "BUY" )
+        return self.price( key ) if key is not None else None
+
+    # Return the lowest ask in the orderbook (None if there are no asks).
+    def bestask( self ):
+        key = self.best( "SELL" )
+        return self.price( key ) if key is not None else None
+
+    # Return the price level key of the highest bid (integer ticks if the tick size is known).
+    def bestbidticks( self ):
+        return self.best( "BUY" )
+
+    # Return the price level key of the lowest ask (integer ticks if the tick size is known).
+    def bestaskticks( self ):
+        return self.best( "SELL" )
+
+    # Return the key of a price level in the heap and the LevelTree of its side (negated for bids, so that both ascend from the best price).
+    def depthkey( self, side: str, key ):
+        return key if side == "SELL" else -key
+
+    # Return the LevelTree of a side (building it from the level totals the first time a side is queried).
+    def depth( self, side: str ) -> LevelTree:
+        if self.depths[side] is None:
+            depth = LevelTree()
+            for price, size in self.sizes[side].items():
+                depth.insert( self.depthkey( side, price ), size, size * price )
+            self.depths[side] = depth
+        return self.depths[side]
+
+    # Return the average price and the worst price paid to fill an amount (in the units of the orderbook) against a side.
+    # Filling against "SELL" buys from the asks and filling against "BUY" sells to the bids.
+    # Return None if the side is not deep enough.
+    def fillprices( self, side: str, amount ) -> tuple:
+        depth = self.depth( side )
+        if amount <= 0 or depth.amount() < amount:
+            return None
+        key, filledamount, filledvalue = depth.search( amount )
+        key = abs( key )
+        averageprice = self.price( Decimal( filledvalue + ( amount - filledamount ) * key ) / Decimal( amount ) )
+        return ( averageprice, self.price( key ) )
+
+    # Return the amount resting on a side within the basis points specified of its best price (None if the side is empty).
+    def sizewithin( self, side: str, basispoints ) -> int:
+        depth = self.depth( side )
+        best = depth.first()
+        if best is None:
+            return None
+        margin = Decimal( basispoints ) / 10000
+        # Compare the limit with the price level keys (without rounding it to a whole tick).
+        if side == "SELL":
+            limit = best * ( 1 + margin )
+        else:
+            limit = best * ( 1 - margin )
+        return depth.amountupto( limit )
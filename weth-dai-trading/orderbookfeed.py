@@ -0,0 +1,269 @@
+import json
+import time
+import asyncio
+import websockets
+from functools import partial
+
+from logger import logger
+from orderbook import OrderBook
+from messenger import smsalert
+from endpoints import websocketurl
+from messagedecoder import decodeorderbookmessage
+from backoff import Backoff
+from backoff import alertattempts
+
+
+# Maintain both sides of a market orderbook from a single orderbook channel subscription.
+# Any number of listeners (e.g. the maximum bid and minimum ask monitors) share the same feed.
+# Each listener receives ( message id, snapshot, sides ) for every message applied to the orderbook.
+# A feed restricted to one side of the orderbook skips decoding and applying the other side altogether.
+#
+# Update messages are numbered consecutively (message_id) from the snapshot of the subscription.
+# If a message is missed, the orderbook is rebuilt from a REST snapshot (client.get_orderbook) without dropping the socket.
+# Updates received meanwhile are buffered and replayed on top of the snapshot: every update sets the state of one order
+# (NEW inserts it, UPDATED sets its amount and REMOVED drops it), so replaying updates the snapshot already reflects is harmless.
+# The time taken by every rebuild (in seconds) is kept in resynctimes.
+#
+# When the connection drops, the last known orderbook keeps being served (stale) until the snapshot of the new subscription arrives.
+# The time from the drop to the new snapshot (in seconds) is kept in reconnecttimes.
+class OrderBookFeed:
+
+    def __init__( self, market: str = 'WETH-DAI', quotetick=None, sides: tuple = ( "BUY", "SELL" ), client=None ):
+        self.market = market
+        self.sides = sides
+        self.book = OrderBook( quotetick )
+        self.client = client
+        self.messageid = None
+        self.loaded = False
+        self.listeners = []
+        self.resyncing = None
+        self.buffer = []
+        self.gaps = 0
+        self.resynctimes = []
+        self.disconnectedat = None
+        self.reconnecttimes = []
+
+    # Create a request to subscribe to (or unsubscribe from) the orderbook channel.
+    def subscription( self, requesttype: str ) -> dict:
+        return {
+            "type": requesttype,
+            "channel": "orderbook",
+            "id": self.market
+        }
+
+    # Apply an orderbook channel message to the orderbook and notify the listeners.
+    def handle( self, dictionary: dict ) -> None:
+        if "contents" not in dictionary:
+            return
+        contents = dictionary["contents"]
+        messageid = dictionary.get( "message_id" )
+
+        # Handle dYdX initial response (a new snapshot supersedes any rebuild in progress).
+        if "updates" not in contents:
+            if self.resyncing is not None:
+                self.resyncing.cancel()
+                self.resyncing = None
+                self.buffer.clear()
+            self.messageid = messageid
+            self.book.load( contents, self.sides )
+            self.loaded = True
+            if self.disconnectedat is not None:
+                self.reconnecttimes.append( time.perf_counter() - self.disconnectedat )
+                self.disconnectedat = None
+                logger.debug( f'the {self.market} orderbook was ready {self.reconnecttimes[-1]*1000:.1f} ms after the connection dropped.' )
+            self.notify( True, self.sides )
+
+        # Buffer updates while the orderbook is rebuilt.
+        elif self.resyncing is not None:
+            self.messageid = messageid
+            self.buffer.append( contents["updates"] )
+
+        # Skip messages already applied.
+        elif self.loaded and messageid is not None and self.messageid is not None and messageid <= self.messageid:
+            logger.debug( f'skipping message {messageid} of the {self.market} orderbook channel (already applied).' )
+
+        # Rebuild the orderbook if messages were missed.
+        elif self.loaded and messageid is not None and self.messageid is not None and messageid > self.messageid + 1:
+            logger.debug( f'messages {self.messageid + 1} to {messageid - 1} of the {self.market} orderbook channel were missed: resyncing...' )
+            self.gaps += 1
+            self.messageid = messageid
+            self.buffer.append( contents["updates"] )
+            self.resyncing = asyncio.ensure_future( self.resync() )
+
+        # Handle dYdX update response.
+        else:
+            self.messageid = messageid
+            sides = set()
+            for updatedata in contents["updates"]:
+                self.book.apply( updatedata )
+                sides.add( updatedata["side"] )
+            if sides:
+                self.notify( False, sides )
+
+    # Keep serving the last known orderbook until the next snapshot (any rebuild in progress is superseded by it).
+    def disconnected( self ) -> None:
+        if self.disconnectedat is None:
+            self.disconnectedat = time.perf_counter()
+        if self.resyncing is not None:
+            self.resyncing.cancel()
+            self.resyncing = None
+            self.buffer.clear()
+
+    # Return True while the orderbook is the last known one of a dropped connection.
+    @property
+    def stale( self ) -> bool:
+        return self.disconnectedat is not None
+
+    # Rebuild the orderbook from a REST snapshot and replay the updates buffered since the gap.
+    async def resync( self ) -> None:
+        if self.client is None:
+            from credentials import client
+            self.client = client
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                snapshot = await loop.run_in_executor( None, partial( self.client.get_orderbook, market=self.market ) )
+                break
+            except Exception as e:
+                logger.debug( f'orderbook snapshot request failed with the following exception "{e}".' )
+                await asyncio.sleep( 1 )
+        self.book.load( snapshot, self.sides )
+        for updates in self.buffer:
+            for updatedata in updates:
+                self.book.apply( updatedata )
+        self.buffer.clear()
+        self.resyncing = None
+        self.resynctimes.append( time.perf_counter() - start )
+        logger.debug( f'the {self.market} orderbook was rebuilt in {self.resynctimes[-1]*1000:.1f} ms.' )
+        self.notify( True, self.sides )
+
+    def notify( self, snapshot: bool, sides ) -> None:
+        for queue in self.listeners:
+            queue.put_nowait( ( self.messageid, snapshot, sides ) )
+
+    # Register a listener and return an async iterator over the messages applied from now on.
+    # If the orderbook is already loaded, the listener is handed the current orderbook straight away.
+    def listen( self ):
+        queue = asyncio.Queue()
+        self.listeners.append( queue )
+        if self.loaded:
+            queue.put_nowait( ( self.messageid, True, self.sides ) )
+        return self.entries( queue )
+
+    async def entries( self, queue: asyncio.Queue ):
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.listeners.remove( queue )
+
+    # Read orderbook channel messages from the websocket until the connection closes.
+    # A message that cannot be decoded or handled is logged and skipped (like in WebsocketHub.read), so it never ends the
+    # monitors of the feed. The orderbook may have been left half updated, so it is rebuilt from a REST snapshot.
+    async def consume( self, websocket: websockets.WebSocketClientProtocol ) -> None:
+        async for textoutput in websocket:
+            try:
+                self.handle( decodeorderbookmessage( textoutput, self.sides ) )
+            except Exception as e:
+                logger.error( f'unable to handle a message of the {self.market} orderbook channel ("{e!r}"): {textoutput[:200]}', exc_info=True )
+                if self.loaded and self.resyncing is None:
+                    self.resyncing = asyncio.ensure_future( self.resync() )
+
+    def bestbid( self ):
+        return self.book.bestbid()
+
+    def bestask( self ):
+        return self.book.bestask()
+
+    # Return the difference between the lowest ask and the highest bid (None if either side is empty).
+    def spread( self ):
+        bestbid = self.book.bestbid()
+        bestask = self.book.bestask()
+        if bestbid is None or bestask is None:
+            return None
+        return bestask - bestbid
+
+    # Return the highest bid, the lowest ask and the spread together.
+    def bestorders( self ):
+        return ( self.bestbid(), self.bestask(), self.spread() )
+
+    # Return the average and the worst price to fill an amount (in wei) against a side (see OrderBook.fillprices).
+    def fillprices( self, side: str, amount ):
+        return self.book.fillprices( side, amount )
+
+    # Return the amount (in wei) resting on a side within the basis points specified of its best price.
+    def sizewithin( self, side: str, basispoints ):
+        return self.book.sizewithin( side, basispoints )
+
+
+async def channelsubscriptionhandler(
+        websocket: websockets.WebSocketClientProtocol,
+        subscriptionrequest: dict
+    ) -> None:
+    requestjson = json.dumps( subscriptionrequest )
+    await websocket.send( requestjson )
+
+
+# Subscribe once to the orderbook channel of the market specified and run every handler against the same feed.
+# A handler is a coroutine function taking ( feed, entries ) that returns a value once its exit trigger is reached.
+# Return the result of the single handler (or a tuple of results if several handlers are specified).
+# The handlers (and the trigger state they hold) outlive dropped connections, which are retried with jittered exponential backoff.
+async def monitororderbook(
+        market: str,
+        *handlers,
+        quotetick=None,
+        sides: tuple = ( "BUY", "SELL" ),
+        url: str = websocketurl
+    ):
+    feed = OrderBookFeed( market, quotetick, sides )
+    monitors = asyncio.gather( *[ handler( feed, feed.listen() ) for handler in handlers ] )
+    backoff = Backoff()
+
+    try:
+        while True:
+            logger.debug( f'Using websockets library to connect to {url}...' )
+
+            # Connect websocket.
+            try:
+                async with websockets.connect( url ) as websocket:
+                    logger.debug( f'Sending the following channel subscription request to {url}: {feed.subscription("subscribe")}' )
+                    await channelsubscriptionhandler( websocket, feed.subscription( "subscribe" ) )
+                    consumer = asyncio.ensure_future( feed.consume( websocket ) )
+                    await asyncio.wait( [ consumer, monitors ], return_when=asyncio.FIRST_COMPLETED )
+
+                    # Run the killsocket routine once every handler has returned.
+                    if monitors.done():
+                        consumer.cancel()
+                        logger.debug( f'Sending request to unsubscribe: {feed.subscription("unsubscribe")}' )
+                        await channelsubscriptionhandler( websocket, feed.subscription( "unsubscribe" ) )
+
+                        logger.debug( f'Closing websocket connection...' )
+                        await websocket.close( code=1000, reason='exit trigger reached.' )
+
+                        results = monitors.result()
+                        return results[0] if len( results ) == 1 else tuple( results )
+
+                    # The connection stopped delivering messages (raise any error that closed it).
+                    consumer.result()
+                    logger.debug( f'connection closed by {url}.' )
+
+            except websockets.exceptions.ConnectionClosed as e:
+                logger.debug( f'connection closed with the following exception "{e}".' )
+            except ( OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake ) as e:
+                logger.debug( f'connection failed with the following exception "{e}".' )
+
+            # Start the backoff over if the last connection delivered a snapshot, and serve the last known orderbook meanwhile.
+            if feed.loaded and not feed.stale:
+                backoff.reset()
+            feed.disconnected()
+            delay = backoff.delay()
+            if backoff.attempts == alertattempts:
+                smsalert( f'the websocket connection dropped: {alertattempts} reconnection attempts failed.' )
+            logger.debug( f'retrying connection in {delay:.2f} seconds (attempt {backoff.attempts})...' )
+            await asyncio.sleep( delay )
+
+    finally:
+        monitors.cancel()
+        if feed.resyncing is not None:
+            feed.resyncing.cancel()
@@ -2,22 +2,46 @@
 
 
 import json
+import time
+import asyncio
 import logging
 from decimal import Decimal
+from types import SimpleNamespace
 
 from dydx.client import Client
 import dydx.constants as consts
 import dydx.util as utils
 
 from logger import logger
+from logger import prettyjson
+from logger import LazyMessage
 from credentials import client
+from asyncclient import AsyncClient
+from latency import TimedClient
+
+
+# Record the round trip of every order placed in latency histograms
+client = TimedClient( client )
+
+# Call the dYdX client from the asyncio monitors without blocking message handling
+restclient = AsyncClient( client )
 
 # Define best price function
 # Return market / limit price
 def bestorders( tradingpair, quotetick ):
     # Get the orderbook for the trading pair specified
     orderbook = client.get_orderbook( market = tradingpair )
+    return limitorders( orderbook, quotetick )
+
+
+# Define best price function for asyncio code
+async def bestordersasync( tradingpair, quotetick ):
+    orderbook = await restclient.get_orderbook( market = tradingpair )
+    return limitorders( orderbook, quotetick )
 
+
+# Determine market / limit prices from an orderbook
+def limitorders( orderbook, quotetick ):
     # Define best ask and best bid values in the market
     marketask = orderbook["bids"][0]["price"]
     marketbid = orderbook["asks"][0]["price"]
@@ -36,35 +60,37 @@ def bestorders( tradingpair, quotetick ):
     return ( marketask, marketbid, limitask, limitbid )
 
 
+# Define the parameters of a post-only WETH-DAI order
+def postonlyorder( side, price, quantity ):
+    return dict(
+        market=consts.PAIR_WETH_DAI,
+        side=side,
+        amount=utils.token_to_wei(Decimal(quantity), consts.MARKET_WETH),
+        price=Decimal(price),
+        fillOrKill=False,
+        postOnly=True
+    )
+
+
 # Define post-only ask
 # In other words, limit ask
 def postask( price, quantity ):
 
     logger.debug ( f'Asking {price} DAI/ETH for {quantity} ETH.' )
-    ask = Decimal(price)
-    amount = Decimal(quantity)
 
     # Ask.
     try:
         # Submit order to dYdX.
-        submission = client.place_order(
-            market=consts.PAIR_WETH_DAI,
-            side=consts.SIDE_SELL,
-            amount=utils.token_to_wei(amount, consts.MARKET_WETH),
-            price=ask,
-            fillOrKill=False,
-            postOnly=True
-        )
+        submission = client.place_order( **postonlyorder( consts.SIDE_SELL, price, quantity ) )
     except Exception as e:
         # Throw a critical error notice if anything funky occurs.
         logger.critical(f'{e}', exc_info=True)
         return 'ERROR'
 
     # Write the dYdX response to the submission to the logs.
-    jsondata = json.dumps( submission, sort_keys=True, indent=4, separators=(',', ': ') )
-    logger.debug ( f'Order submission:\n{jsondata}' )
+    logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
 
-    # Return results of the submission to BUY ETH
+    # Return results of the submission to SELL ETH
     return submission
 
 
@@ -73,28 +99,257 @@ def postask( price, quantity ):
 def postbid( price, quantity ):
 
     logger.debug ( f'Bidding at {price} DAI/ETH for {quantity} ETH.' )
-    bid = Decimal(price)
-    amount = Decimal(quantity)
 
     # Bid.
     try:
         # Submit order to dYdX.
-        submission = client.place_order(
-            market=consts.PAIR_WETH_DAI,
-            side=consts.SIDE_BUY,
-            amount=utils.token_to_wei(amount, consts.MARKET_WETH),
-            price=bid,
-            fillOrKill=False,
-            postOnly=True
-        )
+        submission = client.place_order( **postonlyorder( consts.SIDE_BUY, price, quantity ) )
     except Exception as e:
         # Throw a critical error notice if anything funky occurs.
         logger.critical(f'{e}', exc_info=True)
         return 'ERROR'
 
     # Write the dYdX response to the submission to the logs.
-    jsondata = json.dumps( submission, sort_keys=True, indent=4, separators=(',', ': ') )
-    logger.debug ( f'Order submission:\n{jsondata}' )
+    logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
 
     # Return results of the submission to BUY ETH
     return submission
+
+
+# Define post-only order for asyncio code
+# The event loop keeps handling messages while the order is submitted
+async def postorderasync( side, price, quantity ):
+
+    logger.debug ( f'Posting a {side} order at {price} DAI/ETH for {quantity} ETH.' )
+
+    try:
+        # Submit order to dYdX.
+        submission = await restclient.place_order( **postonlyorder( side, price, quantity ) )
+    except Exception as e:
+        # Throw a critical error notice if anything funky occurs.
+        logger.critical(f'{e}', exc_info=True)
+        return 'ERROR'
+
+    # Write the dYdX response to the submission to the logs.
+    logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
+
+    return submission
+
+
+async def postaskasync( price, quantity ):
+    return await postorderasync( consts.SIDE_SELL, price, quantity )
+
+
+async def postbidasync( price, quantity ):
+    return await postorderasync( consts.SIDE_BUY, price, quantity )
+
+
+# A signed post-only WETH-DAI order with its request body encoded ahead of time.
+# Sending it is a single POST: the amount conversion, the signature and the JSON encoding are already done.
+# Every prepared order carries a random salt (its own order hash), so it can only be sent once.
+class PreparedOrder:
+
+    def __init__( self, side, price, quantity, body: str ):
+        self.side = side
+        self.price = Decimal( price )
+        self.quantity = quantity
+        self.body = body
+        self.preparedat = time.time()
+
+
+# Encode the request body that dydx.client.Client.place_order posts for an order of a solo market (built by client._make_solo_order).
+def orderbody( order: dict, fillOrKill: bool = False, postOnly: bool = False ) -> str:
+    return json.dumps( utils.remove_nones( {
+        'fillOrKill': fillOrKill,
+        'postOnly': postOnly,
+        'order': {
+            'isBuy': order['isBuy'],
+            'isDecreaseOnly': False,
+            'baseMarket': str( order['baseMarket'] ),
+            'quoteMarket': str( order['quoteMarket'] ),
+            'amount': str( order['amount'] ),
+            'limitPrice': utils.decimalToStr( order['limitPrice'] ),
+            'triggerPrice': utils.decimalToStr( order['triggerPrice'] ),
+            'limitFee': utils.decimalToStr( order['limitFee'] ),
+            'makerAccountOwner': order['makerAccountOwner'],
+            'makerAccountNumber': str( order['makerAccountNumber'] ),
+            'expiration': str( order['expiration'] ),
+            'salt': str( order['salt'] ),
+            'typedSignature': order['typedSignature']
+        }
+    } ) )
+
+
+# Whether orderbody matches the installed dYdX library (None until the first order is prepared).
+orderbodymatches = None
+
+
+# Check that orderbody encodes a signed order as the installed dydx.client.Client.place_order does.
+# place_order runs with its signing step returning the order specified and its POST capturing the request body instead of sending it.
+def checkorderbody( order: dict, parameters: dict ) -> bool:
+    posted = []
+    library = SimpleNamespace(
+        _make_solo_order=lambda *args, **kwargs: order,
+        _post=lambda uri, data=None, **kwargs: posted.append( ( uri, data ) )
+    )
+    Client.place_order( library, **parameters )
+    expected = ( '/v2/orders', json.loads( orderbody( order, parameters["fillOrKill"], parameters["postOnly"] ) ) )
+    return len( posted ) == 1 and ( posted[0][0], json.loads( posted[0][1] ) ) == expected
+
+
+# Sign a post-only WETH-DAI order without sending it
+# The request body is checked against the one dydx.client.Client.place_order posts the first time (see checkorderbody)
+# Raise a ValueError if it differs (e.g. after a library upgrade), so orders are signed and sent by place_order instead
+def prepareorder( side, price, quantity ) -> PreparedOrder:
+    global orderbodymatches
+    parameters = postonlyorder( side, price, quantity )
+    order = client._make_solo_order(
+        parameters["market"],
+        parameters["side"],
+        parameters["amount"],
+        parameters["price"],
+        postOnly=parameters["postOnly"]
+    )
+    if orderbodymatches is None:
+        orderbodymatches = checkorderbody( order, parameters )
+        if not orderbodymatches:
+            logger.critical( 'The order request body built by orderer.orderbody differs from the one dydx.client.Client.place_order posts: orders are no longer prepared ahead of time.' )
+    if not orderbodymatches:
+        raise ValueError( 'orderer.orderbody does not match dydx.client.Client.place_order.' )
+    return PreparedOrder( side, price, quantity, orderbody( order, parameters["fillOrKill"], parameters["postOnly"] ) )
+
+
+# Define prepared order submission
+# Only the request body prepared ahead of time is sent (timed and journaled by the TimedClient as place_order is)
+def sendorder( prepared: PreparedOrder ):
+
+    logger.debug ( f'Sending a prepared {prepared.side} order at {prepared.price} DAI/ETH for {prepared.quantity} ETH.' )
+
+    try:
+        # Submit order to dYdX.
+        submission = client.post_order( prepared.body, prepared.side )
+    except Exception as e:
+        # Throw a critical error notice if anything funky occurs.
+        logger.critical(f'{e}', exc_info=True)
+        return 'ERROR'
+
+    # Write the dYdX response to the submission to the logs.
+    logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
+
+    return submission
+
+
+# Define prepared order submission for asyncio code
+async def sendorderasync( prepared: PreparedOrder ):
+
+    logger.debug ( f'Sending a prepared {prepared.side} order at {prepared.price} DAI/ETH for {prepared.quantity} ETH.' )
+
+    try:
+        # Submit order to dYdX.
+        submission = await restclient.post_order( prepared.body, prepared.side )
+    except Exception as e:
+        # Throw a critical error notice if anything funky occurs.
+        logger.critical(f'{e}', exc_info=True)
+        return 'ERROR'
+
+    # Write the dYdX response to the submission to the logs.
+    logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
+
+    return submission
+
+
+# Keep post-only orders signed for the prices a trigger is likely to fire at.
+# While a monitor waits, the ladder follows the live orderbook of a feed and signs orders for the posting price
+# (a quote tick inside the spread from the best price the order would trade against, as limitorders determines it)
+# and the width ticks on either side of it. Orders are signed on a worker thread as the price moves, off the event loop.
+# When the trigger fires, post sends the order prepared for the price (or signs one on the spot if the price is off the ladder).
+class OrderLadder:
+
+    def __init__( self, side, quantity, quotetick, width: int = 5, maxage: float = 86400 ):
+        self.side = side
+        self.quantity = quantity
+        self.quotetick = Decimal( quotetick )
+        self.width = width
+        self.maxage = maxage
+        self.orders = {}
+        self.signing = set()
+        self.following = None
+        self.hits = 0
+        self.misses = 0
+
+    # Convert a price into integer ticks.
+    def ticks( self, price ) -> int:
+        return int( ( Decimal( price ) / self.quotetick ).to_integral_value() )
+
+    # Return the price an order would be posted at given the best bid and ask of an orderbook.
+    def postingprice( self, bestbid, bestask ):
+        if self.side == consts.SIDE_SELL:
+            return None if bestbid is None else Decimal( bestbid ) + self.quotetick
+        return None if bestask is None else Decimal( bestask ) - self.quotetick
+
+    # Sign the orders missing within width ticks of the price specified and drop those that drifted far away.
+    async def prepare( self, price ) -> None:
+        center = self.ticks( price )
+        for key in [ key for key in self.orders if abs( key - center ) > 2 * self.width ]:
+            del self.orders[key]
+        missing = [
+            key for key in sorted( range( center - self.width, center + self.width + 1 ), key=lambda key: abs( key - center ) )
+            if key not in self.orders and key not in self.signing
+        ]
+        loop = asyncio.get_running_loop()
+        for key in missing:
+            if orderbodymatches is False:
+                return
+            self.signing.add( key )
+            try:
+                self.orders[key] = await loop.run_in_executor( None, prepareorder, self.side, key * self.quotetick, self.quantity )
+            except ValueError:
+                return
+            finally:
+                self.signing.discard( key )
+
+    # Follow the best prices of an orderbook feed (applying every update) until cancelled.
+    async def follow( self, feed ) -> None:
+        center = None
+        async for messageid, snapshot, sides in feed.listen():
+            price = self.postingprice( feed.bestbid(), feed.bestask() )
+            if price is not None and self.ticks( price ) != center:
+                center = self.ticks( price )
+                await self.prepare( price )
+
+    # Start following the orderbook feed of a WebsocketHub (from any thread).
+    def start( self, hub ) -> None:
+        async def follow():
+            await self.follow( await hub.orderbook( consts.PAIR_WETH_DAI, self.quotetick ) )
+        self.following = asyncio.run_coroutine_threadsafe( follow(), hub.loop )
+
+    # Stop following the orderbook.
+    def stop( self ) -> None:
+        if self.following is not None:
+            self.following.cancel()
+            self.following = None
+
+    # Remove and return the order prepared for a price (None if there is none, or it is too old to be sent).
+    def take( self, price ) -> PreparedOrder:
+        prepared = self.orders.pop( self.ticks( price ), None )
+        if prepared is not None and time.time() - prepared.preparedat < self.maxage:
+            self.hits += 1
+            return prepared
+        self.misses += 1
+        return None
+
+    # Send the order prepared for a price (signing it now if it was not prepared).
+    def post( self, price ):
+        prepared = self.take( price )
+        if prepared is None:
+            logger.debug( f'No {self.side} order prepared at {price} DAI/ETH. Signing it now.' )
+            return postask( price, self.quantity ) if self.side == consts.SIDE_SELL else postbid( price, self.quantity )
+        return sendorder( prepared )
+
+    # Send the order prepared for a price from asyncio code.
+    async def postasync( self, price ):
+        prepared = self.take( price )
+        if prepared is None:
+            logger.debug( f'No {self.side} order prepared at {price} DAI/ETH. Signing it now.' )
+            return await postorderasync( self.side, price, self.quantity )
+        return await sendorderasync( prepared )
@@ -7,6 +7,101 @@ from decimal import Decimal
 from credentials import walletaddress
 
 from logger import logger
+from endpoints import websocketurl
+from latency import filled
+from journal import orderupdated
+from messagedecoder import decodeordersmessage
+
+
+# Order states that end the life of an order (every watch resolves on them).
+finalstates = ( "FILLED", "CANCELED" )
+
+
+# Track the orders of a wallet from a single orders channel subscription.
+# Any number of in-flight orders can be watched at once: each watch is a future resolved when its order reaches one of the states specified.
+# A watch for partial fills ("PARTIALLY_FILLED") also resolves if the order is filled or canceled outright.
+# The latest state of every order pushed is kept, so watching an order that already reached a state resolves straight away.
+# Listeners (callables) are handed every order pushed.
+# Fills of orders placed through a latency.TimedClient record their submit-to-fill time.
+class OrderFulfillmentValidator:
+
+    def __init__( self, walletaddress: str ):
+        self.walletaddress = walletaddress
+        self.orderstates = {}
+        self.watches = {}
+        self.listeners = []
+
+    def subscription( self, requesttype: str ) -> dict:
+        return {
+            "type": requesttype,
+            "channel": "orders",
+            "id": self.walletaddress
+        }
+
+    # Apply an orders channel message.
+    def handle( self, dictionary: dict ) -> None:
+        if "contents" not in dictionary:
+            return
+        contents = dictionary["contents"]
+        # Handle dYdX initial response.
+        for order in contents.get( "orders", [] ):
+            self.update( order )
+        # Handle dYdX update response.
+        if "order" in contents:
+            self.update( contents["order"] )
+
+    # Record the latest state of an order and resolve the watches it satisfies.
+    def update( self, order: dict ) -> None:
+        self.orderstates[order["id"]] = order
+        filled( order )
+        orderupdated( order )
+        for listener in self.listeners:
+            listener( order )
+        watches = self.watches.get( order["id"] )
+        if not watches:
+            return
+        for watch in list( watches ):
+            future, states = watch
+            if order["status"] in states or order["status"] in finalstates:
+                watches.remove( watch )
+                if not future.done():
+                    future.set_result( order )
+        if not watches:
+            del self.watches[order["id"]]
+
+    # Return a future resolved with the order once it reaches one of the states specified.
+    def watch( self, orderid: str, states: tuple = finalstates ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        order = self.orderstates.get( orderid )
+        if order is not None and ( order["status"] in states or order["status"] in finalstates ):
+            future.set_result( order )
+            return future
+        watch = ( future, states )
+        self.watches.setdefault( orderid, [] ).append( watch )
+        future.add_done_callback( lambda future: self.unwatch( orderid, watch ) )
+        return future
+
+    # Drop a watch (e.g. once it is cancelled by a timeout).
+    def unwatch( self, orderid: str, watch: tuple ) -> None:
+        watches = self.watches.get( orderid, [] )
+        if watch in watches:
+            watches.remove( watch )
+        if not watches:
+            self.watches.pop( orderid, None )
+
+    # Wait until an order reaches one of the states specified and return the order.
+    async def waitfororder( self, orderid: str, states: tuple = finalstates ) -> dict:
+        return await self.watch( orderid, states )
+
+    # Wait until every order specified reaches one of the states specified and return the orders by order id.
+    async def waitfororders( self, orderids: list, states: tuple = finalstates ) -> dict:
+        orders = await asyncio.gather( *[ self.watch( orderid, states ) for orderid in orderids ] )
+        return { order["id"]: order for order in orders }
+
+    # Apply every message of an orders channel subscription.
+    async def consume( self, websocket: websockets.WebSocketClientProtocol ) -> None:
+        async for textoutput in websocket:
+            self.handle( decodeordersmessage( textoutput ) )
 
 
 # Loop through a subscription to the orders channel.
@@ -16,39 +111,26 @@ async def orderfulfillmentstatushandler(
         subscriptionrequest: dict,
         orderidentification: str
     ) -> None:
-    orderstate = ""
-    killsocket = False
-    async for textoutput in websocket:
-        dictionary = json.loads( textoutput )
-        # Determine whether messages are updates.
-        if "contents" in dictionary:
-            # Handle dYdX initial response.
-            if "orders" in dictionary["contents"]:
-                # Check orders in dYdX initial response for filling of the order id specified.
-                for order in dictionary["contents"]["orders"]:
-                    if order["id"] == orderidentification:
-                        if order["status"] == ("FILLED" or "CANCELED"):
-                            orderstate = order["status"]
-                            killsocket = True
-
-            # Handle dYdX update response for a filled order.
-            if "order" in dictionary["contents"]:
-                order = dictionary["contents"]["order"]
-                if order["id"] == orderidentification:
-                    if order["status"] == ("FILLED" or "CANCELED"):
-                        orderstate = order["status"]
-                        killsocket = True
-
-            # Exit loop if the order was filled.
-            if killsocket:
-                logger.debug( f'The order {orderidentification} was filled.' )
-                logger.debug( f'Sending request to unsubscribe: {subscriptionrequest["unsubscribe"]}' )
-                await channelsubscriptionhandler( websocket, subscriptionrequest["unsubscribe"] )
-
-                logger.debug( f'Closing websocket connection...' )
-                await websocket.close(code=1000, reason='order filled.')
-                killsocket = False
-                return orderstate
+    validator = OrderFulfillmentValidator( subscriptionrequest["subscribe"]["id"] )
+    consumer = asyncio.ensure_future( validator.consume( websocket ) )
+    watch = validator.watch( orderidentification )
+    await asyncio.wait( [ consumer, watch ], return_when=asyncio.FIRST_COMPLETED )
+    if not watch.done():
+        # The connection closed before the order was filled or canceled (raise any error that closed it).
+        watch.cancel()
+        consumer.result()
+        return None
+    consumer.cancel()
+    orderstate = watch.result()["status"]
+
+    # Exit loop once the order was filled or canceled.
+    logger.debug( f'The order {orderidentification} was {orderstate}.' )
+    logger.debug( f'Sending request to unsubscribe: {subscriptionrequest["unsubscribe"]}' )
+    await channelsubscriptionhandler( websocket, subscriptionrequest["unsubscribe"] )
+
+    logger.debug( f'Closing websocket connection...' )
+    await websocket.close(code=1000, reason='order filled.')
+    return orderstate
 
 
 async def channelsubscriptionhandler(
@@ -66,7 +148,7 @@ async def orderfulfillmentwebsocket(
     # Initialize channel requested toggle.
     # Define the URL of the websocket server.
     channelsubscription = False
-    url = f'wss://api.dydx.exchange/v1/ws'
+    url = websocketurl
     logger.debug( f'Using websockets library to connect to {url}...' )
 
     # Connect websocket.
@@ -79,10 +161,17 @@ async def orderfulfillmentwebsocket(
 
 
 async def validateorderfulfillment(
-        id: str
+        id: str,
+        hub=None
     ) ->  None:
     # Define the order identifier.
     ordernumber = id
+    # Wait on the live orders channel of the hub if there is one (a WebsocketHub keeps one validator per wallet).
+    if hub is not None:
+        validator = await hub.orders( walletaddress )
+        order = await validator.waitfororder( ordernumber )
+        logger.debug( f'The order {ordernumber} was {order["status"]}.' )
+        return order["status"]
     # Create a request to subscribe to the orderbook channel.
     requesttext = {
         "subscribe": {
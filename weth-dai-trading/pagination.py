@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+
+from datetime import datetime
+from datetime import timedelta
+
+
+# Entries requested per page (the most dYdX returns at once).
+pagesize = 100
+
+
+# Return the dYdX time (ISO-8601, in milliseconds) one millisecond after the time specified.
+# Passed as startingBefore, it returns the entries created at the time specified again.
+def justafter( createdat: str ) -> str:
+    moment = datetime.strptime( createdat.rstrip( 'Z' ), '%Y-%m-%dT%H:%M:%S.%f' ) + timedelta( milliseconds=1 )
+    return moment.strftime( '%Y-%m-%dT%H:%M:%S.%f' )[:-3] + 'Z'
+
+
+# Return the entries of a paginated dYdX endpoint (orders, fills or trades) page by page, newest first.
+# startingBefore is exclusive, so paging from the creation time of the last entry of a page would skip the entries created
+# at that very time that did not fit on the page. Each page therefore starts a millisecond after the last entry of the previous
+# page, and the entries already returned at that time (by their idfield) are skipped.
+# If more than a page of entries share a creation time, the entries that do not fit on a page cannot be reached (dYdX pages
+# by time only), so paging moves on past that time.
+# Stop at the entries created before since (an ISO-8601 string).
+def pages( fetch, key: str, idfield: str = 'id', since: str = None, pagesize: int = pagesize ):
+    startingbefore = None
+    boundary = None
+    seen = set()
+    while True:
+        page = fetch( limit=pagesize, startingBefore=startingbefore )[key]
+        fresh = [ entry for entry in page if entry[idfield] not in seen and ( since is None or entry["createdAt"] >= since ) ]
+        if fresh:
+            yield fresh
+        if len( page ) < pagesize or since is not None and page[-1]["createdAt"] < since:
+            return
+        if page[-1]["createdAt"] == boundary and not fresh:
+            startingbefore = boundary
+            seen = set()
+            continue
+        if page[-1]["createdAt"] != boundary:
+            seen = set()
+        boundary = page[-1]["createdAt"]
+        seen.update( entry[idfield] for entry in page if entry["createdAt"] == boundary )
+        startingbefore = justafter( boundary )
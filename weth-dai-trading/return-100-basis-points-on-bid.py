@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
 import json
-import time
 from decimal import Decimal
 
 from dydx.client import Client
@@ -9,11 +8,16 @@ import dydx.constants as consts
 import dydx.util as utils
 
 from credentials import client
+from credentials import walletaddress
+from fillnotifier import FillNotifier
 
 
 # Define return on assets required
 requiredreturn = Decimal("1.01")
 
+# Subscribe to the orders channel before placing orders so that no fill is missed
+notifier = FillNotifier( walletaddress )
+
 # Get WETH-DAI market information
 market = client.get_market( market='WETH-DAI' )
 
@@ -48,17 +52,11 @@ jsondata = json.dumps( placed_bid, sort_keys=True, indent=4, separators=(',', ':
 print ( jsondata )
 
 
-while True:
-    # Give the bid placed five seconds to fill
-    time.sleep(5)
-
-    # Get fills created by my account for both sides of the orderbook
-    my_fills = client.get_my_fills(
-        market=['WETH-DAI'],
-        limit=1
-    )
-    if my_fills["fills"][0]["orderId"] == placed_bid["order"]["id"]:
-        break
+# Wait for the orders channel to push the fill of the bid
+filled_bid = notifier.waitforfill( placed_bid["order"]["id"] )
+if filled_bid["status"] != "FILLED":
+    print ( f'The bid {placed_bid["order"]["id"]} was {filled_bid["status"]}.' )
+    exit(0)
 
 # Place ask to close the position opened by the bid
 # that returns 100 basis points
@@ -11,12 +11,16 @@ import dydx.constants as consts
 import dydx.util as utils
 
 from logger import logger
+from logger import prettyjson
+from logger import LazyMessage
 from orderer import postbid
 from orderer import postask
 from messenger import smsalert
-from credentials import client
+from orderer import client
 from orderer import bestorders
-from creditcalculator import creditavailable
+from credentials import walletaddress
+from fillnotifier import FillNotifier
+from creditcalculator import CreditService
 
 
 # Define the return on assets and price drop (pricetrigger) required for bidding
@@ -50,6 +54,13 @@ quotetick = Decimal( markets["markets"]["WETH-DAI"]["minimumTickSize"] )
 # Defined dYdX market constant
 
 
+# Subscribe to the orders channel once so that fills are pushed as soon as they happen
+notifier = FillNotifier( walletaddress )
+
+# Cache the account balances between fills and read USDC prices from the live orderbooks of the same hub
+credit = CreditService( notifier.hub )
+
+
 # Start market maker
 while True:
     logger.info( f'Begin providing liquidity for those shorting ETH...' )
@@ -80,7 +91,7 @@ while True:
 
 
     # Get credit available
-    availablecredit = creditavailable( appliedleverage )
+    availablecredit = credit.available( appliedleverage )
 
 
     # Determine most competitive bid price and amount
@@ -109,8 +120,7 @@ while True:
         logger.critical("Exception occurred", exc_info=True)
 
     # Write the submission's response to the logs
-    jsondata = json.dumps( submission, sort_keys=True, indent=4, separators=(',', ': ') )
-    logger.debug ( f'Order submission:\n{jsondata}' )
+    logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
     # Report submission information via SMS
     smsalert( f'Bidding for {amount:.4f} ETH with {bideth*amount:.4f} DAI.' )
 
@@ -122,13 +132,15 @@ while True:
         topask = Decimal( prices[1] )
         topbid = Decimal( prices[0] )
         logger.debug( f'Bidding at {bideth:.4f} DAI/ETH. The highest bid now is {topbid:.4f} DAI/ETH and the cheapest ask is {topask:.4f} DAI/ETH.')
-        # Give the bid placed five seconds to fill
-        time.sleep(5)
-        # Check the status of the submitted bid
-        submittedbid = client.get_order( orderId=submission["order"]["id"] )
-        if submittedbid["order"]["status"] == "FILLED":
-            fillprice = Decimal( submittedbid["order"]["price"] )
-            bidnumber = submittedbid["order"]["id"]
+        # Give the bid placed up to five seconds to fill (the orders channel pushes the fill as soon as it happens)
+        submittedbid = notifier.waitforfill( submission["order"]["id"], timeout=5 )
+        if submittedbid is not None and submittedbid["status"] == "CANCELED":
+            logger.info ( f'Order {submittedbid["id"]} was CANCELED.' )
+            smsalert( f'Bid {submittedbid["id"]} was canceled.' )
+            exit(0)
+        if submittedbid is not None:
+            fillprice = Decimal( submittedbid["price"] )
+            bidnumber = submittedbid["id"]
             logger.info ( f'Order {bidnumber} was filled at: {fillprice:.4f} DAI/ETH.')
             smsalert( f'Bought {amount:.4f} ETH with {bideth*amount:.4f} DAI at {fillprice:.4f} DAI/ETH.')
             # End loop
@@ -151,8 +163,7 @@ while True:
         logger.critical("Exception occurred", exc_info=True)
 
     # Write the submission's response to the logs
-    jsondata = json.dumps( submission, sort_keys=True, indent=4, separators=(',', ': ') )
-    logger.debug ( f'Order submission:\n{jsondata}' )
+    logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
     # Report submission information via SMS
     smsalert( f'Asking {askprice*quantity:.4f} DAI for {quantity:.4f} ETH.' )
 
@@ -164,19 +175,21 @@ while True:
     logger.info( f'From this point forth, if the submitted ask is not filled and the price drops below {sellthreshold:.4f} DAI/ETH submit a stop limit order.')
     # Enter loop
     while True:
-        # Check the status of the submitted ask
-        submittedask = client.get_order( orderId=submission["order"]["id"] )
-        if submittedask["order"]["status"] == "FILLED":
-            fillprice = Decimal( submittedask["order"]["price"] )
-            asknumber = submittedask["order"]["id"]
+        # Wait up to five seconds for the orders channel to push the fill of the submitted ask
+        submittedask = notifier.waitforfill( submission["order"]["id"], timeout=5 )
+        if submittedask is not None and submittedask["status"] == "CANCELED":
+            logger.info ( f'Order {submittedask["id"]} was CANCELED.' )
+            smsalert( f'Ask {submittedask["id"]} was canceled.' )
+            exit(0)
+        if submittedask is not None:
+            fillprice = Decimal( submittedask["price"] )
+            asknumber = submittedask["id"]
             logger.info ( f'Order {asknumber} was filled at: {fillprice:.4f} DAI/ETH. Made {(fillprice-bideth)*amount:.4f} DAI.')
             smsalert( f'Sold {amount:.4f} ETH for {fillprice*amount:.4f} DAI at {fillprice:.4f} DAI/ETH. Made {(fillprice-bideth)*amount:.4f} DAI.')
             # Ask filled... End loop
             break
         else:
-            # Sleep
             # Then check price
-            time.sleep(5)
             prices = bestorders( 'WETH-DAI', quotetick )
             topask = Decimal( prices[1] )
             topbid = Decimal( prices[0] )
@@ -190,11 +203,10 @@ while True:
             if Decimal( prices[0] ) < Decimal( sellthreshold ):
                 logger.info ( f'The highest bid in the orderbook [{topbid:.4f} DAI/ETH] just fell below the stop limit [{sellthreshold:.4f} DAI/ETH]')
                 # Cancel the previously submitted ask first to avoid any undercapitalization errors.
-                logger.info ( "Cancelling order: %s", submittedask["order"]["id"] )
+                logger.info ( "Cancelling order: %s", submission["order"]["id"] )
                 canceledask = client.cancel_order( hash=submission["order"]["id"] )
                 # Display order cancel information
-                jsondata = json.dumps( canceledask, sort_keys=True, indent=4, separators=(',', ': ') )
-                logger.info ( jsondata )
+                logger.info ( '%s', LazyMessage( prettyjson, canceledask ) )
 
                 # Stop
                 try:
@@ -207,24 +219,20 @@ while True:
                     logger.critical("Exception occurred", exc_info=True)
 
                 # Write the submission's response to the logs
-                jsondata = json.dumps( submission, sort_keys=True, indent=4, separators=(',', ': ') )
-                logger.debug ( f'Order submission:\n{jsondata}' )
+                logger.debug ( 'Order submission:\n%s', LazyMessage( prettyjson, submission ) )
                 # Report submission information via SMS
                 smsalert( f'Asking {asketh*quantity:.4f} DAI for {quantity:.4f} ETH.' )
 
-                # Loop until the stop is filled
-                while True:
-                    # Give the stop placed five seconds to fill
-                    time.sleep(5)
-                    # Check the status of the submitted ask
-                    submittedask = client.get_order( orderId=submission["order"]["id"] )
-                    if submittedask["order"]["status"] == "FILLED":
-                        fillprice = Decimal( submittedask["order"]["price"] )
-                        asknumber = submittedask["order"]["id"]
-                        logger.info ( f'Order {asknumber} was filled at: {fillprice:.4f} DAI/ETH. Lost {(bideth-asketh)*amount:.4f} DAI.')
-                        smsalert( f'Sold {amount:.4f} ETH for {fillprice*amount:.4f} DAI at {fillprice:.4f} DAI/ETH. Lost {(bideth-fillprice)*amount:.4f} DAI.')
-                        # Stop filled... End loop.
-                        break
+                # Wait until the stop is filled
+                submittedask = notifier.waitforfill( submission["order"]["id"] )
+                if submittedask["status"] == "CANCELED":
+                    logger.info ( f'Order {submittedask["id"]} was CANCELED.' )
+                    smsalert( f'Stop {submittedask["id"]} was canceled.' )
+                    exit(0)
+                fillprice = Decimal( submittedask["price"] )
+                asknumber = submittedask["id"]
+                logger.info ( f'Order {asknumber} was filled at: {fillprice:.4f} DAI/ETH. Lost {(bideth-asketh)*amount:.4f} DAI.')
+                smsalert( f'Sold {amount:.4f} ETH for {fillprice*amount:.4f} DAI at {fillprice:.4f} DAI/ETH. Lost {(bideth-fillprice)*amount:.4f} DAI.')
 
 
     # Sleep
@@ -234,7 +242,7 @@ while True:
 
     # Withdraw DAI gains if any
     # Check dYdX DAI account balance
-    balances = client.eth.solo.get_my_balances()
+    balances = credit.accountbalances( maxage=0 )
     daifunds = Decimal( balances[consts.MARKET_DAI] / (10**consts.DECIMALS_DAI) )
     logger.info( f'The balance of DAI in the dYdX account is now {daifunds:.4f} DAI.' )
     # Since withdrawals go to the blockchain and need GAS, only withdrawal if gains exceed $2
@@ -244,6 +252,7 @@ while True:
         # Display deposit confirmation
         logger.info ( f'Depositing {daifunds:10.4f} DAI to the wallet associated with this dYdX account...' )
         receipt = client.eth.get_receipt( withdrawalhash )
+        credit.invalidate()
         web3out = Web3.toJSON( receipt )
         strings = str( web3out )
         dataout = json.loads( strings )
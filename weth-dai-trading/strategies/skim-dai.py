@@ -13,11 +13,15 @@ import dydx.constants as consts
 import dydx.util as utils
 
 from logger import logger
+from logger import prettyjson
+from logger import LazyMessage
 from orderer import postbid
-from orderer import postask
+from orderer import OrderLadder
 from messenger import smsalert
-from credentials import client
-from creditcalculator import creditavailable
+from orderer import client
+from credentials import walletaddress
+from websockethub import WebsocketHub
+from creditcalculator import CreditService
 from minimumaskmonitor import monitorminimumask
 from maximumbidmonitor import monitormaximumbid
 from orderfulfillmentvalidator import validateorderfulfillment
@@ -66,6 +70,16 @@ markets = client.get_markets()
 quotetick = Decimal( markets["markets"]["WETH-DAI"]["minimumTickSize"] )
 
 
+# Keep one websocket connection open across every phase of the strategy.
+# The WETH-DAI orderbook and the orders channel of the wallet stay subscribed between phases.
+hub = WebsocketHub()
+hub.start()
+hub.call( hub.orders( walletaddress ) )
+
+# Cache the account balances between fills and read USDC prices from the live orderbooks of the hub.
+credit = CreditService( hub )
+
+
 # Start market maker
 while True:
     # Check if this is the first iteration of a complete bid-ask loop.
@@ -73,14 +87,14 @@ while True:
     logger.info( f'Begin providing liquidity for those shorting ETH...' )
     logger.info ( f'Monitor the minimum ask in orderbook channel in a websocket loop...' )
     # Loop until the lowest ask rises above or drops below the market loss or market gain price.
-    bideth = asyncio.run( monitorminimumask( '0', marketloss, '0', marketgain ) )
+    bideth = hub.call( monitorminimumask( '0', marketloss, '0', marketgain, quotetick=quotetick, hub=hub ) )
 
     while True:
         # Set the bid to be a quotetick below the lowest ask.
         bideth = Decimal(bideth) - Decimal(quotetick)
 
         # Get credit available.
-        availablecredit = creditavailable( appliedleverage )
+        availablecredit = credit.available( appliedleverage )
 
         # Determine most competitive bid price and amount.
         # Make the determination based on the debt remaining and present market values.
@@ -106,13 +120,13 @@ while True:
             smsalert( f'Bidding for {amount:.4f} ETH with {bideth*amount:.4f} DAI.' )
             # Check on order fulfillment and loop until the bid is filled.
             orderdetails = client.get_order( orderId=submission["order"]["id"] )
-            logger.info ( f'Determining status of:\n{json.dumps( orderdetails, sort_keys=True, indent=4, separators=(",", ": ") )}')
+            logger.info ( 'Determining status of:\n%s', LazyMessage( prettyjson, orderdetails ) )
             # If canceled, try again.
             if orderdetails["order"]["status"] == "CANCELED":
                 logger.info ( f'Bid order {submission["order"]["id"]} was "CANCELED". Retrying...')
                 # There is no need to wait for the trigger again.
                 # Simply get the best bid in the orderbook and retry ask.
-                bideth = asyncio.run( monitorminimumask( '0', '0', '0', '0' ) )
+                bideth = hub.call( monitorminimumask( '0', '0', '0', '0', quotetick=quotetick, hub=hub ) )
                 continue
             elif orderdetails["order"]["status"] == "FILLED":
                 logger.info ( f'Bid order {submission["order"]["id"]} was filled at: {submission["order"]["price"]} DAI/ETH.')
@@ -120,12 +134,12 @@ while True:
                 # Exit loop.
                 break
             else:
-                orderstate = asyncio.run( validateorderfulfillment( submission["order"]["id"] ) )
+                orderstate = hub.call( validateorderfulfillment( submission["order"]["id"], hub=hub ) )
                 if orderstate == "CANCELED":
                     logger.info ( f'Bid order {submission["order"]["id"]} was "CANCELED". Retrying...')
                     # There is no need to wait for the trigger again.
                     # Simply get the best bid in the orderbook and retry ask.
-                    bideth = asyncio.run( monitorminimumask( '0', '0', '0', '0' ) )
+                    bideth = hub.call( monitorminimumask( '0', '0', '0', '0', quotetick=quotetick, hub=hub ) )
                     continue
                 elif orderstate == "FILLED":
                     logger.info ( f'Bid order {submission["order"]["id"]} was filled at: {submission["order"]["price"]} DAI/ETH.')
@@ -136,14 +150,17 @@ while True:
 
     # Loop until the lowest ask exceeds the trigger price or falls below the stop.
     askroa = Decimal(bideth) * ( 1 + Decimal(minimumroa) )
-    asketh = asyncio.run( monitormaximumbid( askroa, exitlosses, '0', '0' ) )
+    # Sign asks for the prices around the highest bid while the monitor waits, so only a prepared ask is sent once the exit triggers.
+    ladder = OrderLadder( consts.SIDE_SELL, amount, quotetick )
+    ladder.start( hub )
+    asketh = hub.call( monitormaximumbid( askroa, exitlosses, '0', '0', quotetick=quotetick, hub=hub ) )
 
     while True:
         # Set the ask to be a quotetick below the highest bid.
         asketh = Decimal(asketh) + Decimal(quotetick)
 
         # Ask.
-        submission = postask( asketh.quantize( quotetick ), amount )
+        submission = ladder.post( asketh.quantize( quotetick ) )
         if submission == 'ERROR':
             # Report submission error via SMS.
             smsalert( f'Ask submission error.')
@@ -153,13 +170,13 @@ while True:
             smsalert( f'Asking {asketh*amount:.4f} DAI for {amount:.4f} ETH.')
             # Check on order fulfillment and loop until the ask is filled.
             orderdetails = client.get_order( orderId=submission["order"]["id"] )
-            logger.info ( f'Determining status of:\n{json.dumps( orderdetails, sort_keys=True, indent=4, separators=(",", ": ") )}')
+            logger.info ( 'Determining status of:\n%s', LazyMessage( prettyjson, orderdetails ) )
             # If canceled, try again.
             if orderdetails["order"]["status"] == "CANCELED":
                 logger.info ( f'Ask order {submission["order"]["id"]} was "CANCELED". Retrying...')
                 # There is no need to wait for the trigger again.
                 # Simply get the best bid in the orderbook and retry ask.
-                asketh = asyncio.run( monitormaximumbid( '0', '0', '0', '0' ) )
+                asketh = hub.call( monitormaximumbid( '0', '0', '0', '0', quotetick=quotetick, hub=hub ) )
                 continue
             elif orderdetails["order"]["status"] == "FILLED":
                 askreturn = ( Decimal( submission["order"]["price"] ) - bideth ) * amount
@@ -172,12 +189,12 @@ while True:
                 # Exit loop.
                 break
             else:
-                orderstate = asyncio.run( validateorderfulfillment( submission["order"]["id"] ) )
+                orderstate = hub.call( validateorderfulfillment( submission["order"]["id"], hub=hub ) )
                 if orderstate == "CANCELED":
                     logger.info ( f'Ask order {submission["order"]["id"]} was "CANCELED". Retrying...')
                     # There is no need to wait for the trigger again.
                     # Simply get the best bid in the orderbook and retry ask.
-                    asketh = asyncio.run( monitormaximumbid( '0', '0', '0', '0' ) )
+                    asketh = hub.call( monitormaximumbid( '0', '0', '0', '0', quotetick=quotetick, hub=hub ) )
                     continue
                 elif orderstate == "FILLED":
                     askreturn = ( Decimal( submission["order"]["price"] ) - bideth ) * amount
@@ -189,6 +206,8 @@ while True:
                     if Decimal(asketh) < Decimal(bideth): sys.exit(0)
                     # Exit loop.
                     break
+    ladder.stop()
+    logger.debug( f'Asks sent from the ladder: {ladder.hits} prepared, {ladder.misses} signed on the spot.' )
 
 
     # Sleep
@@ -200,7 +219,7 @@ while True:
 
     # Withdraw DAI gains if any
     # Check dYdX DAI account balance
-    balances = client.eth.solo.get_my_balances()
+    balances = credit.accountbalances( maxage=0 )
     daifunds = Decimal( balances[consts.MARKET_DAI] / (10**consts.DECIMALS_DAI) )
     logger.info( f'The balance of DAI in the dYdX account is now {daifunds:.4f} DAI.' )
     # Since withdrawals go to the blockchain and need GAS, only withdrawal if gains exceed $2
@@ -215,6 +234,7 @@ while True:
         # Display deposit confirmation
         logger.info ( f'Depositing {daifunds:10.4f} DAI to the wallet associated with this dYdX account...' )
         receipt = client.eth.get_receipt( withdrawalhash )
+        credit.invalidate()
         web3out = Web3.toJSON( receipt )
         strings = str( web3out )
         dataout = json.loads( strings )
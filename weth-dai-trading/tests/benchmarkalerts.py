@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+
+import messenger
+from messenger import LogSink
+from messenger import smsalert
+from messenger import AlertQueue
+
+
+# Stand in for SNS with a sink as slow as the delay specified (in seconds).
+class SlowSink( LogSink ):
+
+    def __init__( self, delay: float ):
+        super().__init__()
+        self.delay = delay
+
+    def send( self, message: str ) -> None:
+        time.sleep( self.delay )
+        super().send( message )
+
+
+# Raise the alerts of a reconnection storm (the same few alerts many times) and time the calls to smsalert.
+# Then flush the queue and print the messages the sink received.
+delay = float( sys.argv[1] ) if len( sys.argv ) > 1 else 0.5
+count = int( sys.argv[2] ) if len( sys.argv ) > 2 else 1000
+sink = SlowSink( delay )
+messenger.alerts = AlertQueue( sink, batchwindow=0.2, sendinterval=1, dedupeperiod=60 )
+
+start = time.perf_counter()
+for attempt in range( count ):
+    smsalert( 'Unable to reconnect to the WETH-DAI orderbook after 5 attempts.' )
+    if attempt % 100 == 0:
+        smsalert( f'Bid submission error.' )
+elapsed = time.perf_counter() - start
+print ( f'{count + count // 100} alerts raised in {elapsed*1000:.1f} ms ({elapsed / count * 1000000:.1f} µs per call) with a {delay*1000:.0f} ms sink.' )
+
+time.sleep( 2 )
+for attempt in range( 10 ):
+    smsalert( 'Unable to reconnect to the WETH-DAI orderbook after 5 attempts.' )
+messenger.alerts.flush()
+print ( f'{len( sink.messages )} messages sent:' )
+for message in sink.messages:
+    print ( f'---\n{message}' )
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+from decimal import Decimal
+
+import dydx.constants as consts
+
+import batchorders
+from orderer import client
+from orderer import postonlyorder
+from batchorders import cancelall
+from batchorders import placeladder
+from mockexchange import MockExchange
+
+
+# Compare placing and canceling a ladder of orders one at a time with the batch operations, for the client in credentials.py.
+# Point credentials.py at the mock exchange started here (client = MockClient( 'http://localhost:8080' )).
+latency = float( sys.argv[1] ) if len( sys.argv ) > 1 else 0.05
+size = int( sys.argv[2] ) if len( sys.argv ) > 2 else 10
+exchange = MockExchange( restport=8080, websocketport=8765, latency=latency, interval=0 )
+exchange.start()
+# Lift the rate limit so that the time measured is the round trips alone.
+batchorders.ratelimit = batchorders.RateLimit( 1000, 1000 )
+prices = [ Decimal( '150' ) + Decimal( '0.01' ) * tick for tick in range( size ) ]
+quantity = Decimal( '0.1' )
+
+start = time.perf_counter()
+placed = [ client.place_order( **postonlyorder( consts.SIDE_BUY, price, quantity ) ) for price in prices ]
+sequentialplacement = time.perf_counter() - start
+start = time.perf_counter()
+for order in placed:
+    client.cancel_order( hash=order["order"]["id"] )
+sequentialcancellation = time.perf_counter() - start
+
+batchplacement = placeladder( consts.SIDE_BUY, prices, quantity ).elapsed
+batchcancellation = cancelall( consts.PAIR_WETH_DAI, consts.SIDE_BUY ).elapsed
+exchange.stop()
+
+print ( f'{size} orders with a {latency*1000:.0f} ms round trip' )
+print ( f'{"":>14} {"sequential ms":>14} {"batch ms":>10}' )
+print ( f'{"place":>14} {sequentialplacement*1000:>14.1f} {batchplacement*1000:>10.1f}' )
+print ( f'{"cancel":>14} {sequentialcancellation*1000:>14.1f} {batchcancellation*1000:>10.1f}' )
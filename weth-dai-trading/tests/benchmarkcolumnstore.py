@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+import numpy as np
+
+from columnstore import ColumnStore
+from columnstore import pnl
+from columnstore import slippage
+
+
+fillcount = int( sys.argv[1] ) if len( sys.argv ) > 1 else 200000
+tickcount = int( sys.argv[2] ) if len( sys.argv ) > 2 else 5000000
+directory = tempfile.mkdtemp( prefix='columnstore' )
+store = ColumnStore( directory )
+end = time.time()
+start = end - 365 * 86400
+
+# A year of top-of-book ticks (a random walk around 200 DAI/ETH) and fills of the account, written a day at a time.
+random.seed( 1 )
+np.random.seed( 1 )
+ticktimes = np.sort( np.random.uniform( start, end, tickcount ) )
+mids = 200 * np.exp( np.cumsum( np.random.normal( 0, 0.0004, tickcount ) ) )
+filltimes = np.sort( np.random.uniform( start + 3600, end, fillcount ) )
+began = time.perf_counter()
+for day in range( 365 ):
+    selected = ( ticktimes >= start + day * 86400 ) & ( ticktimes < start + ( day + 1 ) * 86400 )
+    store.append( "ticks", 'WETH-DAI', list( zip( ( ticktimes[selected] * 1000000 ).astype( np.int64 ).tolist(), ( mids[selected] - 0.05 ).tolist(), ( mids[selected] + 0.05 ).tolist() ) ) )
+tickseconds = time.perf_counter() - began
+fills = []
+for number, filltime in enumerate( filltimes ):
+    side = random.choice( ( 1, -1 ) )
+    mid = mids[max( np.searchsorted( ticktimes, filltime, side='right' ) - 1, 0 )]
+    fills.append( ( int( filltime * 1000000 ), side, float( mid + side * random.uniform( -0.02, 0.1 ) ), random.uniform( 0.1, 2 ), 0.0, f'0x{number:064x}'.encode(), f'{number:036d}'.encode() ) )
+began = time.perf_counter()
+for day in range( 0, len( fills ), 1000 ):
+    store.append( "fills", 'WETH-DAI', fills[day:day + 1000] )
+fillseconds = time.perf_counter() - began
+print ( f'stored {tickcount:,} ticks in {tickseconds:.1f} s and {fillcount:,} fills in {fillseconds:.1f} s' )
+
+# Year-long P&L and slippage as vectorized scans of the store.
+began = time.perf_counter()
+profitandloss = pnl( store, 'WETH-DAI', start, end )
+pnlseconds = time.perf_counter() - began
+began = time.perf_counter()
+slippages = slippage( store, 'WETH-DAI', start, end )
+slippageseconds = time.perf_counter() - began
+print ( f'P&L of {profitandloss["fills"]:,} fills in {pnlseconds*1000:.0f} ms: {profitandloss["pnl"]:,.2f} DAI (position {profitandloss["position"]:.4f} ETH)' )
+print ( f'slippage of {slippages["fills"]:,} fills against {tickcount:,} ticks in {slippageseconds*1000:.0f} ms: mean {slippages["mean"]:.2f} bp, p99 {slippages["p99"]:.2f} bp' )
+
+# The same P&L computed document by document (as from the trade history collection).
+documents = [ { "createdAt": timestamp, "side": "BUY" if side == 1 else "SELL", "price": str( price ), "amount": str( int( amount * 10**18 ) ) } for timestamp, side, price, amount, fee, orderid, uuid in fills ]
+began = time.perf_counter()
+position = cashflow = 0
+for document in documents:
+    direction = 1 if document["side"] == "BUY" else -1
+    amount = int( document["amount"] ) / 10**18
+    position += direction * amount
+    cashflow -= direction * amount * float( document["price"] )
+print ( f'P&L document by document in {( time.perf_counter() - began )*1000:.0f} ms (position {position:.4f} ETH)' )
+shutil.rmtree( directory )
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+
+import os
+import sys
+import time
+import logging
+import tempfile
+
+from logger import prettyjson
+from journal import Journal
+from journal import readjournal
+
+
+# A filled order as returned by dYdX (the order every event of the benchmark refers to, with its own id).
+def order( number: int, status: str ) -> dict:
+    return {
+        "id": f'0x{number:064x}',
+        "uuid": 'a2bbc1be-3a56-4e62-b5b3-3a0d1bdcd5f6',
+        "market": 'WETH-DAI',
+        "side": 'BUY' if number % 2 else 'SELL',
+        "type": 'LIMIT',
+        "price": '200.01',
+        "amount": '1000000000000000000',
+        "filledAmount": '1000000000000000000' if status == 'FILLED' else '0',
+        "status": status,
+        "accountOwner": '0x0913017c740260fea4b2c62828a4008ca8b0d6e4',
+        "createdAt": '2020-07-14T18:07:02.129Z',
+        "expiresAt": '2020-08-14T18:07:02.000Z'
+    }
+
+
+count = int( sys.argv[1] ) if len( sys.argv ) > 1 else 20000
+directory = tempfile.mkdtemp( prefix='journal' )
+
+# The previous record of the same events: the order submissions and fills pretty printed to a text log.
+textlog = os.path.join( directory, 'events.out' )
+textlogger = logging.getLogger( 'benchmarkjournal' )
+textlogger.propagate = False
+texthandler = logging.FileHandler( textlog )
+texthandler.setFormatter( logging.Formatter( '%(asctime)s PID[%(process)d]:  %(levelname)-8s [%(name)-11s] %(message)s' ) )
+textlogger.addHandler( texthandler )
+textlogger.setLevel( logging.DEBUG )
+start = time.perf_counter()
+for number in range( count ):
+    textlogger.debug( 'Order submission:\n%s', prettyjson( { "order": order( number, 'OPEN' ) } ) )
+    textlogger.debug( 'Order update:\n%s', prettyjson( order( number, 'FILLED' ) ) )
+textseconds = time.perf_counter() - start
+texthandler.close()
+
+# The journal of the same events, in small segments so reading by order id can skip most of them.
+journal = Journal( os.path.join( directory, 'journal' ), 'benchmark', segmentbytes=1024 * 1024 )
+start = time.perf_counter()
+for number in range( count ):
+    submission = order( number, 'OPEN' )
+    journal.record( "order", orderid=submission["id"], market=submission["market"], side=submission["side"], price=submission["price"], amount=submission["amount"], status=submission["status"] )
+    fill = order( number, 'FILLED' )
+    journal.record( "fill", orderid=fill["id"], side=fill["side"], price=fill["price"], amount=fill["amount"], filledamount=fill["filledAmount"], status=fill["status"] )
+journalseconds = time.perf_counter() - start
+journal.close( 60 )
+journalwritten = time.perf_counter() - start
+
+journalbytes = sum( entry.stat().st_size for entry in os.scandir( journal.directory ) )
+segments = len( [ name for name in os.listdir( journal.directory ) if name.endswith( '.jsonl.gz' ) ] )
+print ( f'{2*count} events: text log {os.path.getsize( textlog )/1024/1024:.1f} MB, journal {journalbytes/1024/1024:.2f} MB in {segments} segments' )
+print ( f'time per event in the calling thread: text log {textseconds/count/2*1000000:.1f} µs, journal {journalseconds/count/2*1000000:.1f} µs (written in {journalwritten:.2f} s)' )
+
+# Read every record, then the records of one order with and without the index.
+start = time.perf_counter()
+records = sum( 1 for entry in readjournal( journal.directory ) )
+print ( f'read {records} records in {( time.perf_counter() - start )*1000:.0f} ms' )
+orderid = f'0x{count // 2:064x}'
+start = time.perf_counter()
+found = list( readjournal( journal.directory, orderid=orderid ) )
+indexed = time.perf_counter() - start
+os.rename( os.path.join( journal.directory, 'index.jsonl' ), os.path.join( journal.directory, 'index.jsonl.off' ) )
+start = time.perf_counter()
+scanned = list( readjournal( journal.directory, orderid=orderid ) )
+print ( f'{len( found )} records of order ...{orderid[-6:]}: {indexed*1000:.1f} ms with the index, {( time.perf_counter() - start )*1000:.1f} ms scanning every segment' )
+assert found == scanned
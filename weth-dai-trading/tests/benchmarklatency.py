@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+import random
+from decimal import Decimal
+
+import latency
+from latency import TimedClient
+from latency import LatencyHistogram
+from mockexchange import MockClient
+from mockexchange import MockExchange
+
+
+# Return the percentile specified of a list of latencies in seconds (the value a sorted list of every sample gives).
+def percentile( latencies, fraction ):
+    ordered = sorted( latencies )
+    return ordered[ max( 0, min( len( ordered ), int( fraction * len( ordered ) + 0.999999 ) ) - 1 ) ]
+
+
+# Compare the percentiles of a histogram with those of every sample kept, and time recording a sample.
+random.seed( 0 )
+samples = [ random.lognormvariate( -5, 1 ) for _ in range( 200000 ) ]
+histogram = LatencyHistogram()
+start = time.perf_counter()
+for sample in samples:
+    histogram.record( sample )
+elapsed = time.perf_counter() - start
+print ( f'{"quantile":>9} {"samples ms":>11} {"histogram ms":>13} {"error %":>8}' )
+for fraction in ( 0.5, 0.9, 0.99, 0.999 ):
+    exact = percentile( samples, fraction )
+    approximate = histogram.percentile( fraction )
+    print ( f'{fraction:>9} {exact*1000:>11.3f} {approximate*1000:>13.3f} {( approximate - exact ) / exact * 100:>8.2f}' )
+print ( f'{len( histogram.counts )} buckets, {elapsed / len( samples ) * 1000000:.2f} µs per sample recorded.\n' )
+
+
+# Place, fill, look up and cancel orders on the mock exchange through a TimedClient, then dump the histograms to the file specified.
+count = int( sys.argv[1] ) if len( sys.argv ) > 1 else 100
+path = sys.argv[2] if len( sys.argv ) > 2 else '/tmp/benchmarklatency.prom'
+exchange = MockExchange( restport=8092, websocketport=8797, latency=0.005, interval=0 )
+exchange.start()
+maker = TimedClient( MockClient( exchange.apiurl ) )
+taker = MockClient( exchange.apiurl, public_address='0x' + '2' * 40 )
+# Bid one tick above the best bid of the mock market maker, so the asks of the taker fill the bid.
+price = Decimal( maker.get_orderbook( 'WETH-DAI' )["bids"][0]["price"] ) + Decimal( '0.01' )
+
+for ordernumber in range( count ):
+    latency.triggered()
+    bid = maker.place_order( 'WETH-DAI', 'BUY', 10**17, price, postOnly=True )
+    if ordernumber % 2:
+        maker.cancel_order( hash=bid["order"]["id"] )
+    else:
+        taker.place_order( 'WETH-DAI', 'SELL', 10**17, price )
+        maker.get_order( orderId=bid["order"]["id"] )
+
+latency.dump( path )
+exchange.stop()
+with open( path ) as latencies:
+    print ( latencies.read() )
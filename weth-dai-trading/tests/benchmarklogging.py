@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+import logging
+from decimal import Decimal
+
+import logger as logsetup
+from logger import logger
+
+
+# Log count monitor updates (the message the trailing monitors write for every orderbook update).
+def fstringupdates( tradelogger, count ):
+    lowerlimit, upperlimit, maximumbid = Decimal( '198.0123' ), Decimal( 'Infinity' ), Decimal( '200.01' )
+    for messageid in range( count ):
+        tradelogger.debug( f'updated information received... [lower price bound / upper price bound : {lowerlimit:.2f}/{upperlimit:.2f} DAI/ETH] the highest bid in the orderbook is: {maximumbid:.2f} DAI/ETH [Message ID: {messageid}].' )
+
+
+def lazyupdates( tradelogger, count ):
+    lowerlimit, upperlimit, maximumbid = Decimal( '198.0123' ), Decimal( 'Infinity' ), Decimal( '200.01' )
+    for messageid in range( count ):
+        tradelogger.debug( 'updated information received... [lower price bound / upper price bound : %.2f/%.2f DAI/ETH] the highest bid in the orderbook is: %.2f DAI/ETH [Message ID: %s].', lowerlimit, upperlimit, maximumbid, messageid )
+
+
+# Wait until the listener thread has written every record queued.
+def drain():
+    while not logsetup.logqueue.empty():
+        time.sleep( 0.001 )
+
+
+# Return the time spent in the calling thread per message (in microseconds) and the messages written per second.
+# The listener is paused while the messages are logged, so the time per call is that of the hot path alone (as between bursts of updates).
+def measure( updates, tradelogger, count, queued ):
+    if queued:
+        logsetup.loglistener.stop()
+    start = time.perf_counter()
+    updates( tradelogger, count )
+    calls = time.perf_counter() - start
+    if queued:
+        logsetup.loglistener.start()
+        start = time.perf_counter()
+        drain()
+        return calls / count * 1000000, count / ( time.perf_counter() - start ) if tradelogger.isEnabledFor( logging.DEBUG ) else float( 'nan' )
+    return calls / count * 1000000, count / calls
+
+
+count = int( sys.argv[1] ) if len( sys.argv ) > 1 else 50000
+
+# The previous setup: the handlers write from the calling thread.
+synchronouslogger = logging.getLogger( 'synchronouslogger' )
+synchronouslogger.setLevel( logging.DEBUG )
+synchronouslogger.propagate = False
+for handler in ( logsetup.consolehandler, logsetup.fileouthandler, logsetup.fileerrhandler ):
+    synchronouslogger.addHandler( handler )
+
+print ( f'{"setup":>40} {"µs per call":>12} {"messages/sec":>13}' )
+for name, updates, tradelogger, level, queued in (
+        ( 'synchronous handlers, f-string', fstringupdates, synchronouslogger, logging.DEBUG, False ),
+        ( 'queue, f-string', fstringupdates, logger, logging.DEBUG, True ),
+        ( 'queue, %-style', lazyupdates, logger, logging.DEBUG, True ),
+        ( 'DEBUG disabled, f-string', fstringupdates, logger, logging.INFO, True ),
+        ( 'DEBUG disabled, %-style', lazyupdates, logger, logging.INFO, True ),
+    ):
+    tradelogger.setLevel( level )
+    percall, rate = measure( updates, tradelogger, count, queued )
+    print ( f'{name:>40} {percall:>12.2f} {rate:>13,.0f}' )
+logger.setLevel( logging.DEBUG )
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+
+import sys
+import json
+import time
+import random
+import uuid
+
+from orderbookfeed import OrderBookFeed
+from framereplayer import loadframes
+from messagedecoder import decodeorderbookmessage
+
+
+# Generate orderbook channel frames in the format sent by dYdX (a snapshot followed by updates).
+def syntheticframes( count, depth=500 ):
+    def order( side ):
+        price = 200 + random.randint( -500, 500 ) / 100
+        return { "id": '0x' + uuid.uuid4().hex * 2, "uuid": str( uuid.uuid4() ), "price": f'{price:.2f}', "amount": str( random.randint( 10**16, 10**20 ) ) }
+    snapshot = {
+        "type": "subscribed",
+        "connection_id": str( uuid.uuid4() ),
+        "message_id": 1,
+        "channel": "orderbook",
+        "id": "WETH-DAI",
+        "contents": {
+            "bids": [ order( "BUY" ) for _ in range( depth ) ],
+            "asks": [ order( "SELL" ) for _ in range( depth ) ]
+        }
+    }
+    frames = [ json.dumps( snapshot ) ]
+    for messageid in range( 2, count + 1 ):
+        side = random.choice( ( "BUY", "SELL" ) )
+        updatedata = order( side )
+        updatedata.update( { "side": side, "type": random.choice( ( "NEW", "REMOVED", "UPDATED" ) ) } )
+        frames.append( json.dumps( {
+            "type": "channel_data",
+            "connection_id": snapshot["connection_id"],
+            "message_id": messageid,
+            "channel": "orderbook",
+            "id": "WETH-DAI",
+            "contents": { "updates": [ updatedata ] }
+        } ) )
+    return frames
+
+
+# Return the decoding cost per frame in microseconds.
+def costperframe( decode, frames ):
+    start = time.perf_counter()
+    for textoutput in frames:
+        decode( textoutput )
+    return ( time.perf_counter() - start ) / len( frames ) * 1e6
+
+
+# Return the cost per frame in microseconds of decoding and applying every frame to a feed (as OrderBookFeed.consume does).
+def feedcostperframe( decode, frames, sides ):
+    feed = OrderBookFeed( 'WETH-DAI', '0.01', sides )
+    start = time.perf_counter()
+    for textoutput in frames:
+        feed.handle( decode( textoutput ) )
+    return ( time.perf_counter() - start ) / len( frames ) * 1e6
+
+
+# Use the orderbook frames of a recording made by framerecorder.py if one is specified, otherwise synthetic frames.
+if len( sys.argv ) > 1:
+    frames = [ textoutput for receivetime, textoutput in loadframes( sys.argv[1] ) if '"orderbook"' in textoutput ]
+else:
+    random.seed( 0 )
+    frames = syntheticframes( 20000 )
+
+# Confirm that the decoder keeps every update of the side requested.
+for textoutput in frames[1:]:
+    expected = [ u for u in json.loads( textoutput ).get( "contents", {} ).get( "updates", [] ) if u["side"] == "BUY" ]
+    assert decodeorderbookmessage( textoutput, ( "BUY", ) )["contents"]["updates"] == expected
+
+bothsides = ( "BUY", "SELL" )
+bidsonly = ( "BUY", )
+print ( f'{"decoder":>36} {"decode microseconds/frame":>26} {"decode+apply microseconds/frame":>32}' )
+for name, decode, sides in (
+        ( 'json.loads', json.loads, bothsides ),
+        ( 'decodeorderbookmessage (both sides)', lambda textoutput: decodeorderbookmessage( textoutput, bothsides ), bothsides ),
+        ( 'decodeorderbookmessage (bids only)', lambda textoutput: decodeorderbookmessage( textoutput, bidsonly ), bidsonly )
+    ):
+    print ( f'{name:>36} {costperframe( decode, frames ):>26.2f} {feedcostperframe( decode, frames, sides ):>32.2f}' )
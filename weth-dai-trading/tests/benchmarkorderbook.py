@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+
+import time
+import random
+from decimal import Decimal
+
+from orderbook import OrderBook
+
+
+# Build a synthetic WETH-DAI bid snapshot with the orderbook size specified.
+# Prices sit on a 0.01 DAI tick between 150 and 250 DAI/ETH.
+def snapshot( size ):
+    return [
+        {
+            "id": f'0x{ordernumber:064x}',
+            "uuid": "",
+            "amount": str( random.randint( 1, 100 ) * 10**17 ),
+            "price": f'{random.randint( 15000, 25000 ) / 100:.2f}',
+        }
+        for ordernumber in range( size )
+    ]
+
+
+# Generate a stream of update entries that keeps the orderbook size roughly constant.
+def updatestream( orders, count ):
+    resting = [ order["id"] for order in orders ]
+    ordernumber = len( resting )
+    updates = []
+    for _ in range( count ):
+        choice = random.random()
+        if choice < 0.4:
+            ordernumber += 1
+            orderid = f'0x{ordernumber:064x}'
+            resting.append( orderid )
+            updates.append( { "type": "NEW", "id": orderid, "side": "BUY", "amount": "1000000000000000000", "price": f'{random.randint( 15000, 25000 ) / 100:.2f}' } )
+        elif choice < 0.8:
+            orderid = resting.pop( random.randrange( len( resting ) ) )
+            updates.append( { "type": "REMOVED", "id": orderid, "side": "BUY" } )
+        else:
+            orderid = random.choice( resting )
+            updates.append( { "type": "UPDATED", "id": orderid, "side": "BUY", "amount": "500000000000000000" } )
+    return updates
+
+
+# Replicate the list-of-dicts bookkeeping the monitors used before the OrderBook class.
+def listupdates( orders, updates ):
+    marketdata = list( orders )
+    for updatedata in updates:
+        if updatedata["type"] == "NEW":
+            marketdata.append( { "id": updatedata["id"], "uuid": "", "amount": updatedata["amount"], "price": updatedata["price"] } )
+        if updatedata["type"] == "REMOVED":
+            marketdata = list( filter( lambda i: i["id"] != updatedata["id"], marketdata ) )
+        bidranking = [ Decimal( order["price"] ) for order in marketdata ]
+        maximumbid = max( bidranking )
+    return maximumbid
+
+
+# Apply the same updates to the indexed OrderBook.
+def orderbookupdates( marketdata, updates ):
+    for updatedata in updates:
+        marketdata.apply( updatedata )
+        maximumbid = marketdata.bestbid()
+    return maximumbid
+
+
+random.seed( 0 )
+print ( f'{"orders":>8} {"list updates/sec":>18} {"OrderBook updates/sec":>23}' )
+for size in ( 100, 1000, 10000, 100000 ):
+    orders = snapshot( size )
+    # Keep the list baseline to a sensible duration on large orderbooks.
+    listcount = max( 20, 200000 // size )
+    updates = updatestream( orders, 20000 )
+
+    start = time.perf_counter()
+    listupdates( orders, updates[:listcount] )
+    listrate = listcount / ( time.perf_counter() - start )
+
+    marketdata = OrderBook()
+    marketdata.load( { "bids": orders }, sides=( "BUY", ) )
+    start = time.perf_counter()
+    orderbookupdates( marketdata, updates )
+    bookrate = len( updates ) / ( time.perf_counter() - start )
+
+    print ( f'{size:>8} {listrate:>18,.0f} {bookrate:>23,.0f}' )
+
+
+# Walk the bids from the highest price to compute the average and worst price to fill an amount (as a strategy would from a REST orderbook).
+def walkfillprices( orders, amount ):
+    remaining = Decimal( amount )
+    filledvalue = Decimal( 0 )
+    for order in sorted( orders, key=lambda order: Decimal( order["price"] ), reverse=True ):
+        filled = min( remaining, Decimal( order["amount"] ) )
+        filledvalue += filled * Decimal( order["price"] )
+        remaining -= filled
+        if not remaining:
+            return ( filledvalue / Decimal( amount ), Decimal( order["price"] ) )
+    return None
+
+
+# Time depth queries: walking the orderbook, querying an unchanged OrderBook and querying it after every update (both read its LevelTree).
+print ( f'\n{"orders":>8} {"walk queries/sec":>18} {"tree queries/sec":>20} {"update+query/sec":>18}' )
+for size in ( 100, 1000, 10000 ):
+    orders = snapshot( size )
+    amounts = [ random.randint( 1, size ) * 10**18 for _ in range( 1000 ) ]
+    marketdata = OrderBook( '0.01' )
+    marketdata.load( { "bids": orders }, sides=( "BUY", ) )
+    for amount in amounts[:20]:
+        assert walkfillprices( orders, amount ) == marketdata.fillprices( "BUY", amount )
+
+    walkcount = max( 5, 20000 // size )
+    start = time.perf_counter()
+    for amount in amounts[:walkcount]:
+        walkfillprices( orders, amount )
+    walkrate = walkcount / ( time.perf_counter() - start )
+
+    start = time.perf_counter()
+    for amount in amounts:
+        marketdata.fillprices( "BUY", amount )
+    treerate = len( amounts ) / ( time.perf_counter() - start )
+
+    updates = updatestream( orders, walkcount )
+    start = time.perf_counter()
+    for updatedata, amount in zip( updates, amounts ):
+        marketdata.apply( updatedata )
+        marketdata.fillprices( "BUY", amount )
+    rebuildrate = len( updates ) / ( time.perf_counter() - start )
+
+    print ( f'{size:>8} {walkrate:>18,.0f} {treerate:>20,.0f} {rebuildrate:>18,.0f}' )
+
+
+# Time adding and dropping price levels on wide orderbooks (orders spread over as many ticks as there are orders, so most updates add or drop a level).
+print ( f'\n{"orders":>8} {"level updates/sec":>19}' )
+for size in ( 10000, 100000, 1000000 ):
+    marketdata = OrderBook( '0.01' )
+    for ordernumber in range( size ):
+        marketdata.insert( f'0x{ordernumber:064x}', "BUY", f'{random.randint( 1, size ) / 100:.2f}', "1000000000000000000" )
+    count = 50000
+    prices = [ f'{random.randint( 1, size ) / 100:.2f}' for _ in range( count ) ]
+    start = time.perf_counter()
+    for ordernumber, price in enumerate( prices ):
+        marketdata.insert( f'0x{size + ordernumber:064x}', "BUY", price, "1000000000000000000" )
+        marketdata.remove( f'0x{ordernumber:064x}' )
+        marketdata.bestbid()
+    print ( f'{size:>8} {count / ( time.perf_counter() - start ):>19,.0f}' )
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+import asyncio
+from decimal import Decimal
+
+from asyncclient import AsyncClient
+from mockexchange import MockClient
+from mockexchange import MockExchange
+
+
+# Return the percentile specified of a list of latencies in milliseconds.
+def percentile( latencies, fraction ):
+    ordered = sorted( latencies )
+    return ordered[ min( len( ordered ) - 1, int( fraction * len( ordered ) ) ) ] * 1000
+
+
+# Measure how late a 1 ms tick of the event loop runs (the delay a websocket message would wait before being handled).
+async def ticker( lags ):
+    loop = asyncio.get_running_loop()
+    while True:
+        due = loop.time() + 0.001
+        await asyncio.sleep( 0.001 )
+        lags.append( loop.time() - due )
+
+
+# Place resting post-only bids one after another with the synchronous client (from the event loop, as a monitor would).
+# If fresh is True, every order opens a new connection (as a client without keep-alive does).
+async def placesync( client, count, fresh ):
+    latencies = []
+    for _ in range( count ):
+        if fresh and getattr( client.connections, 'connection', None ) is not None:
+            client.connections.connection.close()
+            client.connections.connection = None
+        start = time.perf_counter()
+        client.place_order( 'WETH-DAI', 'BUY', 10**17, Decimal( '100' ), postOnly=True )
+        latencies.append( time.perf_counter() - start )
+        await asyncio.sleep( 0 )
+    return latencies
+
+
+# Place the same bids through the AsyncClient, a burst of orders at a time.
+async def placeasync( restclient, count, burst ):
+    latencies = []
+
+    async def place():
+        start = time.perf_counter()
+        await restclient.place_order( 'WETH-DAI', 'BUY', 10**17, Decimal( '100' ), postOnly=True )
+        latencies.append( time.perf_counter() - start )
+
+    for _ in range( count // burst ):
+        await asyncio.gather( *[ place() for _ in range( burst ) ] )
+    return latencies
+
+
+async def measure( placement ):
+    lags = []
+    tick = asyncio.ensure_future( ticker( lags ) )
+    start = time.perf_counter()
+    latencies = await placement
+    elapsed = time.perf_counter() - start
+    tick.cancel()
+    return latencies, elapsed, max( lags ) * 1000 if lags else float( 'nan' )
+
+
+# Compare order placement latency (p50/p99), throughput and event loop lag with the mock exchange latency specified (in seconds).
+latency = float( sys.argv[1] ) if len( sys.argv ) > 1 else 0.005
+count = int( sys.argv[2] ) if len( sys.argv ) > 2 else 200
+exchange = MockExchange( restport=8091, websocketport=8796, latency=latency, interval=0 )
+exchange.start()
+client = MockClient( exchange.apiurl )
+restclient = AsyncClient( client )
+
+print ( f'{"client":>28} {"p50 ms":>8} {"p99 ms":>8} {"orders/sec":>11} {"max loop lag ms":>16}' )
+for name, placement in (
+        ( 'sync, new connection', lambda: placesync( client, count, True ) ),
+        ( 'sync, keep-alive', lambda: placesync( client, count, False ) ),
+        ( 'AsyncClient, 1 at a time', lambda: placeasync( restclient, count, 1 ) ),
+        ( 'AsyncClient, 4 at a time', lambda: placeasync( restclient, count, 4 ) ),
+    ):
+    latencies, elapsed, lag = asyncio.run( measure( placement() ) )
+    print ( f'{name:>28} {percentile( latencies, 0.5 ):>8.2f} {percentile( latencies, 0.99 ):>8.2f} {len( latencies ) / elapsed:>11,.0f} {lag:>16.2f}' )
+
+restclient.close()
+exchange.stop()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+from decimal import Decimal
+
+import dydx.constants as consts
+
+from orderer import postbid
+from orderer import sendorder
+from orderer import prepareorder
+from mockexchange import MockExchange
+
+
+# Return the median of a list of durations in milliseconds.
+def median( durations ):
+    return sorted( durations )[ len( durations ) // 2 ] * 1000
+
+
+# Compare the time from a trigger to the order acknowledged when the order is built and signed after the trigger (postbid)
+# with sending an order prepared while the monitor waits (sendorder), for the client in credentials.py.
+# Point credentials.py at the mock exchange started here (client = MockClient( 'http://localhost:8080' ));
+# with dydx.client.Client, the preparation times below include signing the order.
+latency = float( sys.argv[1] ) if len( sys.argv ) > 1 else 0.005
+count = int( sys.argv[2] ) if len( sys.argv ) > 2 else 100
+exchange = MockExchange( restport=8080, websocketport=8765, latency=latency, interval=0 )
+exchange.start()
+price = Decimal( '150.00' )
+quantity = Decimal( '0.1' )
+
+preparations = []
+for _ in range( count ):
+    start = time.perf_counter()
+    prepareorder( consts.SIDE_BUY, price, quantity )
+    preparations.append( time.perf_counter() - start )
+
+immediate = []
+for _ in range( count ):
+    start = time.perf_counter()
+    postbid( price, quantity )
+    immediate.append( time.perf_counter() - start )
+
+prepared = []
+for _ in range( count ):
+    order = prepareorder( consts.SIDE_BUY, price, quantity )
+    start = time.perf_counter()
+    sendorder( order )
+    prepared.append( time.perf_counter() - start )
+
+exchange.stop()
+print ( f'preparing an order (conversion, signature and encoding): {median( preparations ):.3f} ms' )
+print ( f'{"submission":>28} {"trigger to acknowledgement ms (p50)":>36}' )
+print ( f'{"postbid (built after trigger)":>28} {median( immediate ):>36.3f}' )
+print ( f'{"sendorder (prepared)":>28} {median( prepared ):>36.3f}' )
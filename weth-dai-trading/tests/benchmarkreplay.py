@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+
+import sys
+import json
+import time
+import uuid
+import asyncio
+from functools import partial
+
+from orderbookfeed import monitororderbook
+from framereplayer import loadframes
+from framereplayer import FrameReplayer
+from maximumbidmonitor import maximumbidmessagehandler
+
+
+# Generate a WETH-DAI orderbook session in the format recorded by framerecorder.py.
+# The highest bid climbs one tick per update and drops away on the last update (reaching a 0.2% trailing stop).
+def syntheticframes( count ):
+    connectionid = str( uuid.uuid4() )
+    def order( price ):
+        return { "id": '0x' + uuid.uuid4().hex * 2, "uuid": str( uuid.uuid4() ), "price": f'{price:.2f}', "amount": "1000000000000000000" }
+    bids = [ order( 190 + i / 100 ) for i in range( 500 ) ]
+    asks = [ order( 210 + i / 100 ) for i in range( 500 ) ]
+    frames = [ json.dumps( {
+        "type": "subscribed",
+        "connection_id": connectionid,
+        "message_id": 1,
+        "channel": "orderbook",
+        "id": "WETH-DAI",
+        "contents": { "bids": bids, "asks": asks }
+    } ) ]
+    top = bids[-1]
+    for messageid in range( 2, count + 1 ):
+        price = 195 + messageid / 100 if messageid < count else 180
+        new = order( price )
+        frames.append( json.dumps( {
+            "type": "channel_data",
+            "connection_id": connectionid,
+            "message_id": messageid,
+            "channel": "orderbook",
+            "id": "WETH-DAI",
+            "contents": { "updates": [
+                dict( top, side="BUY", type="REMOVED" ),
+                dict( new, side="BUY", type="NEW" )
+            ] }
+        } ) )
+        top = new
+    return [ ( index * 0.001, textoutput ) for index, textoutput in enumerate( frames ) ]
+
+
+# Replay a session to the maximum bid monitor and report its throughput and trigger latency.
+# At maximum speed (0) frames queue up in the connection, so throughput is meaningful but latency includes the queue.
+# At the recorded pace (1) or a scaled pace, latency is the time between sending the triggering frame and the handler returning.
+async def benchmark( frames, parameters, speed ):
+    replayer = FrameReplayer( frames, speed=speed, port=8799 )
+    await replayer.start()
+    triggered = {}
+
+    async def handler( feed, entries ):
+        price = await maximumbidmessagehandler( feed, entries, *parameters )
+        triggered["time"] = time.perf_counter()
+        triggered["messageid"] = feed.messageid
+        return price
+
+    price = await monitororderbook( 'WETH-DAI', handler, quotetick='0.01', sides=( "BUY", ), url=replayer.url )
+    await replayer.stop()
+
+    messageids = [ json.loads( textoutput ).get( "message_id" ) for receivetime, textoutput in frames ]
+    index = messageids.index( triggered["messageid"] )
+    elapsed = triggered["time"] - replayer.senttimes[0]
+    print ( f'speed {speed or "max"}: exit trigger reached at {price} on frame {index + 1} of {len( frames )}' )
+    print ( f'handler throughput: {( index + 1 ) / elapsed:,.0f} frames/sec' )
+    print ( f'trigger latency (frame sent -> handler returned): {( triggered["time"] - replayer.senttimes[index] ) * 1e6:,.0f} microseconds' )
+
+
+# Use a recording made by framerecorder.py if one is specified, otherwise a synthetic session (1 millisecond between frames).
+# The paced run replays the session at the speed specified (twice the recorded pace by default).
+frames = loadframes( sys.argv[1] ) if len( sys.argv ) > 1 else syntheticframes( 20000 )
+speed = float( sys.argv[2] ) if len( sys.argv ) > 2 else 2
+asyncio.run( benchmark( frames, ( '0', '0.002', '0', '0' ), 0 ) )
+asyncio.run( benchmark( frames, ( '0', '0.002', '0', '0' ), speed ) )
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+import uuid
+import datetime
+from bisect import bisect_left
+
+from pymongo import MongoClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from tradehistory import tradecollection
+from tradehistory import synctrades
+
+
+# A trade history served like the dYdX /v2/trades endpoint (newest first, paged with startingBefore), without network latency.
+# Trades come in threes sharing a creation time (like the fills of one transaction), so trades tie at page boundaries.
+class TradeHistory:
+
+    def __init__( self ):
+        self.trades = []
+        self.createdats = []
+        self.createdat = datetime.datetime( 2020, 1, 1, tzinfo=datetime.timezone.utc )
+
+    def add( self, count: int ) -> None:
+        for number in range( count ):
+            if number % 3 == 0:
+                self.createdat += datetime.timedelta( milliseconds=250 )
+            self.trades.append( {
+                "uuid": str( uuid.uuid4() ),
+                "market": 'WETH-DAI',
+                "side": 'BUY' if number % 2 else 'SELL',
+                "price": '200.01',
+                "amount": '100000000000000000',
+                "status": 'CONFIRMED',
+                "transactionHash": '0x' + uuid.uuid4().hex * 2,
+                "createdAt": self.createdat.isoformat( timespec='milliseconds' ).replace( '+00:00', 'Z' ),
+            } )
+            self.createdats.append( self.trades[-1]["createdAt"] )
+
+    def get_my_trades( self, market, limit=None, startingBefore=None ) -> dict:
+        end = bisect_left( self.createdats, startingBefore ) if startingBefore else len( self.trades )
+        return { "trades": [ dict( trade ) for trade in reversed( self.trades[max( end - ( limit or 100 ), 0 ):end] ) ] }
+
+
+count = int( sys.argv[1] ) if len( sys.argv ) > 1 else 100000
+url = sys.argv[2] if len( sys.argv ) > 2 else 'mongodb://localhost:27017'
+dbclient = MongoClient( url, serverSelectionTimeoutMS=5000 )
+try:
+    dbclient.admin.command( 'ping' )
+except ServerSelectionTimeoutError:
+    sys.exit( f'No MongoDB server answered at {url}: start one (e.g. mongod --dbpath /tmp/mongodb) or pass its connection string.' )
+dbclient.drop_database( 'benchmarktradesync' )
+db = dbclient['benchmarktradesync']
+history = TradeHistory()
+history.add( count )
+
+# The previous load: every trade fetched and inserted one at a time (timed on a sample of the history).
+sample = min( count, 5000 )
+start = time.perf_counter()
+for trade in history.trades[:sample]:
+    db['insertone'].insert_one( dict( trade ) )
+elapsed = time.perf_counter() - start
+print ( f'{"insert_one per trade":>32}: {sample} trades in {elapsed:.2f} s ({sample / elapsed:,.0f} trades/sec)' )
+
+# The first sync of the whole history, then a sync of a few new trades and a sync of the same history twice.
+collection = tradecollection( db['wethdaitransactionhistory'] )
+for description, newtrades in ( ( 'first sync', 0 ), ( 'incremental sync (100 new)', 100 ), ( 'repeated sync (0 new)', 0 ) ):
+    history.add( newtrades )
+    start = time.perf_counter()
+    inserted = synctrades( collection, 'WETH-DAI', history )
+    elapsed = time.perf_counter() - start
+    print ( f'{description:>32}: {inserted} new trades in {elapsed:.2f} s ({inserted / elapsed:,.0f} trades/sec)' )
+print ( f'{collection.count_documents( {} )} trades stored for {len( history.trades )} trades in the history' )
+dbclient.drop_database( 'benchmarktradesync' )
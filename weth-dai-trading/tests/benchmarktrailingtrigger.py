@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+
+import time
+import random
+from decimal import Decimal
+
+from trailingtrigger import TrailingLimits
+
+
+# Replicate the Decimal trigger evaluation the monitors ran on every update before TrailingLimits.
+# Return the index of the price that reached the exit trigger (None if no trigger was reached).
+def decimalpath( prices, initialminimumprice, percentdepreciation, initialmaximumprice, percentappreciation ):
+    upperlimit = float("inf")
+    lowerlimit = float("-inf")
+    for index, maximumbid in enumerate( prices ):
+        killsocket = False
+        if Decimal(initialminimumprice):
+            laggingbid = Decimal(maximumbid) * ( 1 - Decimal(percentdepreciation) )
+            if laggingbid > Decimal(initialminimumprice):
+                if laggingbid < lowerlimit:
+                    killsocket = True
+                else:
+                    lowerlimit = laggingbid
+        elif Decimal(initialmaximumprice):
+            leadingbid = Decimal(maximumbid) * ( 1 + Decimal(percentappreciation) )
+            if leadingbid < Decimal(initialmaximumprice):
+                if leadingbid > upperlimit:
+                    killsocket = True
+                else:
+                    upperlimit = leadingbid
+        else:
+            if Decimal(percentdepreciation):
+                if Decimal(maximumbid) * ( 1 - Decimal(percentdepreciation) ) > lowerlimit:
+                    lowerlimit = Decimal(maximumbid) * ( 1 - Decimal(percentdepreciation) )
+                elif Decimal(maximumbid) < lowerlimit:
+                    killsocket = True
+            if Decimal(percentappreciation):
+                if Decimal(maximumbid) * ( 1 + Decimal(percentappreciation) ) < upperlimit:
+                    upperlimit = Decimal(maximumbid) * ( 1 + Decimal(percentappreciation) )
+                elif Decimal(maximumbid) > upperlimit:
+                    killsocket = True
+            if not Decimal(percentdepreciation) and not Decimal(percentappreciation): killsocket = True
+        if killsocket:
+            return index
+    return None
+
+
+# Evaluate the same prices (already expressed in integer ticks by the orderbook) with TrailingLimits.
+def tickpath( ticks, quotetick, *parameters ):
+    limits = TrailingLimits( quotetick, *parameters )
+    for index, priceticks in enumerate( ticks ):
+        if limits.evaluate( priceticks ):
+            return index
+    return None
+
+
+# Generate a random walk of WETH-DAI prices on a 0.01 DAI tick.
+def randomwalk( count, start=20000 ):
+    ticks = [ start ]
+    for _ in range( count - 1 ):
+        ticks.append( ticks[-1] + random.choice( ( -2, -1, 0, 0, 0, 1, 2 ) ) )
+    return ticks
+
+
+random.seed( 0 )
+quotetick = '0.01'
+scenarios = {
+    'trailing stop': ( '0', '0.002', '0', '0' ),
+    'trailing entry': ( '0', '0', '0', '0.002' ),
+    'minimum price': ( '199.5', '0.001', '0', '0' ),
+    'maximum price': ( '0', '0', '200.5', '0.001' ),
+}
+
+# Confirm that both paths trigger on the same price.
+for _ in range( 200 ):
+    ticks = randomwalk( 2000 )
+    prices = [ str( Decimal( priceticks ) * Decimal( quotetick ) ) for priceticks in ticks ]
+    for parameters in scenarios.values():
+        assert decimalpath( prices, *parameters ) == tickpath( ticks, quotetick, *parameters ), parameters
+
+# Time both paths while the monitors are waiting (i.e. on prices that never reach the exit trigger).
+waiting = {
+    'trailing stop': ( '0', '0.05', '0', '0' ),
+    'trailing entry': ( '0', '0', '0', '0.05' ),
+    'minimum price': ( '250', '0.001', '0', '0' ),
+    'maximum price': ( '0', '0', '150', '0.001' ),
+}
+ticks = randomwalk( 200000 )
+prices = [ str( Decimal( priceticks ) * Decimal( quotetick ) ) for priceticks in ticks ]
+print ( f'{"scenario":>16} {"Decimal evaluations/sec":>24} {"tick evaluations/sec":>22}' )
+for name, parameters in waiting.items():
+    start = time.perf_counter()
+    assert decimalpath( prices, *parameters ) is None
+    decimalrate = len( prices ) / ( time.perf_counter() - start )
+
+    start = time.perf_counter()
+    assert tickpath( ticks, quotetick, *parameters ) is None
+    tickrate = len( ticks ) / ( time.perf_counter() - start )
+
+    print ( f'{name:>16} {decimalrate:>24,.0f} {tickrate:>22,.0f}' )
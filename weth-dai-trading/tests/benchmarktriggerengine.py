@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+
+import sys
+import time
+import random
+from decimal import Decimal
+
+from trailingtrigger import TrailingTrigger
+
+
+# Replicate one trigger evaluated on its own (the way each monitor evaluates its single trigger on every update).
+# Prices are integer ticks and the conditions are checked in DAI/ETH with Decimals.
+class NaiveTrigger:
+
+    def __init__( self, quotetick, kind, *parameters ):
+        self.quotetick = Decimal( quotetick )
+        self.kind = kind
+        self.parameters = [ Decimal( parameter ) if parameter else None for parameter in parameters ]
+        self.extreme = None
+        self.price = None
+
+    def evaluate( self, priceticks: int ) -> bool:
+        price = priceticks * self.quotetick
+        if self.kind == "trailing stop":
+            percent, activation = self.parameters
+            if activation is not None and self.extreme is None and price < activation:
+                return False
+            if self.extreme is None or priceticks > self.extreme:
+                self.extreme = priceticks
+                return False
+            return price < self.extreme * self.quotetick * ( 1 - percent )
+        if self.kind == "trailing entry":
+            percent, activation = self.parameters
+            if activation is not None and self.extreme is None and price > activation:
+                return False
+            if self.extreme is None or priceticks < self.extreme:
+                self.extreme = priceticks
+                return False
+            return price > self.extreme * self.quotetick * ( 1 + percent )
+        if self.kind == "stop":
+            return price <= self.parameters[0]
+        if self.kind == "take profit":
+            return price >= self.parameters[0]
+        if self.kind == "band":
+            return price < self.parameters[0] or price > self.parameters[1]
+
+
+# Generate a random walk of WETH-DAI prices on a 0.01 DAI tick.
+def randomwalk( count, start=20000 ):
+    ticks = [ start ]
+    for _ in range( count - 1 ):
+        ticks.append( ticks[-1] + random.choice( ( -2, -1, 0, 0, 0, 1, 2 ) ) )
+    return ticks
+
+
+# Generate random trigger parameters around a price (in DAI/ETH), wide enough that most triggers are still waiting at the end of a walk.
+def randomtriggers( count, price, spread ):
+    triggers = []
+    for _ in range( count ):
+        kind = random.choice( ( "trailing stop", "trailing entry", "stop", "take profit", "band" ) )
+        offset = Decimal( random.randint( 1, spread ) ) / 100
+        if kind == "trailing stop":
+            activation = str( price + offset ) if random.random() < 0.5 else None
+            triggers.append( ( kind, str( Decimal( random.randint( 1, spread ) ) / 20000 ), activation ) )
+        elif kind == "trailing entry":
+            activation = str( price - offset ) if random.random() < 0.5 else None
+            triggers.append( ( kind, str( Decimal( random.randint( 1, spread ) ) / 20000 ), activation ) )
+        elif kind == "stop":
+            triggers.append( ( kind, str( price - offset ) ) )
+        elif kind == "take profit":
+            triggers.append( ( kind, str( price + offset ) ) )
+        else:
+            triggers.append( ( kind, str( price - offset ), str( price + offset + Decimal( '0.005' ) ) ) )
+    return triggers
+
+
+def addtrigger( engine, kind, *parameters ):
+    if kind == "trailing stop":
+        return engine.trailingstop( *parameters )
+    if kind == "trailing entry":
+        return engine.trailingentry( *parameters )
+    if kind == "stop":
+        return engine.stop( *parameters )
+    if kind == "take profit":
+        return engine.takeprofit( *parameters )
+    return engine.band( *parameters )
+
+
+# Evaluate every trigger on every price and return the index of the price that fired each trigger.
+def naivepath( ticks, quotetick, parameters ):
+    triggers = [ NaiveTrigger( quotetick, *trigger ) for trigger in parameters ]
+    fired = [ None ] * len( triggers )
+    waiting = list( range( len( triggers ) ) )
+    for index, priceticks in enumerate( ticks ):
+        remaining = []
+        for position in waiting:
+            if triggers[position].evaluate( priceticks ):
+                fired[position] = index
+            else:
+                remaining.append( position )
+        waiting = remaining
+    return fired
+
+
+# Evaluate the same prices with the engine (skipping unchanged prices like TrailingTrigger.monitor).
+def enginepath( ticks, quotetick, parameters ):
+    engine = TrailingTrigger( quotetick )
+    triggers = [ addtrigger( engine, *trigger ) for trigger in parameters ]
+    positions = { trigger.id: position for position, trigger in enumerate( triggers ) }
+    fired = [ None ] * len( triggers )
+    for index, priceticks in enumerate( ticks ):
+        if priceticks != engine.lastticks:
+            for trigger in engine.evaluate( priceticks ):
+                fired[positions[trigger.id]] = index
+    return fired
+
+
+random.seed( 0 )
+quotetick = '0.01'
+
+# Confirm that both paths fire every trigger on the same price.
+for _ in range( 50 ):
+    ticks = randomwalk( 2000 )
+    parameters = randomtriggers( 200, Decimal( ticks[0] ) / 100, 300 )
+    assert naivepath( ticks, quotetick, parameters ) == enginepath( ticks, quotetick, parameters )
+
+# Time both paths as the number of triggers sharing the feed increases (most of them waiting throughout).
+updates = int( sys.argv[1] ) if len( sys.argv ) > 1 else 5000
+ticks = randomwalk( updates )
+print ( f'{"triggers":>9} {"naive updates/sec":>18} {"engine updates/sec":>19}' )
+for count in ( 1, 10, 100, 1000, 10000 ):
+    parameters = randomtriggers( count, Decimal( ticks[0] ) / 100, 5000 )
+
+    start = time.perf_counter()
+    naivepath( ticks, quotetick, parameters )
+    naiverate = len( ticks ) / ( time.perf_counter() - start )
+
+    start = time.perf_counter()
+    enginepath( ticks, quotetick, parameters )
+    enginerate = len( ticks ) / ( time.perf_counter() - start )
+
+    print ( f'{count:>9} {naiverate:>18,.0f} {enginerate:>19,.0f}' )
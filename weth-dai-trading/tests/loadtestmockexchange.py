@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from statistics import median
+
+from mockexchange import MockClient
+from mockexchange import MockExchange
+
+
+# Every strategy instance imports this credentials module (written to a temporary directory ahead of the repository on its path),
+# so the unmodified strategy script trades through a MockClient of the mock exchange with a wallet of its own.
+credentialsmodule = '''import os
+from mockexchange import MockClient
+client = MockClient( os.environ["MOCKEXCHANGEURL"], public_address=os.environ["MOCKWALLET"] )
+walletaddress = client.public_address
+'''
+
+
+# Start the instances of a strategy script, each in its own process against the mock exchange.
+# The orderbook and orders channels are read from the mock websocket endpoint (DYDXWEBSOCKETURL); alerts, journals and
+# latency histograms are written to the temporary directory and only INFO messages are logged.
+def startinstances( exchange: MockExchange, script: str, wallets: list, directory: str ) -> list:
+    processes = []
+    for wallet in wallets:
+        environment = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join( filter( None, ( directory, os.getcwd(), os.environ.get( 'PYTHONPATH' ) ) ) ),
+            MOCKEXCHANGEURL=exchange.apiurl,
+            MOCKWALLET=wallet,
+            DYDXWEBSOCKETURL=exchange.websocketurl,
+            DYDXALERTFILE=os.path.join( directory, 'alerts.log' ),
+            DYDXJOURNALDIR=os.path.join( directory, 'journal' ),
+            DYDXLATENCYFILE=os.path.join( directory, wallet + '.prom' ),
+            DYDXLOGLEVEL='INFO'
+        )
+        processes.append( subprocess.Popen( [ sys.executable, script ], env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL ) )
+    return processes
+
+
+def stopinstances( processes: list ) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait( 10 )
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+# Return the orders placed, the fills and the cycles completed (sell orders filled) by the wallets specified so far.
+def activity( exchange: MockExchange, wallets: set ) -> tuple:
+    engine = exchange.engine
+    with engine.lock:
+        orders = [ order for order in engine.orders.values() if order["makerAccountOwner"] in wallets ]
+        fills = sum( fill["accountOwner"] in wallets for fill in engine.fills )
+    cycles = sum( order["side"] == "SELL" and order["status"] == "FILLED" for order in orders )
+    return ( len( orders ), fills, cycles )
+
+
+# Run instances of a strategy for a number of seconds (from their launch, so startup counts) and return the instances still
+# running at the end, orders, fills and cycles per minute, and the p50 and p99 (in milliseconds) of orderbook requests made
+# alongside them (how responsive the loaded exchange remains).
+def measure( exchange: MockExchange, script: str, instances: int, seconds: float, directory: str ) -> tuple:
+    wallets = [ f'0x{instances:020x}{index + 1:020x}' for index in range( instances ) ]
+    before = activity( exchange, set( wallets ) )
+    processes = startinstances( exchange, script, wallets, directory )
+    try:
+        probe = MockClient( exchange.apiurl, public_address='0x' + 'f' * 40 )
+        timings = []
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            requested = time.perf_counter()
+            probe.get_orderbook( 'WETH-DAI' )
+            timings.append( ( time.perf_counter() - requested ) * 1000 )
+            time.sleep( 0.05 )
+        after = activity( exchange, set( wallets ) )
+        elapsed = time.perf_counter() - start
+    finally:
+        stopinstances( processes )
+    alive = sum( process.returncode == -15 for process in processes )
+    rates = [ ( after[index] - before[index] ) / elapsed * 60 for index in range( 3 ) ]
+    timings.sort()
+    return ( alive, *rates, median( timings ), timings[int( len( timings ) * 0.99 )] )
+
+
+# Ramp up the number of concurrent instances of a strategy script (long-eth-perpetually.py by default) against a local mock
+# exchange with the latency specified (in seconds), measuring each step for a number of seconds.
+# The mock market moves up to volatility ticks every 0.1 seconds, so the cycles completed depend on the strategy thresholds as
+# much as on the exchange; the exchange saturates where orders per minute stop increasing and orderbook requests slow down.
+# Instances that exited before the end of a step (e.g. on an error) are reported as not running.
+script = sys.argv[1] if len( sys.argv ) > 1 else 'long-eth-perpetually.py'
+latency = float( sys.argv[2] ) if len( sys.argv ) > 2 else 0.005
+seconds = float( sys.argv[3] ) if len( sys.argv ) > 3 else 60
+volatility = int( sys.argv[4] ) if len( sys.argv ) > 4 else 40
+directory = tempfile.mkdtemp( prefix='loadtest' )
+with open( os.path.join( directory, 'credentials.py' ), 'w' ) as credentials:
+    credentials.write( credentialsmodule )
+exchange = MockExchange( restport=8090, websocketport=8795, latency=latency, interval=0.1 )
+exchange.simulator.volatility = volatility
+exchange.start()
+print ( f'{script}: {seconds:.0f} seconds per step, {latency * 1000:.0f} ms latency, market moves of up to {volatility} ticks' )
+print ( f'{"instances":>10} {"running":>8} {"orders/minute":>14} {"fills/minute":>13} {"cycles/minute":>14} {"orderbook p50 ms":>17} {"p99 ms":>7}' )
+for instances in ( 1, 2, 4, 8, 16, 32 ):
+    running, orders, fills, cycles, p50, p99 = measure( exchange, script, instances, seconds, directory )
+    print ( f'{instances:>10} {running:>8} {orders:>14,.0f} {fills:>13,.0f} {cycles:>14,.1f} {p50:>17.1f} {p99:>7.1f}' )
+exchange.stop()
+shutil.rmtree( directory )
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+
+import asyncio
+
+from mockexchange import MockExchange
+from orderbookfeed import monitororderbook
+
+
+# Follow the WETH-DAI orderbook of the mock exchange until the first update is applied (feeds collects the orderbook feed).
+async def follow( url: str, feeds: list ) -> None:
+
+    async def handler( feed, entries ):
+        feeds.append( feed )
+        async for messageid, snapshot, sides in entries:
+            if not snapshot:
+                return
+
+    await monitororderbook( 'WETH-DAI', handler, quotetick='0.01', url=url )
+
+
+# Subscribe twice to the market (one subscriber after the other), then move the market once and return the message gaps each
+# subscriber saw: neither may see one (every gap makes a feed rebuild its orderbook from a REST snapshot).
+async def main( exchange: MockExchange ) -> tuple:
+    feeds = []
+    subscribers = [ asyncio.ensure_future( follow( exchange.websocketurl, feeds ) ) ]
+    await asyncio.sleep( 1 )
+    subscribers.append( asyncio.ensure_future( follow( exchange.websocketurl, feeds ) ) )
+    await asyncio.sleep( 1 )
+    exchange.simulator.step()
+    done, pending = await asyncio.wait( subscribers, timeout=5 )
+    for subscriber in pending:
+        subscriber.cancel()
+    return tuple( feed.gaps for feed in feeds )
+
+# The market only moves when main steps the simulator.
+exchange = MockExchange( restport=8091, websocketport=8796, interval=0 )
+exchange.start()
+try:
+    firstgaps, secondgaps = asyncio.run( main( exchange ) )
+finally:
+    exchange.stop()
+print ( f'gaps seen by the first subscriber: {firstgaps}, by the second subscriber: {secondgaps}' )
+print ( 'ok' if firstgaps == secondgaps == 0 else 'FAILED: a new subscription caused a message gap' )
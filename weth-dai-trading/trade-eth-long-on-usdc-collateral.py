@@ -11,8 +11,11 @@ import dydx.constants as consts
 import dydx.util as utils
 
 from logger import logger
-from messenger import alert
-from credentials import client
+from messenger import smsalert
+from orderer import client
+from credentials import walletaddress
+from fillnotifier import FillNotifier
+from batchorders import flatten
 
 
 # Define the return on assets and price drop (pricetrigger) required for bidding
@@ -77,6 +80,10 @@ def bestprices( tradingpair, quotetick ):
     return ( marketask, marketbid, limitask, limitbid )
 
 
+# Subscribe to the orders channel before placing orders so that fills are pushed as soon as they happen
+notifier = FillNotifier( walletaddress )
+
+
 # Get dYdX markets and define market constants
 markets = client.get_markets()
 daiquotetick = markets["markets"]["WETH-DAI"]["minimumTickSize"]
@@ -174,14 +181,15 @@ while True:
     topask = orderbookpricing[0]
     topbid = orderbookpricing[1]
     logger.debug( f'Bidding {greatestbid}. The highest bid now is {topbid} and the cheapest ask is {topask}.')
-    # Give the bid placed five seconds to fill
-    time.sleep(5)
-    # Get fills
-    lastfill = client.get_my_fills(market=['WETH-DAI'],limit=1)
-    if lastfill["fills"][0]["orderId"] == placed_bid["order"]["id"]:
+    # Give the bid placed up to five seconds to fill (the orders channel pushes the fill as soon as it happens)
+    filledbid = notifier.waitforfill( placed_bid["order"]["id"], timeout=5 )
+    if filledbid is not None and filledbid["status"] == "FILLED":
         logger.info ( 'Order %s was filled.', placed_bid["order"]["id"])
         smsalert( f'Bid {greatestbid} DAI for {bidquantity} ETH')
         break
+    elif filledbid is not None:
+        logger.info ( f'Order {placed_bid["order"]["id"]} was {filledbid["status"]}.' )
+        exit(0)
 
 
 # Place ask to close the position opened by the bid
@@ -209,16 +217,17 @@ logger.info( f'From this point forth, if the submitted ask is not filled and the
 logger.info( f'From this point forth, if the submitted ask is not filled and the price drops below {dumpthreshold:10.4f} issue a stop market order.')
 # Enter loop
 while True:
-    # Check the status of the submitted ask
-    submittedask = client.get_order( orderId=placed_ask["order"]["id"] )
-    if submittedask["order"]["status"] == "FILLED":
+    # Wait up to five seconds for the orders channel to push the fill of the submitted ask
+    filledask = notifier.waitforfill( placed_ask["order"]["id"], timeout=5 )
+    if filledask is not None and filledask["status"] == "FILLED":
         # Exit: End the loop and exit.
-        logger.info ( f'Order {submittedask["order"]["id"]} was filled at: {submittedask["order"]["price"]} DAI/ETH.')
+        logger.info ( f'Order {filledask["id"]} was filled at: {filledask["price"]} DAI/ETH.')
         break
+    elif filledask is not None:
+        logger.info ( f'Order {filledask["id"]} was {filledask["status"]}.' )
+        exit(0)
     else:
-        # Sleep
         # Then check price
-        time.sleep(5)
         bookprices = bestprices( 'WETH-DAI', daiquotetick )
         bookmarket = Decimal( bookprices[1] )
         limitprice = Decimal( bookprices[2] )
@@ -227,46 +236,40 @@ while True:
         # If the present price is below the trigger price this loop ends
         if Decimal( bookmarket ) < Decimal( dumpthreshold ):
             logger.info ( f'The highest bid in the orderbook [{bookmarket:10.4f}] just fell below the stop market sell threshold: {dumpthreshold:10.4f}')
-            # Create order to SELL ETH
-            placed_stop = client.place_order(
+            # Create order to SELL ETH and cancel the previously submitted ask in the same round of requests.
+            logger.info ( "Cancelling order: %s", placed_ask["order"]["id"] )
+            stop = flatten( [ placed_ask["order"]["id"] ], [ dict(
                 market=consts.PAIR_WETH_DAI,
                 side=consts.SIDE_SELL,
                 amount=utils.token_to_wei(quantity, consts.MARKET_WETH),
                 price=bookmarket.quantize( Decimal(daiquotetick) ),
                 fillOrKill=False,
                 postOnly=False
-            )
-            # Display order information
-            jsondata = json.dumps( placed_stop, sort_keys=True, indent=4, separators=(',', ': ') )
-            logger.info ( jsondata )
-            # Cancel the previously submitted ask then exit the loop.
-            logger.info ( "Cancelling order: %s", submittedask["order"]["id"] )
-            canceledask = client.cancel_order( hash=placed_ask["order"]["id"] )
-            # Display order cancel information
-            jsondata = json.dumps( canceledask, sort_keys=True, indent=4, separators=(',', ': ') )
+            ) ] )
+            # Display order and order cancel information
+            jsondata = json.dumps( stop.responses, sort_keys=True, indent=4, separators=(',', ': '), default=str )
             logger.info ( jsondata )
+            if not stop.ok:
+                smsalert( f'Stop market sell errors: {stop.errors}' )
             # Exit loop
             break
         elif Decimal( dumpthreshold ) < Decimal( bookmarket ) < Decimal( sellthreshold ):
             logger.info ( f'The highest bid in the orderbook [{bookmarket:10.4f}] just fell below the stop limit sell threshold: {sellthreshold:10.4f}')
-            # Create order to SELL ETH
-            placed_stop = client.place_order(
+            # Create order to SELL ETH and cancel the previously submitted ask in the same round of requests.
+            logger.info ( "Cancelling order: %s", placed_ask["order"]["id"] )
+            stop = flatten( [ placed_ask["order"]["id"] ], [ dict(
                 market=consts.PAIR_WETH_DAI,
                 side=consts.SIDE_SELL,
                 amount=utils.token_to_wei(quantity, consts.MARKET_WETH),
                 price=limitprice.quantize( Decimal(daiquotetick) ),
                 fillOrKill=False,
                 postOnly=False
-            )
-            # Display order information
-            jsondata = json.dumps( placed_stop, sort_keys=True, indent=4, separators=(',', ': ') )
-            logger.info ( jsondata )
-            # Cancel the previously submitted ask then exit the loop.
-            logger.info ( "Cancelling order: %s", submittedask["order"]["id"] )
-            canceledask = client.cancel_order( hash=placed_ask["order"]["id"] )
-            # Display order cancel information
-            jsondata = json.dumps( canceledask, sort_keys=True, indent=4, separators=(',', ': ') )
+            ) ] )
+            # Display order and order cancel information
+            jsondata = json.dumps( stop.responses, sort_keys=True, indent=4, separators=(',', ': '), default=str )
             logger.info ( jsondata )
+            if not stop.ok:
+                smsalert( f'Stop limit sell errors: {stop.errors}' )
             # Exit loop
             break
 
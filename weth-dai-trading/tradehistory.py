@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+
+import time
+import threading
+from functools import partial
+
+from pymongo import ASCENDING
+from pymongo import DESCENDING
+from pymongo import ReplaceOne
+
+from logger import logger
+from credentials import client
+from credentials import walletaddress
+from websockethub import WebsocketHub
+from pagination import pages
+
+
+# Trades requested per page (the most dYdX returns at once).
+pagesize = 100
+# Trades upserted per bulk write.
+batchsize = 1000
+# Sync at least this often in continuous mode, even if no fill was pushed (e.g. while the websocket reconnects).
+syncinterval = 300
+
+# Field identifying a trade (a unique index of the collection, so syncing a trade twice updates it instead of duplicating it).
+tradeid = 'uuid'
+# Collection keeping the high-water mark of every collection and market synced (the creation time of the newest trade stored).
+statecollection = 'syncstate'
+
+
+# Create the indexes of a trade history collection (if missing) and return it.
+def tradecollection( collection ):
+    collection.create_index( [ ( tradeid, ASCENDING ) ], unique=True )
+    collection.create_index( [ ( 'createdAt', DESCENDING ) ] )
+    return collection
+
+
+# Return the creation time of the newest trade of a market stored by the last complete sync (None before the first sync).
+def highwatermark( collection, market: str ):
+    state = collection.database[statecollection].find_one( { "_id": f'{collection.name}:{market}' } )
+    return state["highwatermark"] if state else None
+
+
+def storehighwatermark( collection, market: str, createdat: str ) -> None:
+    collection.database[statecollection].update_one( { "_id": f'{collection.name}:{market}' }, { "$set": { "highwatermark": createdat } }, upsert=True )
+
+
+# Return the trades (or fills) of the account in a market page by page, newest first, back to the trades created at the time specified.
+# Trades created at that very time are fetched again (they are upserted, so they are never duplicated), and so are the trades
+# sharing the creation time of the last trade of a page (see pagination.pages), so no trade is skipped at a page boundary.
+def fetchtrades( market: str, since: str = None, restclient=None, kind: str = 'trades' ):
+    restclient = restclient or client
+    fetch = getattr( restclient, 'get_my_' + kind )
+    return pages( partial( fetch, market=[ market ] ), kind, tradeid, since, pagesize )
+
+
+# Insert the trades missing from a collection and update those already stored, in one unordered bulk write.
+def upserttrades( collection, trades: list ) -> int:
+    if not trades:
+        return 0
+    result = collection.bulk_write( [ ReplaceOne( { tradeid: trade[tradeid] }, trade, upsert=True ) for trade in trades ], ordered=False )
+    return result.upserted_count
+
+
+# Store the trades (or fills) of a market created since the last sync and return the number of trades new to the collection.
+# The high-water mark only moves once every page is stored, so an interrupted sync is simply repeated by the next one.
+# The trades are also appended to the table of the same name of a column store if one is specified (see columnstore).
+def synctrades( collection, market: str, restclient=None, kind: str = 'trades', store=None ) -> int:
+    since = highwatermark( collection, market )
+    start = time.perf_counter()
+    newest = None
+    fetched = 0
+    inserted = 0
+    batch = []
+    rows = []
+    for page in fetchtrades( market, since, restclient, kind ):
+        newest = newest or page[0]["createdAt"]
+        fetched += len( page )
+        batch += page
+        if store is not None:
+            rows += [ store.row( kind, market, entry ) for entry in page ]
+        if len( batch ) >= batchsize:
+            inserted += upserttrades( collection, batch )
+            batch = []
+    inserted += upserttrades( collection, batch )
+    if store is not None:
+        store.append( kind, market, rows )
+    if newest is not None:
+        storehighwatermark( collection, market, max( newest, since or newest ) )
+    elapsed = time.perf_counter() - start
+    logger.info( f'{market} {kind} synced since {since or "the start"}: {fetched} fetched, {inserted} new, in {elapsed:.2f} s ({fetched / elapsed if elapsed else 0:,.0f} {kind}/sec).' )
+    return inserted
+
+
+# Keep a collection in sync: sync once, then again whenever the orders channel pushes a fill in the market (or every syncinterval seconds).
+# The fills are synced to fillcollection too if one is specified.
+def followtrades( collection, market: str, hub=None, restclient=None, store=None, fillcollection=None ) -> None:
+    hub = hub if hub is not None else WebsocketHub()
+    if hub.loop is None:
+        hub.start()
+    filled = threading.Event()
+
+    def orderupdated( order: dict ) -> None:
+        if order.get( "market" ) == market and order["status"] in ( "FILLED", "PARTIALLY_FILLED" ):
+            filled.set()
+
+    validator = hub.call( hub.orders( walletaddress ) )
+    validator.listeners.append( orderupdated )
+    while True:
+        filled.clear()
+        try:
+            synctrades( collection, market, restclient, 'trades', store )
+            if fillcollection is not None:
+                synctrades( fillcollection, market, restclient, 'fills', store )
+        except Exception as e:
+            logger.critical( f'Unable to sync the {market} trades: {e}', exc_info=True )
+        filled.wait( syncinterval )
+        # Let the fills of a burst settle into the trades endpoint before the next sync.
+        time.sleep( 1 )
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+
+import asyncio
+from bisect import insort
+from bisect import bisect_left
+from bisect import bisect_right
+from decimal import Decimal
+from decimal import ROUND_CEILING
+from decimal import ROUND_FLOOR
+
+from latency import triggered
+from journal import record
+
+
+# Round a Decimal down (or up) to an integer.
+def floorticks( value: Decimal ) -> int:
+    return int( value.to_integral_value( rounding=ROUND_FLOOR ) )
+
+def ceilingticks( value: Decimal ) -> int:
+    return int( value.to_integral_value( rounding=ROUND_CEILING ) )
+
+
+# Evaluate the sliding exit limits of the trailing monitors on prices normalised to integer ticks of the quote tick size.
+# The percentages and initial prices are parsed once and turned into integer thresholds up front.
+# Thresholds are only recalculated when a sliding limit moves, so evaluating an unchanged limit is a few integer comparisons.
+#
+# There are three modes (matching the arguments of monitormaximumbid and monitorminimumask):
+# - initialminimumprice: once the lagging price exceeds the initial minimum price, exit on any drop from the highest price seen.
+# - initialmaximumprice: once the leading price drops below the initial maximum price, exit on any rise from the lowest price seen.
+# - neither: exit if the price drops percentdepreciation below the highest price seen or rises percentappreciation above the lowest.
+class TrailingLimits:
+
+    def __init__(
+            self,
+            quotetick,
+            initialminimumprice,
+            percentdepreciation,
+            initialmaximumprice,
+            percentappreciation
+        ):
+        self.quotetick = Decimal( quotetick )
+        self.depreciation = Decimal( percentdepreciation )
+        self.appreciation = Decimal( percentappreciation )
+        initialminimum = Decimal( initialminimumprice )
+        initialmaximum = Decimal( initialmaximumprice )
+
+        # Sliding limits in DAI/ETH (for display) and in integer ticks (for evaluation).
+        self.lowerlimit = float("-inf")
+        self.upperlimit = float("inf")
+        self.peakticks = float("-inf")
+        self.troughticks = float("inf")
+        self.stopticks = float("-inf")
+        self.capticks = float("inf")
+        self.triggered = None
+
+        # Prices at which the limits start sliding.
+        self.lowerarm = float("-inf")
+        self.upperarm = float("inf")
+        self.exitonpeak = False
+        self.exitontrough = False
+        if initialminimum:
+            # The lagging price exceeds the initial minimum price from this tick onwards.
+            self.lowerarm = floorticks( initialminimum / ( ( 1 - self.depreciation ) * self.quotetick ) ) + 1
+            self.tracklower = True
+            self.trackupper = False
+            self.exitonpeak = True
+        elif initialmaximum:
+            # The leading price drops below the initial maximum price from this tick downwards.
+            self.upperarm = ceilingticks( initialmaximum / ( ( 1 + self.appreciation ) * self.quotetick ) ) - 1
+            self.tracklower = False
+            self.trackupper = True
+            self.exitontrough = True
+        else:
+            self.tracklower = bool( self.depreciation )
+            self.trackupper = bool( self.appreciation )
+        self.immediate = not initialminimum and not initialmaximum and not self.tracklower and not self.trackupper
+
+    # Convert a price into integer ticks.
+    def ticks( self, price ) -> int:
+        return int( ( Decimal( price ) / self.quotetick ).to_integral_value() )
+
+    # Evaluate a price (in integer ticks) and return True once an exit trigger is reached.
+    # The limit that was crossed is recorded in self.triggered ("lower", "upper" or "immediate").
+    def evaluate( self, priceticks: int ) -> bool:
+        if self.tracklower and priceticks >= self.lowerarm:
+            if priceticks > self.peakticks:
+                self.raiselower( priceticks )
+            elif priceticks < self.stopticks:
+                self.triggered = "lower"
+                return True
+        if self.trackupper and priceticks <= self.upperarm:
+            if priceticks < self.troughticks:
+                self.reduceupper( priceticks )
+            elif priceticks > self.capticks:
+                self.triggered = "upper"
+                return True
+        if self.immediate:
+            self.triggered = "immediate"
+            return True
+        return False
+
+    # Slide the lower limit up behind a new highest price.
+    def raiselower( self, priceticks: int ) -> None:
+        self.peakticks = priceticks
+        self.lowerlimit = priceticks * self.quotetick * ( 1 - self.depreciation )
+        self.stopticks = priceticks if self.exitonpeak else ceilingticks( self.lowerlimit / self.quotetick )
+
+    # Slide the upper limit down behind a new lowest price.
+    def reduceupper( self, priceticks: int ) -> None:
+        self.troughticks = priceticks
+        self.upperlimit = priceticks * self.quotetick * ( 1 + self.appreciation )
+        self.capticks = priceticks if self.exitontrough else floorticks( self.upperlimit / self.quotetick )
+
+
+# A single exit condition held by a TrailingTrigger engine.
+# Its thresholds are integer ticks kept in the price-sorted indexes of the engine (see TrailingTrigger.keys).
+# Once it fires, price holds the price that reached it.
+class Trigger:
+
+    def __init__( self, kind: str, percent=None, callback=None ):
+        self.id = None
+        self.kind = kind
+        self.percent = Decimal( percent ) if percent is not None else None
+        self.callback = callback
+        self.extreme = None
+        self.limit = None
+        self.price = None
+        self.keys = {}
+        self.waiters = []
+
+    def __repr__( self ):
+        return f'Trigger({self.id}, {self.kind}, limit={self.limit}, price={self.price})'
+
+    @property
+    def fired( self ) -> bool:
+        return self.price is not None
+
+
+# Evaluate any number of independent triggers against one price feed (e.g. the highest bid of a shared orderbook feed).
+# Every threshold is an integer tick kept in one of four sorted indexes of ( ticks, trigger id ):
+# - below: exit once the price is at or below the threshold (stops, trailing stops and the lower edge of bands).
+# - above: exit once the price is at or above the threshold (take-profits, trailing entries and the upper edge of bands).
+# - peaks: slide a trailing stop up once the price is at or above its next peak.
+# - troughs: slide a trailing entry down once the price is at or below its next trough.
+# A price only visits the end of each index that it crossed (a binary search), so an update costs O(log n + k) for k crossed thresholds.
+# Triggers are added and evaluated on the event loop that runs the feed.
+class TrailingTrigger:
+
+    def __init__( self, quotetick='0.01', side: str = "BUY" ):
+        self.quotetick = Decimal( quotetick )
+        self.side = side
+        self.triggers = {}
+        self.indexes = { "below": [], "above": [], "peaks": [], "troughs": [] }
+        self.counter = 0
+        self.lastticks = None
+
+    def __len__( self ):
+        return len( self.triggers )
+
+    # Convert a price into integer ticks.
+    def ticks( self, price ) -> int:
+        return int( ( Decimal( price ) / self.quotetick ).to_integral_value() )
+
+    # Exit once the price drops percentdepreciation below the highest price seen.
+    # If an activation price is specified, the highest price is only tracked once the price reaches it.
+    def trailingstop( self, percentdepreciation, activationprice=None, callback=None ) -> Trigger:
+        trigger = Trigger( "trailing stop", percentdepreciation, callback )
+        arm = ceilingticks( Decimal( activationprice ) / self.quotetick ) if activationprice else float("-inf")
+        return self.add( trigger, peaks=arm )
+
+    # Exit once the price rises percentappreciation above the lowest price seen.
+    # If an activation price is specified, the lowest price is only tracked once the price drops to it.
+    def trailingentry( self, percentappreciation, activationprice=None, callback=None ) -> Trigger:
+        trigger = Trigger( "trailing entry", percentappreciation, callback )
+        arm = floorticks( Decimal( activationprice ) / self.quotetick ) if activationprice else float("inf")
+        return self.add( trigger, troughs=arm )
+
+    # Exit once the price drops to the stop price.
+    def stop( self, stopprice, callback=None ) -> Trigger:
+        trigger = Trigger( "stop", callback=callback )
+        trigger.limit = Decimal( stopprice )
+        return self.add( trigger, below=floorticks( trigger.limit / self.quotetick ) )
+
+    # Exit once the price rises to the target price.
+    def takeprofit( self, targetprice, callback=None ) -> Trigger:
+        trigger = Trigger( "take profit", callback=callback )
+        trigger.limit = Decimal( targetprice )
+        return self.add( trigger, above=ceilingticks( trigger.limit / self.quotetick ) )
+
+    # Exit once the price leaves the band between the lower and the upper price.
+    def band( self, lowerprice, upperprice, callback=None ) -> Trigger:
+        trigger = Trigger( "band", callback=callback )
+        trigger.limit = ( Decimal( lowerprice ), Decimal( upperprice ) )
+        return self.add(
+            trigger,
+            below=ceilingticks( trigger.limit[0] / self.quotetick ) - 1,
+            above=floorticks( trigger.limit[1] / self.quotetick ) + 1
+        )
+
+    # Index the thresholds of a new trigger.
+    # A trigger added between updates is evaluated against the last price straight away (only its own thresholds can be crossed).
+    def add( self, trigger: Trigger, **thresholds ) -> Trigger:
+        self.counter += 1
+        trigger.id = self.counter
+        self.triggers[trigger.id] = trigger
+        for index, ticks in thresholds.items():
+            self.insert( trigger, index, ticks )
+        if self.lastticks is not None:
+            self.evaluate( self.lastticks )
+        return trigger
+
+    # Remove a trigger that has not fired.
+    def cancel( self, trigger: Trigger ) -> None:
+        for index in list( trigger.keys ):
+            self.discard( trigger, index )
+        self.triggers.pop( trigger.id, None )
+        for future in trigger.waiters:
+            future.cancel()
+
+    def insert( self, trigger: Trigger, index: str, ticks ) -> None:
+        key = ( ticks, trigger.id )
+        insort( self.indexes[index], key )
+        trigger.keys[index] = key
+
+    def discard( self, trigger: Trigger, index: str ) -> None:
+        key = trigger.keys.pop( index, None )
+        if key is None:
+            return
+        keys = self.indexes[index]
+        position = bisect_left( keys, key )
+        if position < len( keys ) and keys[position] == key:
+            del keys[position]
+
+    # Remove and return the thresholds crossed by a price (the top of an index for "below" and "troughs", the bottom otherwise).
+    def crossed( self, index: str, priceticks: int ) -> list:
+        keys = self.indexes[index]
+        if index in ( "below", "troughs" ):
+            position = bisect_left( keys, ( priceticks, float("-inf") ) )
+            crossed = keys[position:]
+            del keys[position:]
+        else:
+            position = bisect_right( keys, ( priceticks, float("inf") ) )
+            crossed = keys[:position]
+            del keys[:position]
+        triggers = []
+        for ticks, triggerid in crossed:
+            trigger = self.triggers[triggerid]
+            del trigger.keys[index]
+            triggers.append( trigger )
+        return triggers
+
+    # Evaluate a price (in integer ticks) and return the triggers that fired.
+    def evaluate( self, priceticks: int ) -> list:
+        self.lastticks = priceticks
+
+        # Slide the trailing thresholds behind a new highest (or lowest) price.
+        for trigger in self.crossed( "peaks", priceticks ):
+            trigger.extreme = priceticks
+            trigger.limit = priceticks * self.quotetick * ( 1 - trigger.percent )
+            self.discard( trigger, "below" )
+            self.insert( trigger, "below", ceilingticks( trigger.limit / self.quotetick ) - 1 )
+            self.insert( trigger, "peaks", priceticks + 1 )
+        for trigger in self.crossed( "troughs", priceticks ):
+            trigger.extreme = priceticks
+            trigger.limit = priceticks * self.quotetick * ( 1 + trigger.percent )
+            self.discard( trigger, "above" )
+            self.insert( trigger, "above", floorticks( trigger.limit / self.quotetick ) + 1 )
+            self.insert( trigger, "troughs", priceticks - 1 )
+
+        # Fire the triggers whose exit thresholds were crossed.
+        fired = self.crossed( "below", priceticks ) + self.crossed( "above", priceticks )
+        for trigger in fired:
+            self.fire( trigger, priceticks )
+        return fired
+
+    def fire( self, trigger: Trigger, priceticks: int ) -> None:
+        trigger.price = priceticks * self.quotetick
+        for index in list( trigger.keys ):
+            self.discard( trigger, index )
+        del self.triggers[trigger.id]
+        triggered()
+        record( "trigger", trigger=trigger.id, type=trigger.kind, limit=trigger.limit, price=trigger.price )
+        if trigger.callback is not None:
+            trigger.callback( trigger )
+        for future in trigger.waiters:
+            if not future.done():
+                future.set_result( trigger )
+
+    # Wait until one of the triggers specified fires, cancel the others (one cancels the others) and return the one that fired.
+    async def wait( self, *triggers ) -> Trigger:
+        for trigger in triggers:
+            if trigger.fired:
+                break
+        else:
+            future = asyncio.get_running_loop().create_future()
+            for trigger in triggers:
+                trigger.waiters.append( future )
+            trigger = await future
+        for other in triggers:
+            if other is not trigger and not other.fired:
+                self.cancel( other )
+        return trigger
+
+    # Evaluate the triggers on the best price of one side of an orderbook feed (see orderbookfeed.monitororderbook).
+    # Unless persistent, return the triggers fired once none are left.
+    async def monitor( self, feed, entries, persistent: bool = False ) -> list:
+        fired = []
+        async for messageid, snapshot, sides in entries:
+
+            # Skip messages that leave the monitored side of the orderbook unchanged.
+            if self.side not in sides:
+                continue
+            if self.side == "BUY":
+                priceticks = feed.book.bestbidticks()
+            else:
+                priceticks = feed.book.bestaskticks()
+            if priceticks is None:
+                continue
+            if feed.book.quotetick != self.quotetick:
+                priceticks = self.ticks( feed.book.price( priceticks ) )
+
+            # No threshold can be crossed by an unchanged price (new triggers were evaluated on it when added).
+            if priceticks != self.lastticks:
+                fired.extend( self.evaluate( priceticks ) )
+            if not persistent and not self.triggers:
+                return fired
@@ -0,0 +1,185 @@
+import json
+import asyncio
+import threading
+import websockets
+
+from logger import logger
+from messenger import smsalert
+from endpoints import websocketurl
+from messagedecoder import loads
+from backoff import Backoff
+from backoff import alertattempts
+from orderbookfeed import OrderBookFeed
+from orderbookfeed import channelsubscriptionhandler
+from orderfulfillmentvalidator import OrderFulfillmentValidator
+from trailingtrigger import TrailingTrigger
+
+
+# Keep one websocket connection to dYdX open across strategy phases.
+# Orderbook and orders channel subscriptions stay live for the lifetime of the hub.
+# Monitors and order validators can therefore be re-entered without reconnecting or downloading a new snapshot.
+# The hub runs its own event loop in a background thread, so synchronous strategies drive it with call().
+class WebsocketHub:
+
+    def __init__( self, url: str = websocketurl ):
+        self.url = url
+        self.websocket = None
+        self.subscriptions = []
+        self.orderbooks = {}
+        self.validators = {}
+        self.engines = {}
+        self.evaluators = []
+        self.loop = None
+        self.thread = None
+        self.reader = None
+        self.restarts = Backoff()
+        self.restart = None
+
+    # Start the event loop thread and connect the websocket.
+    def start( self ) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread( target=self.loop.run_forever, name='websockethub', daemon=True )
+        self.thread.start()
+        self.call( self.connect() )
+
+    # Run a coroutine on the hub event loop from a synchronous caller and return its result.
+    def call( self, coroutine, timeout: float = None ):
+        return asyncio.run_coroutine_threadsafe( coroutine, self.loop ).result( timeout )
+
+    # Close the websocket and stop the event loop thread.
+    def stop( self ) -> None:
+        self.call( self.close() )
+        self.loop.call_soon_threadsafe( self.loop.stop )
+        self.thread.join()
+
+    async def connect( self ) -> None:
+        logger.debug( f'Using websockets library to connect to {self.url}...' )
+        self.websocket = await websockets.connect( self.url )
+        # Restore the subscriptions held before a reconnection.
+        for subscriptionrequest in self.subscriptions:
+            logger.debug( f'Sending the following channel subscription request to {self.url}: {subscriptionrequest}' )
+            await channelsubscriptionhandler( self.websocket, subscriptionrequest )
+        if self.reader is None:
+            self.startreader()
+
+    # Read in a task supervised by supervise(), so the subscriptions are never left without a reader.
+    def startreader( self ) -> None:
+        self.restart = None
+        self.reader = asyncio.ensure_future( self.read() )
+        self.reader.add_done_callback( self.supervise )
+
+    # Log and alert when the reader task ends unexpectedly, then restart it (after a jittered exponential backoff).
+    # The reader only ends when the hub is closed (it is cancelled) unless something it does not handle goes wrong.
+    def supervise( self, reader: asyncio.Future ) -> None:
+        if reader.cancelled() or reader is not self.reader:
+            return
+        exception = reader.exception()
+        logger.critical( f'the websocket reader stopped with the following exception "{exception!r}".', exc_info=exception )
+        smsalert( f'the websocket reader stopped ({exception!r}): restarting it.' )
+        delay = self.restarts.delay()
+        logger.debug( f'restarting the websocket reader in {delay:.2f} seconds (restart {self.restarts.attempts})...' )
+        self.restart = asyncio.get_event_loop().call_later( delay, self.startreader )
+
+    async def close( self ) -> None:
+        for evaluator in self.evaluators:
+            evaluator.cancel()
+        self.evaluators.clear()
+        if self.restart is not None:
+            self.restart.cancel()
+            self.restart = None
+        if self.reader is not None:
+            self.reader.cancel()
+            self.reader = None
+        if self.websocket is not None:
+            logger.debug( f'Closing websocket connection...' )
+            await self.websocket.close( code=1000, reason='hub stopped.' )
+
+    # Read messages for every subscription and reconnect whenever the connection drops.
+    # A message that cannot be decoded or handled is logged and skipped, so it never stops the other subscriptions.
+    # Reconnection attempts are delayed with jittered exponential backoff, and the orderbook feeds serve
+    # their last known orderbooks (with the trigger state of their monitors) until the new snapshots arrive.
+    async def read( self ) -> None:
+        backoff = Backoff()
+        while True:
+            try:
+                async for textoutput in self.websocket:
+                    try:
+                        self.dispatch( loads( textoutput ) )
+                    except Exception as e:
+                        logger.error( f'unable to handle a message from {self.url} ("{e!r}"): {textoutput[:200]}', exc_info=True )
+                logger.debug( f'connection closed by {self.url}.' )
+            except websockets.exceptions.ConnectionClosed as e:
+                logger.debug( f'connection closed with the following exception "{e}".' )
+
+            # Start the backoff over if the last connection delivered every snapshot.
+            if not any( feed.stale for feed in self.orderbooks.values() ):
+                backoff.reset()
+                self.restarts.reset()
+            for feed in self.orderbooks.values():
+                feed.disconnected()
+            while True:
+                delay = backoff.delay()
+                if backoff.attempts == alertattempts:
+                    smsalert( f'the websocket connection dropped: {alertattempts} reconnection attempts failed.' )
+                logger.debug( f'retrying connection in {delay:.2f} seconds (attempt {backoff.attempts})...' )
+                await asyncio.sleep( delay )
+                try:
+                    await self.connect()
+                    break
+                except ( OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake ) as e:
+                    logger.debug( f'reconnection failed with the following exception "{e}".' )
+
+    # Route a message to the orderbook feed or the order fulfillment validator of its channel.
+    def dispatch( self, dictionary: dict ) -> None:
+        channel = dictionary.get( "channel" )
+        if channel == "orderbook":
+            feed = self.orderbooks.get( dictionary.get( "id" ) )
+            if feed is not None:
+                feed.handle( dictionary )
+        elif channel == "orders":
+            validator = self.validators.get( str( dictionary.get( "id" ) ).lower() )
+            if validator is not None:
+                validator.handle( dictionary )
+
+    async def subscribe( self, subscriptionrequest: dict ) -> None:
+        if subscriptionrequest in self.subscriptions:
+            return
+        self.subscriptions.append( subscriptionrequest )
+        logger.debug( f'Sending the following channel subscription request to {self.url}: {subscriptionrequest}' )
+        await channelsubscriptionhandler( self.websocket, subscriptionrequest )
+
+    # Return the live orderbook feed of a market (subscribing to the orderbook channel the first time).
+    # The tick size specified the first time a market is requested applies to the lifetime of its feed.
+    async def orderbook( self, market: str, quotetick=None ) -> OrderBookFeed:
+        if market not in self.orderbooks:
+            self.orderbooks[market] = OrderBookFeed( market, quotetick )
+            await self.subscribe( self.orderbooks[market].subscription( "subscribe" ) )
+        return self.orderbooks[market]
+
+    # Return the order fulfillment validator of a wallet (subscribing to its orders channel the first time).
+    async def orders( self, walletaddress: str ) -> OrderFulfillmentValidator:
+        if walletaddress.lower() not in self.validators:
+            self.validators[walletaddress.lower()] = OrderFulfillmentValidator( walletaddress )
+            await self.subscribe( self.validators[walletaddress.lower()].subscription( "subscribe" ) )
+        return self.validators[walletaddress.lower()]
+
+    # Return the trigger engine evaluating the highest bid ("BUY") or the lowest ask ("SELL") of a market (starting it the first time).
+    # Every strategy sharing the hub adds its triggers to the same engine, which keeps evaluating the live feed.
+    async def triggers( self, market: str, side: str = "BUY", quotetick=None ) -> TrailingTrigger:
+        if ( market, side ) not in self.engines:
+            feed = await self.orderbook( market, quotetick )
+            engine = TrailingTrigger( feed.book.quotetick or quotetick or '0.01', side )
+            self.engines[( market, side )] = engine
+            self.evaluators.append( asyncio.ensure_future( engine.monitor( feed, feed.listen(), persistent=True ) ) )
+        return self.engines[( market, side )]
+
+    # Run orderbook handlers against the live feed of a market (see orderbookfeed.monitororderbook).
+    async def monitororderbook( self, market: str, *handlers, quotetick=None ):
+        feed = await self.orderbook( market, quotetick )
+        listeners = [ feed.listen() for handler in handlers ]
+        try:
+            results = await asyncio.gather( *[ handler( feed, entries ) for handler, entries in zip( handlers, listeners ) ] )
+        finally:
+            for entries in listeners:
+                await entries.aclose()
+        return results[0] if len( results ) == 1 else tuple( results )
@@ -1,24 +1,18 @@
 #!/usr/bin/env python3
 
-import json
-from decimal import Decimal
+import sys
 
-from dydx.client import Client
-import dydx.constants as consts
-import dydx.util as utils
-
-from credentials import client
+from history import allfills
+from history import export
+from history import arguments
 
 
 # Get all fills from the orderbook
-resultlimit = Decimal("2")
-all_fills = client.get_fills(
-    market=['WETH-DAI'], # 'DAI-WETH' side of the book is not included
-    limit=resultlimit,  # optional
-    startingBefore=None  # optional
-)
-
-jsondata = json.dumps( all_fills, sort_keys=True, indent=4, separators=(',', ': ') )
+# 'DAI-WETH' side of the book is not included
+# Fills are written to stdout as they are fetched (NDJSON by default or CSV): py get-all-fills.py csv all 10000 > fills.csv
+resultlimit = 2
+format, options = arguments( limit=resultlimit )
+export( allfills( 'WETH-DAI', **options ), format )
 
-print ( jsondata )
-print ( "The results are limited to the most recent " , resultlimit , " orders.")
+if options["limit"]:
+    print ( "The results are limited to the most recent" , options["limit"] , "fills.", file=sys.stderr )
@@ -1,28 +1,19 @@
 #!/usr/bin/env python3
 
-import json
-import datetime
-from decimal import Decimal
+import sys
 
-from dydx.client import Client
-import dydx.constants as consts
-import dydx.util as utils
-
-from credentials import client
+from history import allorders
+from history import export
+from history import arguments
 
 
 # Get a limited number of all WETH-DAI orders created over the period defined below
-resultlimit = Decimal("5")
+# Orders are written to stdout as they are fetched (NDJSON by default or CSV): py get-all-orders.py csv 30 10000 > orders.csv
+resultlimit = 5
 period = 5
-timedelta = datetime.datetime.now() - datetime.timedelta(days=period)
-all_orders = client.get_orders(
-    market=['WETH-DAI'],
-    limit=resultlimit,  # optional
-    startingBefore=timedelta  # optional
-)
-
-jsondata = json.dumps( all_orders, sort_keys=True, indent=4, separators=(',', ': ') )
+format, options = arguments( days=period, limit=resultlimit )
+count = export( allorders( 'WETH-DAI', **options ), format )
 
-print ( jsondata )
-print ( "The above is a list of all the orders created over the last " , period , " days.")
-print ( "The results are limited to the most recent " , resultlimit , " orders.")
+print ( "The above is a list of all the orders created since" , options["since"] or "the first order" , f"({count} orders).", file=sys.stderr )
+if options["limit"]:
+    print ( "The results are limited to the most recent" , options["limit"] , "orders.", file=sys.stderr )
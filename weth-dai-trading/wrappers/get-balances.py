@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
 from dydx.client import Client
 import dydx.constants as consts
@@ -9,19 +10,22 @@ import dydx.util as utils
 from credentials import client
 
 
-# Get wallet balances
-ethwalletbalance = client.eth.get_my_wallet_balance(consts.MARKET_WETH)
-usdwalletbalance = client.eth.get_my_wallet_balance(consts.MARKET_USDC)
-daiwalletbalance = client.eth.get_my_wallet_balance(consts.MARKET_DAI)
+# Get wallet balances and dYdX account balances concurrently
+with ThreadPoolExecutor() as executor:
+    ethwalletrequest = executor.submit(client.eth.get_my_wallet_balance, consts.MARKET_WETH)
+    usdwalletrequest = executor.submit(client.eth.get_my_wallet_balance, consts.MARKET_USDC)
+    daiwalletrequest = executor.submit(client.eth.get_my_wallet_balance, consts.MARKET_DAI)
+    accountrequest = executor.submit(client.eth.solo.get_my_balances)
+ethwalletbalance = ethwalletrequest.result()
+usdwalletbalance = usdwalletrequest.result()
+daiwalletbalance = daiwalletrequest.result()
+accountbalances = accountrequest.result()
 
 # Format wallet balances using DECIMAL information for the asset
 formattedethwalletbalance = Decimal(ethwalletbalance) / (10**consts.DECIMALS_WETH)
 formattedusdwalletbalance = Decimal(usdwalletbalance) / (10**consts.DECIMALS_USDC)
 formatteddaiwalletbalance = Decimal(daiwalletbalance) / (10**consts.DECIMALS_DAI)
 
-# Get dYdX account balances
-accountbalances = client.eth.solo.get_my_balances()
-
 # Disaggregate asset account balances
 ethaccountbalance = Decimal(accountbalances[consts.MARKET_WETH] / (10**consts.DECIMALS_WETH))
 usdaccountbalance = Decimal(accountbalances[consts.MARKET_USDC] / (10**consts.DECIMALS_USDC))
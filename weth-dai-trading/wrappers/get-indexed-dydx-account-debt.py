@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
 from dydx.client import Client
 import dydx.constants as consts
@@ -9,15 +10,16 @@ import dydx.util as utils
 from credentials import client
 
 
-# Get dYdX account collateralization
-collateralization = client.eth.solo.get_my_collateralization()
-
-# Get latest index prices from oracles
-ethpricing = client.eth.solo.get_oracle_price( 0 )
-daipricing = client.eth.solo.get_oracle_price( 3 )
-
-# Get dYdX account balances
-balances = client.eth.solo.get_my_balances()
+# Get dYdX account collateralization, latest index prices from oracles and dYdX account balances concurrently
+with ThreadPoolExecutor() as executor:
+    collateralizationrequest = executor.submit( client.eth.solo.get_my_collateralization )
+    ethpricingrequest = executor.submit( client.eth.solo.get_oracle_price, 0 )
+    daipricingrequest = executor.submit( client.eth.solo.get_oracle_price, 3 )
+    balancesrequest = executor.submit( client.eth.solo.get_my_balances )
+collateralization = collateralizationrequest.result()
+ethpricing = ethpricingrequest.result()
+daipricing = daipricingrequest.result()
+balances = balancesrequest.result()
 
 # Disaggregate asset balances
 ethbalance = Decimal(balances[consts.MARKET_WETH]) / (10**consts.DECIMALS_WETH)
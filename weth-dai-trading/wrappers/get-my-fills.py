@@ -1,20 +1,12 @@
 #!/usr/bin/env python3
 
-import json
-
-import dydx.constants as consts
-import dydx.util as utils
-
-from credentials import client
+from history import myfills
+from history import export
+from history import arguments
 
 
 # Get fills created by my account for both sides of the orderbook
-my_fills = client.get_my_fills(
-    market=['WETH-DAI'],
-    limit=None,  # optional
-    startingBefore=None  # optional
-)
-
-jsondata = json.dumps( my_fills, sort_keys=True, indent=4, separators=(',', ': ') )
-
-print ( jsondata )
+# Pages are fetched as they are written to stdout (NDJSON by default or CSV), so the whole history never sits in memory
+# For example: py get-my-fills.py csv 30 > fills.csv (the last 30 days)
+format, options = arguments()
+export( myfills( 'WETH-DAI', **options ), format )
@@ -1,21 +1,12 @@
 #!/usr/bin/env python3
 
-import json
-
-from dydx.client import Client
-import dydx.constants as consts
-import dydx.util as utils
-
-from credentials import client
+from history import myorders
+from history import export
+from history import arguments
 
 
 # Get WETH-DAI orders created by my account
-my_orders = client.get_my_orders(
-    market=['WETH-DAI'],
-    limit=None,
-    startingBefore=None
-)
-
-jsondata = json.dumps( my_orders, sort_keys=True, indent=4, separators=(',', ': ') )
-
-print ( jsondata )
+# Pages are fetched as they are written to stdout (NDJSON by default or CSV), so the whole history never sits in memory
+# For example: py get-my-orders.py csv 30 > orders.csv (the last 30 days)
+format, options = arguments()
+export( myorders( 'WETH-DAI', **options ), format )
@@ -1,20 +1,12 @@
 #!/usr/bin/env python3
 
-import json
-
-import dydx.constants as consts
-import dydx.util as utils
-
-from credentials import client
+from history import mytrades
+from history import export
+from history import arguments
 
 
 # Get trades created by my account
-my_trades = client.get_my_trades(
-    market=['WETH-DAI'],
-    limit=None,  # optional
-    startingBefore=None  # optional
-)
-
-jsondata = json.dumps( my_trades, sort_keys=True, indent=4, separators=(',', ': ') )
-
-print ( jsondata )
+# Pages are fetched as they are written to stdout (NDJSON by default or CSV), so the whole history never sits in memory
+# For example: py get-my-trades.py csv 30 > trades.csv (the last 30 days)
+format, options = arguments()
+export( mytrades( 'WETH-DAI', **options ), format )
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import sys
+import csv
+import json
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from credentials import client
+
+
+# Entries requested per page (the most dYdX returns at once)
+pagesize = 100
+
+
+# Return the dYdX time (ISO-8601, in milliseconds) one millisecond after the time specified
+# Passed as startingBefore, it returns the entries created at the time specified again
+def justafter( createdat: str ) -> str:
+    moment = datetime.datetime.strptime( createdat.rstrip( 'Z' ), '%Y-%m-%dT%H:%M:%S.%f' ) + datetime.timedelta( milliseconds=1 )
+    return moment.strftime( '%Y-%m-%dT%H:%M:%S.%f' )[:-3] + 'Z'
+
+
+# Iterate over the entries of a paginated dYdX endpoint (trades, fills or orders), newest first
+# Pages are walked lazily with startingBefore, a millisecond after the creation time of the last entry of the previous page
+# (startingBefore is exclusive), so entries sharing that time are fetched again and those already yielded are skipped by idfield
+# If more than a page of entries share a creation time, paging moves on past that time (dYdX pages by time only)
+# The next page is requested from a background thread while the current one is consumed, so at most two pages are held in memory
+# Stop at the entries created before since (an ISO-8601 string) or after limit entries (without requesting another page)
+def paginate( fetch, key: str, idfield: str = 'id', since: str = None, until: str = None, limit: int = None ):
+    with ThreadPoolExecutor( max_workers=1 ) as executor:
+        request = executor.submit( fetch, limit=pagesize, startingBefore=until )
+        boundary = None
+        seen = set()
+        count = 0
+        while request is not None:
+            page = request.result()[key]
+            request = None
+            fresh = [ entry for entry in page if entry[idfield] not in seen ]
+            last = page[-1]["createdAt"] if page else None
+            wanted = limit is None or count + len( fresh ) < limit
+            if len( page ) == pagesize and ( since is None or last >= since ) and wanted:
+                if last == boundary and not fresh:
+                    startingbefore = boundary
+                    seen = set()
+                else:
+                    if last != boundary:
+                        seen = set()
+                    boundary = last
+                    seen.update( entry[idfield] for entry in page if entry["createdAt"] == boundary )
+                    startingbefore = justafter( boundary )
+                request = executor.submit( fetch, limit=pagesize, startingBefore=startingbefore )
+            for entry in fresh:
+                if since is not None and entry["createdAt"] < since or limit is not None and count >= limit:
+                    if request is not None:
+                        request.cancel()
+                    return
+                count += 1
+                yield entry
+
+
+# Iterate over the trades, fills and orders of my account in a market
+def mytrades( market: str = 'WETH-DAI', **options ):
+    return paginate( lambda **page: client.get_my_trades( market=[ market ], **page ), "trades", 'uuid', **options )
+
+def myfills( market: str = 'WETH-DAI', **options ):
+    return paginate( lambda **page: client.get_my_fills( market=[ market ], **page ), "fills", 'uuid', **options )
+
+def myorders( market: str = 'WETH-DAI', **options ):
+    return paginate( lambda **page: client.get_my_orders( market=[ market ], **page ), "orders", **options )
+
+
+# Iterate over the fills and orders of every account in a market
+def allfills( market: str = 'WETH-DAI', **options ):
+    return paginate( lambda **page: client.get_fills( market=[ market ], **page ), "fills", 'uuid', **options )
+
+def allorders( market: str = 'WETH-DAI', **options ):
+    return paginate( lambda **page: client.get_orders( market=[ market ], **page ), "orders", **options )
+
+
+# Write entries to a stream as they arrive, one JSON object per line (ndjson) or one CSV row per entry (csv)
+# CSV columns are the fields of the first entry (nested fields are written as JSON)
+def export( entries, format: str = 'ndjson', stream=sys.stdout ) -> int:
+    count = 0
+    writer = None
+    for entry in entries:
+        if format == 'csv':
+            if writer is None:
+                writer = csv.DictWriter( stream, fieldnames=list( entry ), extrasaction='ignore' )
+                writer.writeheader()
+            writer.writerow( { field: json.dumps( value ) if isinstance( value, ( dict, list ) ) else value for field, value in entry.items() } )
+        else:
+            stream.write( json.dumps( entry, sort_keys=True, default=str ) + '\n' )
+        count += 1
+    stream.flush()
+    return count
+
+
+# Read the export options of a wrapper from the command line: [ndjson|csv] [days|all] [limit|all]
+# For example: py get-my-fills.py csv 30 > fills.csv (the fills of the last 30 days)
+def arguments( days: float = None, limit: int = None ):
+    format = sys.argv[1] if len( sys.argv ) > 1 else 'ndjson'
+    if format not in ( 'ndjson', 'csv' ):
+        sys.exit( f'usage: {sys.argv[0]} [ndjson|csv] [days|all] [limit|all]' )
+    days = days if len( sys.argv ) <= 2 else None if sys.argv[2] == 'all' else float( sys.argv[2] )
+    limit = limit if len( sys.argv ) <= 3 else None if sys.argv[3] == 'all' else int( sys.argv[3] )
+    since = None
+    if days is not None:
+        since = ( datetime.datetime.utcnow() - datetime.timedelta( days=days ) ).isoformat( timespec='milliseconds' ) + 'Z'
+    return format, { "since": since, "limit": limit }